@@ -1,35 +1,133 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
-from werkzeug.utils import secure_filename
 import os
+import io
+import functools
+import json
+import tempfile
+import time
 import numpy as np
 from datetime import date
-from tensorflow.keras.models import load_model
-from utils import preprocess_image
+from utils import IMG_SIZE, image_buffer, decode_image_bytes, preprocess_into
+from batcher import InferenceBatcher
+from model_backend import load_model_backend, ModelLoader
+import inference_server
+from runtime_config import thread_settings, configure_opencv, configure_tensorflow
+from batch_input import is_archive, iter_archive, fruit_from_path, chunked, ARCHIVE_ERRORS, ArchiveTooLarge
+from jobs import JobStore, JobRunner
+from result_cache import PredictionCache, content_key, perceptual_key
+from metrics import stage, record_model_status, render as render_metrics, IN_FLIGHT, PREDICTIONS, REQUEST_SECONDS
 from decay import compute_all_decay, IDEAL_SHELF, ROOM_SHELF, HIGH_HUMIDITY_SHELF
+from vector_decay import TRAJECTORY_RESOLUTIONS, freshness_trajectory
 
 app = Flask(__name__)
+CORS_ORIGINS = [
+    "http://localhost:3000",
+    "http://localhost:5173",
+    "https://freshness-indicator.netlify.app/"
+]
 CORS(app,
-     resources={r"/api/*": {"origins": [
-        "http://localhost:3000",
-        "http://localhost:5173",
-        "https://freshness-indicator.netlify.app/"
-    ]}},
+     resources={r"/api/*": {"origins": CORS_ORIGINS}},
     supports_credentials=True
 )
 
 # Configuration
-UPLOAD_FOLDER = 'uploads'
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'webp'}
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max
 
-# Create uploads folder if not exists
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-
 # Load model once at startup
-MODEL_PATH = os.path.join(os.path.dirname(__file__), '..', 'model.h5')
-model = load_model(MODEL_PATH)
+# MODEL_BACKEND=keras (model.h5), tflite (quantized model from code/convert_tflite.py)
+# or savedmodel (compiled serving function from code/export_savedmodel.py)
+MODEL_BACKEND = os.environ.get('MODEL_BACKEND', 'keras')
+MODEL_PATH = os.environ.get('MODEL_PATH', os.path.join(os.path.dirname(__file__), '..', 'model.h5'))
+TFLITE_MODEL_PATH = os.environ.get(
+    'TFLITE_MODEL_PATH', os.path.join(os.path.dirname(__file__), '..', 'model.tflite')
+)
+SAVEDMODEL_PATH = os.environ.get(
+    'SAVEDMODEL_PATH', os.path.join(os.path.dirname(__file__), '..', 'model_savedmodel')
+)
+# TFLITE_XNNPACK=0 keeps the memory-mapped weights shared between workers
+TFLITE_XNNPACK = os.environ.get('TFLITE_XNNPACK', '1') == '1'
+
+# MODEL_LOAD_MODE=background serves /api/health, /api/items and /api/ready
+# immediately while the model loads on a thread; MODEL_WARMUP=1 runs one
+# dummy inference before reporting ready
+MODEL_LOAD_MODE = os.environ.get('MODEL_LOAD_MODE', 'eager')
+MODEL_WARMUP = os.environ.get('MODEL_WARMUP', '0') == '1'
+MODEL_WAIT_SECONDS = float(os.environ.get('MODEL_WAIT_SECONDS', 30))
+
+# INFERENCE_SERVER=1 (gunicorn.conf.py): the model runs in the inference
+# processes started by the gunicorn master and this worker only decodes
+inference = inference_server.client()
+
+# TensorFlow / OpenCV threads sized to this worker's share of the CPU
+# budget (see runtime_config.py for overrides). With an inference server
+# that reserves INFERENCE_CPUS, the workers share only the cores left over.
+web_cpus = inference_server.worker_cpus() if inference is not None else None
+THREADS = thread_settings(cpus=len(web_cpus) if web_cpus else None)
+configure_opencv(THREADS)
+
+def load_model():
+    if MODEL_BACKEND in ('keras', 'savedmodel'):
+        configure_tensorflow(THREADS)
+    return load_model_backend(
+        MODEL_BACKEND, MODEL_PATH, TFLITE_MODEL_PATH, SAVEDMODEL_PATH,
+        num_threads=THREADS['intra_op'], xnnpack=TFLITE_XNNPACK
+    )
+
+model_loader = ModelLoader(
+    inference.connect if inference is not None else load_model,
+    warmup=MODEL_WARMUP,
+    on_done=lambda loader: record_model_status(loader.status())
+)
+model_loader.start(background=MODEL_LOAD_MODE == 'background')
+
+# Micro-batching: concurrent /api/predict calls share one forward pass
+# (with INFERENCE_SERVER=1 the inference processes batch across all
+# workers, so don't wait here)
+BATCH_MAX_SIZE = int(os.environ.get('BATCH_MAX_SIZE', 16))
+BATCH_MAX_WAIT_MS = float(os.environ.get('BATCH_MAX_WAIT_MS', 5 if inference is None else 0))
+batcher = InferenceBatcher(
+    lambda imgs: model_loader.get().predict(imgs, verbose=0),
+    max_batch_size=BATCH_MAX_SIZE,
+    max_wait_ms=BATCH_MAX_WAIT_MS
+)
+
+# Result cache: repeated uploads skip decode and model.predict
+prediction_cache = PredictionCache(
+    max_entries=int(os.environ.get('CACHE_MAX_ENTRIES', 1024)),
+    ttl_seconds=float(os.environ.get('CACHE_TTL_SECONDS', 600)),
+    perceptual=os.environ.get('CACHE_PERCEPTUAL', '0') == '1'
+)
+
+# /api/predict/batch: images per forward pass and per request
+PREDICT_BATCH_SIZE = int(os.environ.get('PREDICT_BATCH_SIZE', 32))
+BATCH_MAX_IMAGES = int(os.environ.get('BATCH_MAX_IMAGES', 1000))
+# Most bytes read out of one uploaded archive (batch or job); each member
+# is also capped at MAX_CONTENT_LENGTH
+ARCHIVE_MAX_BYTES = int(os.environ.get('ARCHIVE_MAX_BYTES', 512 * 1024 * 1024))
+
+# /api/jobs: queued predictions in a local SQLite file, scored by
+# JOB_WORKERS background threads per process. The default file is in the
+# temp directory; point JOBS_DB at persistent storage to keep jobs across
+# restarts
+JOBS_DB = os.environ.get('JOBS_DB', os.path.join(tempfile.gettempdir(), 'freshness-jobs.db'))
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 1))
+JOB_MAX_IMAGES = int(os.environ.get('JOB_MAX_IMAGES', 5000))
+# Longest long-poll on /api/jobs/<id>?wait=. Each waiting request holds a
+# gunicorn thread here, so keep it short; asgi.py waits without a thread
+# and has its own, longer ASGI_JOB_WAIT_MAX_SECONDS
+JOB_WAIT_MAX_SECONDS = float(os.environ.get('JOB_WAIT_MAX_SECONDS', 5))
+job_store = JobStore(JOBS_DB)
+job_runner = JobRunner(
+    job_store,
+    lambda items: score_job_items(items),
+    workers=JOB_WORKERS,
+    chunk_size=PREDICT_BATCH_SIZE,
+    stale_seconds=float(os.environ.get('JOB_STALE_SECONDS', 120)),
+    ttl_seconds=float(os.environ.get('JOB_TTL_SECONDS', 24 * 3600)),
+    max_attempts=int(os.environ.get('JOB_MAX_ATTEMPTS', 3))
+)
 
 # Supported fruits and vegetables
 SUPPORTED_ITEMS = [
@@ -46,10 +144,240 @@ SUPPORTED_ITEMS = [
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def model_unavailable():
+    """503 response while the model is loading (or failed to load), otherwise None."""
+    if model_loader.wait(MODEL_WAIT_SECONDS):
+        return None
+    response = jsonify({"error": "Model is not ready", **model_loader.status()})
+    response.status_code = 503
+    response.headers['Retry-After'] = '5'
+    return response
+
+def predict_upload(data):
+    """Raw model output for encoded image bytes, served from the cache when possible."""
+    key = content_key(data)
+    raw_output = prediction_cache.get(key)
+    if raw_output is not None:
+        prediction_cache.record_hit()
+        return raw_output
+    
+    with stage('decode'):
+        img = decode_image_bytes(data)
+    
+    # Per-thread input buffer: batcher.predict copies it before returning
+    with stage('preprocess'):
+        img = preprocess_into(img, image_buffer())
+    
+    phash = perceptual_key(img) if prediction_cache.perceptual else None
+    raw_output = prediction_cache.get(phash)
+    if raw_output is not None:
+        prediction_cache.record_hit(perceptual=True)
+        prediction_cache.put(raw_output, key)
+        return raw_output
+    
+    prediction_cache.record_miss()
+    with stage('inference'):
+        raw_output = batcher.predict(img)
+    prediction_cache.put(raw_output, key, phash)
+    return raw_output
+
+def build_result(raw_output, fruit, trajectory=None):
+    """
+    Turn a raw model output into the /api/predict response payload, with
+    the full freshness curve when `trajectory` is 'day' or 'hour'.
+    """
+    initial_freshness = max(0, min(round(raw_output, 2), 100))
+    
+    # Compute decay
+    with stage('decay'):
+        decay_data = compute_all_decay(initial_freshness, fruit, date.today())
+        if trajectory:
+            trajectory_data = freshness_trajectory(initial_freshness, fruit, trajectory)
+    
+    # Determine status
+    room_final = decay_data['room_final']
+    if room_final > 70:
+        status = "FRESH"
+        status_color = "#22c55e"  # green
+    elif room_final > 40:
+        status = "CONSUME SOON"
+        status_color = "#f59e0b"  # amber
+    else:
+        status = "SPOILED"
+        status_color = "#ef4444"  # red
+    PREDICTIONS.labels(fruit, status).inc()
+    
+    # Prepare response
+    response = {
+        "success": True,
+        "fruit": fruit.capitalize(),
+        "initial_freshness": initial_freshness,
+        "decay": decay_data,
+        "status": status,
+        "status_color": status_color,
+        "shelf_life": {
+            "ideal": IDEAL_SHELF[fruit],
+            "room": ROOM_SHELF[fruit],
+            "humid": HIGH_HUMIDITY_SHELF[fruit]
+        },
+        "chart_data": {
+            "labels": ["Ideal Storage", "Room Temp", "High Humidity"],
+            "freshness": [
+                decay_data['ideal_final'],
+                decay_data['room_final'],
+                decay_data['humid_final']
+            ],
+            "days_left": [
+                decay_data['ideal_days_left'],
+                decay_data['room_days_left'],
+                decay_data['humid_days_left']
+            ]
+        }
+    }
+    if trajectory:
+        response['trajectory'] = trajectory_data
+    
+    return response
+
+def score_items(items, batch):
+    """
+    One result line per (name, fruit, data) item, scoring the valid images
+    in a single forward pass through `batch` (a float32 buffer with room
+    for every item).
+    """
+    lines = [None] * len(items)
+    slots = []
+    
+    for i, (name, fruit, data) in enumerate(items):
+        if fruit not in IDEAL_SHELF:
+            lines[i] = {"image": name, "error": f"Unsupported item: {fruit}"}
+        elif data is None:
+            lines[i] = {"image": name, "error": "Invalid or oversized file"}
+        else:
+            try:
+                with stage('decode'):
+                    img = decode_image_bytes(data)
+                with stage('preprocess'):
+                    preprocess_into(img, batch[len(slots)])
+                slots.append(i)
+            except ValueError as e:
+                lines[i] = {"image": name, "error": str(e)}
+    
+    if slots:
+        try:
+            with stage('inference'):
+                preds = model_loader.get().predict(batch[:len(slots)], verbose=0)
+        except Exception as e:
+            preds = None
+            for i in slots:
+                lines[i] = {"image": items[i][0], "error": str(e)}
+        
+        if preds is not None:
+            for i, pred in zip(slots, preds):
+                name, fruit, _ = items[i]
+                lines[i] = {"image": name, **build_result(float(pred[0]), fruit)}
+    
+    return lines
+
+def score_job_items(items):
+    """JobRunner callback: waits for the model (a failed load fails the job)."""
+    model_loader.get()
+    batch = np.empty((len(items), IMG_SIZE, IMG_SIZE, 3), dtype=np.float32)
+    return score_items(items, batch)
+
+def job_items(archive, uploads, fruits, default_fruit):
+    """
+    ([(name, fruit, data), ...], None) for a job, or (None, error message).
+    
+    Takes either an `archive` ((filename, bytes), fruits from member
+    folders like /api/predict/batch) or `uploads` ([(filename, bytes)] with
+    one fruit each, or `default_fruit` for all of them).
+    """
+    if archive is not None:
+        filename, data = archive
+        if not is_archive(filename):
+            return None, "Invalid archive type. Allowed: zip, tar, tar.gz"
+        items = []
+        try:
+            members = iter_archive(io.BytesIO(data), filename, app.config['MAX_CONTENT_LENGTH'], ARCHIVE_MAX_BYTES)
+            for name, member in members:
+                if not allowed_file(name):
+                    continue
+                items.append((name, fruit_from_path(name, IDEAL_SHELF, default_fruit), member))
+                # Stop decompressing as soon as the job is too big
+                if len(items) > JOB_MAX_IMAGES:
+                    members.close()
+                    break
+        except ArchiveTooLarge as e:
+            return None, str(e)
+        except ARCHIVE_ERRORS:
+            return None, "Could not read archive"
+    else:
+        if not uploads:
+            return None, "No images or archive provided"
+        if not fruits:
+            fruits = [default_fruit] * len(uploads)
+        if len(fruits) != len(uploads):
+            return None, "Number of fruits does not match number of images"
+        items = [
+            (filename, fruit, data if allowed_file(filename) else None)
+            for (filename, data), fruit in zip(uploads, fruits)
+        ]
+    
+    if not items:
+        return None, "No images found"
+    if len(items) > JOB_MAX_IMAGES:
+        return None, f"Job limit of {JOB_MAX_IMAGES} images exceeded"
+    return items, None
+
+def job_urls(job_id):
+    return {
+        "status_url": f"/api/jobs/{job_id}",
+        "results_url": f"/api/jobs/{job_id}/results"
+    }
+
+@app.before_request
+def start_job_runner():
+    # Started by the first request rather than on import, so importing the
+    # app (tests, benchmarks, a preloading gunicorn master) runs no job
+    # threads; gunicorn.conf.py also starts it as each worker forks
+    job_runner.start()
+
+@app.before_request
+def track_request_start():
+    if request.path.startswith('/api/'):
+        g.request_start = time.perf_counter()
+        IN_FLIGHT.inc()
+
+def _observe_request(start, endpoint):
+    IN_FLIGHT.dec()
+    REQUEST_SECONDS.labels(endpoint or 'unknown').observe(time.perf_counter() - start)
+
+@app.after_request
+def track_request_end(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        # Observed once the server has sent the whole body, so streamed
+        # responses (predict_batch, job_results) count until their last line
+        response.call_on_close(functools.partial(_observe_request, start, request.endpoint))
+    return response
+
+@app.teardown_request
+def track_request_abort(exc=None):
+    # Requests that never got as far as after_request
+    start = g.pop('request_start', None)
+    if start is not None:
+        _observe_request(start, request.endpoint)
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     return jsonify({"status": "healthy", "message": "Freshness API is running"})
 
+@app.route('/api/ready', methods=['GET'])
+def readiness_check():
+    status = model_loader.status()
+    return jsonify(status), 200 if status["ready"] else 503
+
 @app.route('/api/items', methods=['GET'])
 def get_items():
     return jsonify({"items": SUPPORTED_ITEMS})
@@ -57,12 +385,18 @@ def get_items():
 @app.route('/api/predict', methods=['POST'])
 def predict():
     try:
+        # Receive and parse the multipart upload
+        with stage('receive'):
+            files, form = request.files, request.form
+        
         # Check if image file is present
-        if 'image' not in request.files:
+        if 'image' not in files:
             return jsonify({"error": "No image file provided"}), 400
         
-        file = request.files['image']
-        fruit = request.form.get('fruit', '').lower()
+        file = files['image']
+        fruit = form.get('fruit', '').lower()
+        # Optional day-by-day or hourly curve until spoilage
+        trajectory = request.args.get('trajectory') or form.get('trajectory')
         
         # Validate file
         if file.filename == '':
@@ -75,69 +409,167 @@ def predict():
         if fruit not in IDEAL_SHELF:
             return jsonify({"error": f"Unsupported item: {fruit}"}), 400
         
-        # Save and process file
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
+        if trajectory and trajectory not in TRAJECTORY_RESOLUTIONS:
+            return jsonify({"error": "trajectory must be 'day' or 'hour'"}), 400
+        
+        # Model may still be loading in background mode
+        unavailable = model_unavailable()
+        if unavailable is not None:
+            return unavailable
+        
+        # Decode in memory (no temp file) and predict, reusing cached results
+        response = build_result(predict_upload(file.read()), fruit, trajectory)
+        with stage('serialize'):
+            return jsonify(response)
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/predict/batch', methods=['POST'])
+def predict_batch():
+    """
+    Score many images in one request.
+    
+    Accepts either multipart `images` files (with a matching list of
+    `fruits`, or one `fruit` for all of them) or a single zip/tar
+    `archive`. Archive members take their fruit from their parent folder
+    (e.g. ``apple/img1.jpg``) and fall back to the `fruit` field.
+    Results are streamed back as NDJSON, one line per image, in order.
+    """
+    unavailable = model_unavailable()
+    if unavailable is not None:
+        return unavailable
+    
+    default_fruit = request.form.get('fruit', '').lower()
+    read_errors = []
+    
+    if 'archive' in request.files:
+        archive = request.files['archive']
+        if not is_archive(archive.filename):
+            return jsonify({"error": "Invalid archive type. Allowed: zip, tar, tar.gz"}), 400
         
+        # Upload streams are closed once the view returns, so buffer the
+        # (size-capped) body now and decode lazily while streaming. Opening
+        # it here answers 400 for unreadable archives before any output.
         try:
-            # Preprocess and predict
-            img = preprocess_image(filepath)
-            initial_freshness = float(model.predict(img, verbose=0)[0][0])
-            initial_freshness = max(0, min(round(initial_freshness, 2), 100))
-            
-            # Compute decay
-            decay_data = compute_all_decay(initial_freshness, fruit, date.today())
-            
-            # Determine status
-            room_final = decay_data['room_final']
-            if room_final > 70:
-                status = "FRESH"
-                status_color = "#22c55e"  # green
-            elif room_final > 40:
-                status = "CONSUME SOON"
-                status_color = "#f59e0b"  # amber
-            else:
-                status = "SPOILED"
-                status_color = "#ef4444"  # red
+            members = iter_archive(
+                io.BytesIO(archive.read()), archive.filename, app.config['MAX_CONTENT_LENGTH'], ARCHIVE_MAX_BYTES
+            )
+        except ARCHIVE_ERRORS:
+            return jsonify({"error": "Could not read archive"}), 400
+        
+        def items():
+            # A damaged member ends the stream with an error line
+            try:
+                for name, data in members:
+                    if not allowed_file(name):
+                        continue
+                    yield name, fruit_from_path(name, IDEAL_SHELF, default_fruit), data
+            except ArchiveTooLarge as e:
+                read_errors.append(str(e))
+            except ARCHIVE_ERRORS as e:
+                read_errors.append(f"Could not read archive: {e}")
+    else:
+        files = request.files.getlist('images')
+        if not files:
+            return jsonify({"error": "No images or archive provided"}), 400
+        
+        fruits = [f.lower() for f in request.form.getlist('fruits')]
+        if not fruits:
+            fruits = [default_fruit] * len(files)
+        if len(fruits) != len(files):
+            return jsonify({"error": "Number of fruits does not match number of images"}), 400
+        
+        uploads = [
+            (file.filename, fruit, file.read() if allowed_file(file.filename) else None)
+            for file, fruit in zip(files, fruits)
+        ]
+        
+        def items():
+            return iter(uploads)
+    
+    def generate():
+        count = 0
+        # One input buffer per request, refilled for every chunk
+        batch = np.empty((PREDICT_BATCH_SIZE, IMG_SIZE, IMG_SIZE, 3), dtype=np.float32)
+        for chunk in chunked(items(), PREDICT_BATCH_SIZE):
+            exceeded = count + len(chunk) > BATCH_MAX_IMAGES
+            chunk = chunk[:BATCH_MAX_IMAGES - count]
+            count += len(chunk)
             
-            # Prepare response
-            response = {
-                "success": True,
-                "fruit": fruit.capitalize(),
-                "initial_freshness": initial_freshness,
-                "decay": decay_data,
-                "status": status,
-                "status_color": status_color,
-                "shelf_life": {
-                    "ideal": IDEAL_SHELF[fruit],
-                    "room": ROOM_SHELF[fruit],
-                    "humid": HIGH_HUMIDITY_SHELF[fruit]
-                },
-                "chart_data": {
-                    "labels": ["Ideal Storage", "Room Temp", "High Humidity"],
-                    "freshness": [
-                        decay_data['ideal_final'],
-                        decay_data['room_final'],
-                        decay_data['humid_final']
-                    ],
-                    "days_left": [
-                        decay_data['ideal_days_left'],
-                        decay_data['room_days_left'],
-                        decay_data['humid_days_left']
-                    ]
-                }
-            }
+            lines = score_items(chunk, batch)
             
-            return jsonify(response)
+            yield "".join(json.dumps(line) + "\n" for line in lines)
             
-        finally:
-            # Clean up uploaded file
-            if os.path.exists(filepath):
-                os.remove(filepath)
-                
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+            if exceeded:
+                yield json.dumps({"error": f"Batch limit of {BATCH_MAX_IMAGES} images exceeded"}) + "\n"
+                return
+        
+        for message in read_errors:
+            yield json.dumps({"error": message}) + "\n"
+    
+    return Response(generate(), mimetype='application/x-ndjson')
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """
+    Queue images for background scoring and return a job id right away.
+    
+    Takes the same fields as /api/predict/batch (`images` + `fruits` or
+    `fruit`, or an `archive`), or a single `image` + `fruit`. Poll
+    /api/jobs/<id> for progress and read /api/jobs/<id>/results (NDJSON).
+    """
+    files, form = request.files, request.form
+    archive = files.get('archive')
+    uploads = files.getlist('images') or files.getlist('image')
+    items, error = job_items(
+        (archive.filename, archive.read()) if archive is not None else None,
+        [(file.filename, file.read()) for file in uploads],
+        [f.lower() for f in form.getlist('fruits')],
+        form.get('fruit', '').lower()
+    )
+    if error is not None:
+        return jsonify({"error": error}), 400
+    
+    job_id = job_store.create(items)
+    job_runner.notify()
+    response = jsonify({"job_id": job_id, "state": "queued", "total": len(items), **job_urls(job_id)})
+    response.status_code = 202
+    response.headers['Location'] = f"/api/jobs/{job_id}"
+    return response
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """
+    Job state and progress. `wait=<seconds>` long-polls until the job has
+    finished, or with `since=<done>` until more images than that are done.
+    Waits are capped at JOB_WAIT_MAX_SECONDS (5 s by default); clients
+    re-poll for longer.
+    """
+    wait = max(0.0, min(request.args.get('wait', 0, type=float), JOB_WAIT_MAX_SECONDS))
+    status = job_runner.wait(job_id, wait, since=request.args.get('since', type=int))
+    if status is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify({**status, **job_urls(job_id)})
+
+@app.route('/api/jobs/<job_id>/results', methods=['GET'])
+def job_results(job_id):
+    """Result lines scored so far, in upload order (X-Job-State tells whether more will follow)."""
+    status = job_store.get(job_id)
+    if status is None:
+        return jsonify({"error": "Unknown job"}), 404
+    lines = (line + "\n" for line in job_store.results(job_id))
+    return Response(lines, mimetype='application/x-ndjson', headers={'X-Job-State': status['state']})
+
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    return jsonify(prediction_cache.stats())
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    record_model_status(model_loader.status())
+    body, content_type = render_metrics()
+    return Response(body, content_type=content_type)
 
 @app.route('/api/shelf-life/<fruit>', methods=['GET'])
 def get_shelf_life(fruit):
@@ -152,5 +584,25 @@ def get_shelf_life(fruit):
         "humid": HIGH_HUMIDITY_SHELF[fruit]
     })
 
+@app.route('/api/trajectory/<fruit>', methods=['GET'])
+def get_trajectory(fruit):
+    fruit = fruit.lower()
+    if fruit not in IDEAL_SHELF:
+        return jsonify({"error": "Unsupported item"}), 400
+    
+    resolution = request.args.get('resolution', 'day')
+    if resolution not in TRAJECTORY_RESOLUTIONS:
+        return jsonify({"error": "resolution must be 'day' or 'hour'"}), 400
+    
+    try:
+        initial = max(0, min(float(request.args.get('initial', 100)), 100))
+    except ValueError:
+        return jsonify({"error": "initial must be a number"}), 400
+    return jsonify({
+        "fruit": fruit,
+        "initial_freshness": initial,
+        **freshness_trajectory(initial, fruit, resolution)
+    })
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
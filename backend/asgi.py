@@ -0,0 +1,339 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from app import (
+    app as flask_app, CORS_ORIGINS, SUPPORTED_ITEMS, MODEL_WAIT_SECONDS, JOB_MAX_IMAGES,
+    allowed_file, build_result, model_loader, predict_upload, prediction_cache,
+    job_items, job_store, job_runner, job_urls
+)
+from jobs import settled
+from decay import IDEAL_SHELF, ROOM_SHELF, HIGH_HUMIDITY_SHELF
+from vector_decay import TRAJECTORY_RESOLUTIONS, freshness_trajectory
+from metrics import stage, record_model_status, render as render_metrics, IN_FLIGHT, REQUEST_SECONDS
+
+# ASGI serving mode: same API as app.py, but uploads are received on the
+# event loop, so slow clients hold a connection instead of a worker thread.
+# Decoding and inference run on a bounded thread pool; once it is full,
+# requests get 503 + Retry-After instead of queueing without limit.
+#
+#   uvicorn asgi:app --port 10000
+#   SERVER_MODE=asgi gunicorn -c gunicorn.conf.py
+
+MAX_CONTENT_LENGTH = flask_app.config['MAX_CONTENT_LENGTH']
+
+# Threads running decode + inference; more than BATCH_MAX_SIZE so the
+# micro-batcher still gets full batches
+INFERENCE_THREADS = int(os.environ.get('INFERENCE_THREADS', 16))
+# Requests allowed to wait for a free inference thread before shedding load
+INFERENCE_QUEUE_MAX = int(os.environ.get('INFERENCE_QUEUE_MAX', 64))
+RETRY_AFTER_SECONDS = os.environ.get('RETRY_AFTER_SECONDS', '1')
+# Longest long-poll on /api/jobs/<id>?wait= (waiting holds no thread here)
+ASGI_JOB_WAIT_MAX_SECONDS = float(os.environ.get('ASGI_JOB_WAIT_MAX_SECONDS', 60))
+
+class ExecutorFull(RuntimeError):
+    pass
+
+class BoundedExecutor:
+    """Thread pool that rejects work instead of queueing past a fixed limit."""
+
+    def __init__(self, max_workers, max_queued):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='inference')
+        self._slots = threading.BoundedSemaphore(max_workers + max_queued)
+
+    async def run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise ExecutorFull()
+        try:
+            future = self._pool.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # Free the slot when the work finishes, even if the client went away
+        future.add_done_callback(lambda _: self._slots.release())
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+executor = BoundedExecutor(INFERENCE_THREADS, INFERENCE_QUEUE_MAX)
+
+class MetricsMiddleware:
+    """In-flight gauge and per-endpoint latency for /api/ requests."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not scope['path'].startswith('/api/'):
+            return await self.app(scope, receive, send)
+        IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            IN_FLIGHT.dec()
+            # The router records the matched endpoint in the shared scope
+            endpoint = getattr(scope.get('endpoint'), '__name__', 'unknown')
+            REQUEST_SECONDS.labels(endpoint).observe(time.perf_counter() - start)
+
+def error(message, status_code, **extra):
+    return JSONResponse({"error": message, **extra}, status_code=status_code)
+
+class UploadTooLarge(Exception):
+    pass
+
+class BodyLimitMiddleware:
+    """413 once a request body passes MAX_CONTENT_LENGTH, counted as it arrives."""
+
+    def __init__(self, app, max_bytes):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        # Content-Length is only a hint: chunked uploads don't send one
+        headers = dict(scope['headers'])
+        if int(headers.get(b'content-length') or 0) > self.max_bytes:
+            return await error("Upload too large", 413)(scope, receive, send)
+
+        received = 0
+        started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message['type'] == 'http.request':
+                received += len(message.get('body', b''))
+                if received > self.max_bytes:
+                    raise UploadTooLarge()
+            return message
+
+        async def tracked_send(message):
+            nonlocal started
+            if message['type'] == 'http.response.start':
+                started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracked_send)
+        except UploadTooLarge:
+            if started:
+                raise
+            await error("Upload too large", 413)(scope, receive, send)
+
+async def model_unavailable():
+    """503 response while the model is loading (or failed to load), otherwise None."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + MODEL_WAIT_SECONDS
+    while not model_loader.ready and model_loader.state != 'failed' and loop.time() < deadline:
+        await asyncio.sleep(0.1)
+    if model_loader.ready:
+        return None
+    response = error("Model is not ready", 503, **model_loader.status())
+    response.headers['Retry-After'] = '5'
+    return response
+
+async def health_check(request):
+    return JSONResponse({"status": "healthy", "message": "Freshness API is running"})
+
+async def readiness_check(request):
+    status = model_loader.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+async def get_items(request):
+    return JSONResponse({"items": SUPPORTED_ITEMS})
+
+async def predict(request):
+    try:
+        # Body is received without blocking a thread (BodyLimitMiddleware
+        # caps its size)
+        with stage('receive'):
+            async with request.form(max_files=1) as form:
+                file = form.get('image')
+                fruit = str(form.get('fruit', '')).lower()
+                # Optional day-by-day or hourly curve until spoilage
+                trajectory = request.query_params.get('trajectory') or form.get('trajectory')
+
+                # Check if image file is present
+                if file is None or isinstance(file, str):
+                    return error("No image file provided", 400)
+
+                # Validate file
+                if not file.filename:
+                    return error("No file selected", 400)
+
+                if not allowed_file(file.filename):
+                    return error("Invalid file type. Allowed: png, jpg, jpeg, webp", 400)
+
+                # Validate fruit
+                if fruit not in IDEAL_SHELF:
+                    return error(f"Unsupported item: {fruit}", 400)
+
+                if trajectory and trajectory not in TRAJECTORY_RESOLUTIONS:
+                    return error("trajectory must be 'day' or 'hour'", 400)
+
+                data = await file.read()
+
+        # Model may still be loading in background mode
+        unavailable = await model_unavailable()
+        if unavailable is not None:
+            return unavailable
+
+        # Decode + inference off the event loop, bounded
+        try:
+            raw_output = await executor.run(predict_upload, data)
+        except ExecutorFull:
+            response = error("Server busy, retry shortly", 503)
+            response.headers['Retry-After'] = RETRY_AFTER_SECONDS
+            return response
+
+        response = build_result(raw_output, fruit, trajectory)
+        with stage('serialize'):
+            return JSONResponse(response)
+
+    except UploadTooLarge:
+        raise
+    except Exception as e:
+        return error(str(e), 500)
+
+async def submit_job(request):
+    # Same fields as the Flask /api/jobs
+    async with request.form(max_files=JOB_MAX_IMAGES + 1) as form:
+        archive = form.get('archive')
+        if archive is None or isinstance(archive, str):
+            archive = None
+        else:
+            archive = (archive.filename or '', await archive.read())
+        uploads = [
+            (file.filename or '', await file.read())
+            for file in form.getlist('images') or form.getlist('image')
+            if not isinstance(file, str)
+        ]
+        fruits = [str(f).lower() for f in form.getlist('fruits')]
+        default_fruit = str(form.get('fruit', '')).lower()
+
+    items, message = await run_in_threadpool(job_items, archive, uploads, fruits, default_fruit)
+    if message is not None:
+        return error(message, 400)
+
+    job_id = await run_in_threadpool(job_store.create, items)
+    job_runner.notify()
+    return JSONResponse(
+        {"job_id": job_id, "state": "queued", "total": len(items), **job_urls(job_id)},
+        status_code=202,
+        headers={'Location': f"/api/jobs/{job_id}"}
+    )
+
+async def job_status(request):
+    job_id = request.path_params['job_id']
+    try:
+        wait = max(0.0, min(float(request.query_params.get('wait', 0)), ASGI_JOB_WAIT_MAX_SECONDS))
+        since = request.query_params.get('since')
+        since = int(since) if since is not None else None
+    except ValueError:
+        return error("Invalid wait or since", 400)
+
+    # Long-poll without holding a thread
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + wait
+    while True:
+        status = await run_in_threadpool(job_store.get, job_id)
+        if settled(status, since) or loop.time() >= deadline:
+            break
+        await asyncio.sleep(0.25)
+
+    if status is None:
+        return error("Unknown job", 404)
+    return JSONResponse({**status, **job_urls(job_id)})
+
+async def job_results(request):
+    job_id = request.path_params['job_id']
+    status = await run_in_threadpool(job_store.get, job_id)
+    if status is None:
+        return error("Unknown job", 404)
+    lines = (line + "\n" for line in job_store.results(job_id))
+    return StreamingResponse(lines, media_type='application/x-ndjson', headers={'X-Job-State': status['state']})
+
+async def cache_stats(request):
+    return JSONResponse(prediction_cache.stats())
+
+async def metrics(request):
+    record_model_status(model_loader.status())
+    body, content_type = render_metrics()
+    return Response(body, headers={'Content-Type': content_type})
+
+async def get_shelf_life(request):
+    fruit = request.path_params['fruit'].lower()
+    if fruit not in IDEAL_SHELF:
+        return error("Unsupported item", 400)
+
+    return JSONResponse({
+        "fruit": fruit,
+        "ideal": IDEAL_SHELF[fruit],
+        "room": ROOM_SHELF[fruit],
+        "humid": HIGH_HUMIDITY_SHELF[fruit]
+    })
+
+async def get_trajectory(request):
+    fruit = request.path_params['fruit'].lower()
+    if fruit not in IDEAL_SHELF:
+        return error("Unsupported item", 400)
+
+    resolution = request.query_params.get('resolution', 'day')
+    if resolution not in TRAJECTORY_RESOLUTIONS:
+        return error("resolution must be 'day' or 'hour'", 400)
+
+    try:
+        initial = max(0, min(float(request.query_params.get('initial', 100)), 100))
+    except ValueError:
+        return error("initial must be a number", 400)
+    return JSONResponse({
+        "fruit": fruit,
+        "initial_freshness": initial,
+        **freshness_trajectory(initial, fruit, resolution)
+    })
+
+@asynccontextmanager
+async def lifespan(app):
+    job_runner.start()
+    yield
+    executor.shutdown()
+
+app = Starlette(
+    routes=[
+        Route('/api/health', health_check, methods=['GET']),
+        Route('/api/ready', readiness_check, methods=['GET']),
+        Route('/api/items', get_items, methods=['GET']),
+        Route('/api/predict', predict, methods=['POST']),
+        Route('/api/jobs', submit_job, methods=['POST']),
+        Route('/api/jobs/{job_id}', job_status, methods=['GET']),
+        Route('/api/jobs/{job_id}/results', job_results, methods=['GET']),
+        Route('/api/cache/stats', cache_stats, methods=['GET']),
+        Route('/api/shelf-life/{fruit}', get_shelf_life, methods=['GET']),
+        Route('/api/trajectory/{fruit}', get_trajectory, methods=['GET']),
+        Route('/metrics', metrics, methods=['GET'])
+    ],
+    middleware=[
+        Middleware(MetricsMiddleware),
+        Middleware(BodyLimitMiddleware, max_bytes=MAX_CONTENT_LENGTH),
+        Middleware(CORSMiddleware, allow_origins=CORS_ORIGINS, allow_credentials=True,
+                   allow_methods=['*'], allow_headers=['*'])
+    ],
+    lifespan=lifespan
+)
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(app, host='0.0.0.0', port=int(os.environ.get('PORT', 10000)))
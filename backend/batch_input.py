@@ -0,0 +1,90 @@
+import io
+import os
+import tarfile
+import zipfile
+import zlib
+
+# Raised by zipfile / tarfile and the decompressors under them for corrupt
+# or truncated archives
+ARCHIVE_ERRORS = (zipfile.BadZipFile, tarfile.TarError, zlib.error, EOFError)
+
+
+class ArchiveTooLarge(ValueError):
+    """The members read from an archive add up to more than its size limit."""
+
+
+def is_archive(filename):
+    name = filename.lower()
+    return name.endswith('.zip') or name.endswith(('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tar.xz'))
+
+
+def iter_archive(fileobj, filename, max_member_size, max_total_size=None):
+    """
+    Open a zip or tar archive and return an iterator of (member_name, data)
+    for every regular file in it. Members larger than `max_member_size` are
+    yielded with data=None so the caller can report them instead of
+    reading them. Once the members read add up to more than
+    `max_total_size` bytes, iterating raises ArchiveTooLarge, so a small
+    archive of many large members can't be expanded without bound.
+
+    The archive is opened before this returns, so a file that is not a
+    readable archive raises one of ARCHIVE_ERRORS here; damaged members
+    can still raise them while iterating.
+    """
+    if filename.lower().endswith('.zip'):
+        # zipfile needs a seekable stream
+        if not getattr(fileobj, 'seekable', lambda: False)():
+            fileobj = io.BytesIO(fileobj.read())
+        members = _zip_members(zipfile.ZipFile(fileobj), max_member_size)
+    else:
+        members = _tar_members(tarfile.open(fileobj=fileobj, mode='r|*'), max_member_size)
+    return members if max_total_size is None else _capped(members, max_total_size)
+
+
+def _capped(members, max_total_size):
+    total = 0
+    for name, data in members:
+        total += len(data) if data is not None else 0
+        if total > max_total_size:
+            members.close()
+            raise ArchiveTooLarge(f"Archive expands to more than {max_total_size / (1024 * 1024):g} MB")
+        yield name, data
+
+
+def _zip_members(zf, max_member_size):
+    with zf:
+        for info in zf.infolist():
+            if info.is_dir():
+                continue
+            if info.file_size > max_member_size:
+                yield info.filename, None
+            else:
+                yield info.filename, zf.read(info)
+
+
+def _tar_members(tf, max_member_size):
+    with tf:
+        for member in tf:
+            if not member.isfile():
+                continue
+            if member.size > max_member_size:
+                yield member.name, None
+            else:
+                yield member.name, tf.extractfile(member).read()
+
+
+def fruit_from_path(name, supported, default):
+    """Use the member's parent folder (e.g. ``apple/img1.jpg``) as its fruit when it is a supported item."""
+    parent = os.path.basename(os.path.dirname(name.replace('\\', '/'))).lower()
+    return parent if parent in supported else default
+
+
+def chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
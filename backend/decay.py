@@ -1,5 +1,6 @@
 from datetime import date
 import math
+import numpy as np
 
 # Ideal storage-based shelf-life (days)
 IDEAL_SHELF = {
@@ -37,6 +38,66 @@ HIGH_HUMIDITY_SHELF = {
     "okra": 0.5
 }
 
+# Precomputed decay tables
+#
+# The shelf lives above are fixed, so the quadratic curve can be tabulated
+# once for every fruit, storage condition and whole day:
+#   DECAY_TABLE[f, c, d] -> multiplier 1 - (d / shelf)^2 (0 once spoiled)
+# It is kept in float64 so that initial * DECAY_TABLE[f, c, d] is exactly
+# the value nonlinear_decay rounds.
+TABLE_FRUITS = tuple(IDEAL_SHELF)
+TABLE_CONDITIONS = ("ideal", "room", "humid")
+TABLE_DAYS = int(math.ceil(max(
+    max(shelf.values()) for shelf in (IDEAL_SHELF, ROOM_SHELF, HIGH_HUMIDITY_SHELF)
+))) + 1
+
+_FRUIT_INDEX = {fruit: i for i, fruit in enumerate(TABLE_FRUITS)}
+_CONDITION_INDEX = {condition: i for i, condition in enumerate(TABLE_CONDITIONS)}
+
+def _build_table():
+    shelf = np.array(
+        [[IDEAL_SHELF[f], ROOM_SHELF[f], HIGH_HUMIDITY_SHELF[f]] for f in TABLE_FRUITS],
+        dtype=np.float64
+    )
+    fraction = np.arange(TABLE_DAYS) / shelf[..., None]
+    table = np.where(fraction >= 1, 0.0, 1 - fraction**2)
+    table.setflags(write=False)
+    return table
+
+DECAY_TABLE = _build_table()
+
+def freshness_multiplier(fruit, condition, day):
+    """
+    Fraction of the initial freshness left after `day` whole days (an int
+    or an array of them). Fractional days raise ValueError; use
+    nonlinear_decay for those.
+    """
+    day = np.asarray(day)
+    if day.dtype.kind not in "iu":
+        if not np.all(day == np.floor(day)):
+            raise ValueError("freshness_multiplier takes whole days")
+        day = day.astype(np.int64)
+    day = np.clip(day, 0, TABLE_DAYS - 1)
+    return DECAY_TABLE[_FRUIT_INDEX[fruit], _CONDITION_INDEX[condition], day]
+
+def threshold_day(fruit, condition, threshold, initial=100):
+    """
+    First whole day on which freshness starting at `initial`, as
+    nonlinear_decay reports it, is at or below `threshold`. Thresholds
+    below 0 count as 0, i.e. the day the item spoils.
+    """
+    if initial <= 0:
+        return 0
+    threshold = max(threshold, 0)
+    row = DECAY_TABLE[_FRUIT_INDEX[fruit], _CONDITION_INDEX[condition]]
+    # The row never increases (and ends at 0), so binary-search its negation
+    day = int(np.searchsorted(-initial * row, -threshold, side="left"))
+    # nonlinear_decay rounds to 2 decimals, which can reach the threshold
+    # a day earlier than the exact curve
+    while day > 0 and round(float(initial * row[day - 1]), 2) <= threshold:
+        day -= 1
+    return day
+
 def nonlinear_decay(initial, days, shelf):
     fraction = days / shelf
     if fraction >= 1:
@@ -0,0 +1,112 @@
+import os
+
+from runtime_config import available_cpus
+
+# Gunicorn settings for the Flask backend:
+#   gunicorn -c gunicorn.conf.py
+#
+# SERVER_MODE=asgi serves asgi.py (Starlette) on uvicorn workers instead of
+# the Flask app: uploads are received asynchronously and inference runs on
+# a bounded thread pool (INFERENCE_THREADS / INFERENCE_QUEUE_MAX), so
+# `threads` does not apply.
+#
+# Workers
+# Every Keras / SavedModel worker holds its own TensorFlow runtime and copy
+# of the model, so those backends default to a single worker. TFLite
+# workers are small enough to run one per core of the CPU budget, as are
+# the web-only workers of INFERENCE_SERVER mode. WEB_CONCURRENCY overrides.
+#
+# TFLite model sharing (MODEL_BACKEND=tflite)
+# The interpreter memory-maps the model file read-only, so the weights sit
+# in the page cache once and every worker reads the same pages, whether or
+# not the app is preloaded; each worker builds its own small interpreter on
+# first use. Set TFLITE_XNNPACK=0 to keep the weights fully shared (XNNPACK
+# repacks them into per-process memory). Preloading (the default for
+# tflite) additionally shares the imported app's Python heap
+# copy-on-write, about 20 MB per worker.
+#
+# The Keras and SavedModel backends are not fork-safe (TensorFlow's thread
+# pools do not survive fork), so with MODEL_BACKEND=keras or savedmodel
+# each worker loads its own model after forking.
+#
+# Dedicated inference processes (INFERENCE_SERVER=1)
+# The master starts INFERENCE_PROCESSES model processes, pinned to
+# INFERENCE_CPUS, before forking the workers; the workers only receive and
+# decode uploads and hand tensors over through shared memory (see
+# inference_server.py). Web and inference capacity then scale separately:
+# WEB_CONCURRENCY / GUNICORN_THREADS vs. INFERENCE_PROCESSES. The app is
+# not preloaded in this mode.
+
+MODEL_BACKEND = os.environ.get("MODEL_BACKEND", "keras")
+SERVER_MODE = os.environ.get("SERVER_MODE", "wsgi")
+INFERENCE_SERVER = os.environ.get("INFERENCE_SERVER", "0") == "1"
+
+if SERVER_MODE == "asgi":
+    wsgi_app = "asgi:app"
+    worker_class = "uvicorn.workers.UvicornWorker"
+else:
+    wsgi_app = "app:app"
+
+bind = "0.0.0.0:" + os.environ.get("PORT", "10000")
+# Default: one worker per core of the CPU budget (cgroup quota aware) for
+# TFLite and INFERENCE_SERVER mode, one otherwise (see above)
+default_workers = available_cpus() if MODEL_BACKEND == "tflite" or INFERENCE_SERVER else 1
+if INFERENCE_SERVER:
+    import inference_server
+    # Only the cores INFERENCE_CPUS leaves to the web workers
+    web_cpus = inference_server.worker_cpus()
+    if web_cpus:
+        default_workers = min(default_workers, len(web_cpus))
+workers = int(os.environ.get("WEB_CONCURRENCY", default_workers))
+# Lets each worker size its TensorFlow / OpenCV thread pools to its share
+# of the cores (runtime_config.py)
+os.environ["GUNICORN_WORKERS"] = str(workers)
+# Threads let concurrent requests inside a worker share micro-batches
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
+
+preload_app = os.environ.get(
+    "PRELOAD_APP", "1" if MODEL_BACKEND == "tflite" and not INFERENCE_SERVER else "0"
+) == "1"
+
+if preload_app:
+    # A background loader thread would not survive the fork; load inline
+    # in the master so every worker starts with the model ready
+    os.environ["MODEL_LOAD_MODE"] = "eager"
+
+
+def on_starting(server):
+    if INFERENCE_SERVER:
+        import inference_server
+        inference_server.start()
+
+
+def post_fork(server, worker):
+    if INFERENCE_SERVER:
+        # Keep the workers off the cores reserved for inference
+        import inference_server
+        inference_server.pin_to(inference_server.worker_cpus())
+    if preload_app:
+        # Job worker threads belong in each worker, not the preloading
+        # master; start them now instead of waiting for a first request
+        import app
+        app.job_runner.start()
+
+
+def on_exit(server):
+    if INFERENCE_SERVER:
+        import inference_server
+        inference_server.stop()
+
+
+def child_exit(server, worker):
+    if INFERENCE_SERVER:
+        # Hand back the slots of a worker killed mid-request (e.g. by the
+        # timeout), which it can no longer release itself
+        import inference_server
+        inference_server.reclaim(worker.pid)
+    # Drop the live gauges of exited workers from the shared metrics
+    # directory (PROMETHEUS_MULTIPROC_DIR, see metrics.py)
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
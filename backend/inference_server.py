@@ -0,0 +1,619 @@
+import fcntl
+import json
+import logging
+import mmap
+import os
+import select
+import signal
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+# Dedicated inference processes (INFERENCE_SERVER=1, see gunicorn.conf.py)
+#
+# The gunicorn master starts a pool of inference processes before forking
+# the web workers. Workers (Flask or ASGI) only receive, decode and
+# preprocess uploads; the model lives in the inference processes, each
+# pinned to its own set of cores.
+#
+# Tensors are handed over through a ring of slots in one shared file
+# mapping. A worker claims a free slot, writes the (224, 224, 3) float32
+# input into it and writes the slot number to a pipe; an inference process
+# batches the queued slots, writes one float per slot back into the
+# mapping and signals the slot's eventfd. Only slot numbers go through the
+# pipe, so no image data is pickled.
+#
+# Web workers can be killed at any point (gunicorn's timeout sends
+# SIGKILL / SIGABRT), so nothing here depends on a worker releasing what it
+# holds. Slot state lives in the mapping and changes under flock, which
+# the kernel drops with its holder, and each slot records the pid of the
+# worker using it; the master hands slots of dead workers back (reclaim(),
+# called from gunicorn's child_exit hook and by the supervisor). The pipe
+# and eventfds need no locks. Linux only (eventfd, pidfd).
+
+logger = logging.getLogger(__name__)
+
+IMG_SHAPE = (224, 224, 3)
+
+# Number of inference processes
+INFERENCE_PROCESSES = int(os.environ.get("INFERENCE_PROCESSES", 2))
+# Cores shared out between the inference processes, e.g. "8-15" or
+# "0,2,4,6" (default: every core this process may run on). When set, web
+# workers are pinned to the remaining cores.
+INFERENCE_CPUS = os.environ.get("INFERENCE_CPUS", "")
+# Tensors in flight across all web workers
+INFERENCE_SLOTS = int(os.environ.get("INFERENCE_SLOTS", 64))
+# Slots per forward pass and how long to wait for a batch to fill
+INFERENCE_BATCH_SIZE = int(os.environ.get("INFERENCE_BATCH_SIZE", 16))
+INFERENCE_BATCH_WAIT_MS = float(os.environ.get("INFERENCE_BATCH_WAIT_MS", 2))
+# Seconds a worker waits for a slot or a result
+INFERENCE_TIMEOUT = float(os.environ.get("INFERENCE_TIMEOUT", 30))
+
+_OK, _FAILED = 0, 1
+# Slot life cycle (TensorRing.state)
+_FREE, _CLAIMED, _QUEUED, _RUNNING, _DONE = 0, 1, 2, 3, 4
+# TensorRing.client of a slot whose worker gave up on it or died while it
+# was queued; the inference process frees it once done
+_ORPHAN = -1
+# Per-process state in TensorRing.ready
+_LOADING, _READY, _LOAD_FAILED = 0, 1, -1
+# Pipe records: one slot number each (writes this small are atomic)
+_RECORD = struct.Struct("i")
+_STOP = -1
+
+_SHM_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+
+def parse_cpus(spec):
+    """"0-3,8,10-11" -> [0, 1, 2, 3, 8, 10, 11]"""
+    cpus = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        cpus.update(range(int(first), int(last or first) + 1))
+    return sorted(cpus)
+
+
+def affinity_cpus():
+    """Ids of the cores this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def split_cpus(cpus, n):
+    """Split cpus into n contiguous, near-equal groups (shared if there are fewer cpus than groups)."""
+    if len(cpus) < n:
+        return [cpus[i % len(cpus):i % len(cpus) + 1] for i in range(n)]
+    size, extra = divmod(len(cpus), n)
+    groups, start = [], 0
+    for i in range(n):
+        end = start + size + (i < extra)
+        groups.append(cpus[start:end])
+        start = end
+    return groups
+
+
+def pin_to(cpus):
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class _RingLock:
+    """
+    flock on the ring file, plus a thread lock since flock does not exclude
+    threads of the same process. Each process opens its own descriptor:
+    an inherited one would share the parent's lock.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        # Also runs in a forked child, where the parent may have held either
+        # lock at the time of the fork
+        if getattr(self, "_fd", None) is not None:
+            os.close(self._fd)
+        self._thread_lock = threading.Lock()
+        self._fd = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        try:
+            if self._fd is None:
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CLOEXEC)
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        except BaseException:
+            self._thread_lock.release()
+            raise
+
+    def __exit__(self, exc_type, exc, tb):
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._thread_lock.release()
+
+
+class TensorRing:
+    """
+    Fixed-size slots in one shared file mapping (in /dev/shm when present):
+    - inputs:  (slots, 224, 224, 3) float32
+    - outputs: (slots,) float32, raw model output per slot
+    - status:  (slots,) int32, _OK or _FAILED
+    - state:   (slots,) int32, _FREE -> _CLAIMED -> _QUEUED -> _RUNNING -> _DONE
+    - client:  (slots,) int32, pid of the web worker using the slot, or _ORPHAN
+    - owner:   (slots,) int32, inference process working on the slot, or -1
+    - ready:   (processes,) int32, _LOADING / _READY / _LOAD_FAILED
+
+    State changes that more than one process may make at once (claiming,
+    completing, abandoning, reclaiming) happen under `lock`.
+    """
+
+    def __init__(self, slots, processes, path=None):
+        self.slots = slots
+        sizes = (
+            slots * int(np.prod(IMG_SHAPE)) * 4,
+            slots * 4,
+            slots * 4,
+            slots * 4,
+            slots * 4,
+            slots * 4,
+            processes * 4
+        )
+        create = path is None
+        if create:
+            fd, path = tempfile.mkstemp(prefix="inference-ring-", dir=_SHM_DIR)
+            os.ftruncate(fd, sum(sizes))
+        else:
+            fd = os.open(path, os.O_RDWR)
+        try:
+            self._map = mmap.mmap(fd, sum(sizes))
+        finally:
+            os.close(fd)
+        self.path = path
+        self.lock = _RingLock(path)
+
+        offsets = np.cumsum((0,) + sizes)
+        fields = [
+            ("inputs", (slots,) + IMG_SHAPE, np.float32),
+            ("outputs", (slots,), np.float32),
+            ("status", (slots,), np.int32),
+            ("state", (slots,), np.int32),
+            ("client", (slots,), np.int32),
+            ("owner", (slots,), np.int32),
+            ("ready", (processes,), np.int32)
+        ]
+        for (field, shape, dtype), offset in zip(fields, offsets):
+            setattr(self, field, np.ndarray(shape, dtype=dtype, buffer=self._map, offset=offset))
+        if create:
+            self.owner[:] = -1
+
+    def claim(self, pid):
+        """Take a free slot for worker `pid`; returns its number or None."""
+        with self.lock:
+            free = np.flatnonzero(self.state == _FREE)
+            if not len(free):
+                return None
+            slot = int(free[0])
+            self.client[slot] = pid
+            self.state[slot] = _CLAIMED
+        return slot
+
+    def _free(self, slot):
+        self.client[slot] = 0
+        self.state[slot] = _FREE
+
+    def release(self, slot):
+        """Hand back a slot whose result has been read."""
+        with self.lock:
+            self._free(slot)
+
+    def _abandon(self, slot):
+        if self.state[slot] in (_QUEUED, _RUNNING):
+            self.client[slot] = _ORPHAN
+        else:
+            self._free(slot)
+
+    def abandon(self, slot):
+        """Give up on a slot: freed now if done, else by its inference process once it is."""
+        with self.lock:
+            self._abandon(slot)
+
+    def complete(self, slots, events):
+        """Mark slots done and wake their workers; orphaned slots are freed instead."""
+        wake = []
+        with self.lock:
+            for slot in slots:
+                self.owner[slot] = -1
+                if self.client[slot] == _ORPHAN:
+                    self._free(slot)
+                else:
+                    self.state[slot] = _DONE
+                    wake.append(slot)
+        for slot in wake:
+            os.eventfd_write(events[slot], 1)
+
+    def reclaim(self, pid):
+        """Free the slots of a worker that died; returns how many it held."""
+        with self.lock:
+            held = np.flatnonzero((self.client == pid) & (self.state != _FREE))
+            for slot in held:
+                self._abandon(slot)
+        return len(held)
+
+    def close(self):
+        for field in ("inputs", "outputs", "status", "state", "client", "owner", "ready"):
+            setattr(self, field, None)
+        self._map.close()
+
+
+def _load_model(num_threads):
+    """Load the serving model with the same configuration as app.py."""
+    from model_backend import load_model_backend
+    from runtime_config import configure_tensorflow
+
+    root = os.path.join(os.path.dirname(__file__), "..")
+    backend = os.environ.get("MODEL_BACKEND", "keras")
+    if backend in ("keras", "savedmodel"):
+        configure_tensorflow({"intra_op": num_threads, "inter_op": 1})
+
+    return load_model_backend(
+        backend,
+        os.environ.get("MODEL_PATH", os.path.join(root, "model.h5")),
+        os.environ.get("TFLITE_MODEL_PATH", os.path.join(root, "model.tflite")),
+        os.environ.get("SAVEDMODEL_PATH", os.path.join(root, "model_savedmodel")),
+        num_threads=num_threads,
+        xnnpack=os.environ.get("TFLITE_XNNPACK", "1") == "1"
+    )
+
+
+def _next_batch(fd, batch_size, batch_wait):
+    """
+    Up to `batch_size` queued slots: blocks for the first one, then waits
+    `batch_wait` seconds for more. Returns (slots, stop); stop is set by
+    _STOP and once every writer has closed the pipe.
+    """
+    batch, deadline = [], None
+    while len(batch) < batch_size:
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        if not select.select([fd], [], [], timeout)[0]:
+            break
+        try:
+            data = os.read(fd, _RECORD.size)
+        except BlockingIOError:
+            # Another inference process took it
+            continue
+        if not data:
+            return batch, True
+        slot, = _RECORD.unpack(data)
+        if slot == _STOP:
+            return batch, True
+        batch.append(slot)
+        if deadline is None:
+            deadline = time.monotonic() + batch_wait
+    return batch, False
+
+
+def _serve(index, cpus, ring_path, slots, processes, pending_fd, events, batch_size, batch_wait):
+    """Inference process main loop: batch queued slots, run the model, signal the slots."""
+    # The master stops us through the pipe
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    pin_to(cpus)
+    ring = TensorRing(slots, processes, path=ring_path)
+    try:
+        model = _load_model(num_threads=len(cpus))
+        model.predict(np.zeros((1,) + IMG_SHAPE, dtype=np.float32), verbose=0)
+    except Exception:
+        logger.exception("Inference process %d failed to load the model", index)
+        ring.ready[index] = _LOAD_FAILED
+        ring.close()
+        return
+    ring.ready[index] = _READY
+
+    x = np.empty((batch_size,) + IMG_SHAPE, dtype=np.float32)
+    stop = False
+    while not stop:
+        batch, stop = _next_batch(pending_fd, batch_size, batch_wait)
+        if not batch:
+            continue
+        ring.owner[batch] = index
+        ring.state[batch] = _RUNNING
+
+        n = len(batch)
+        try:
+            np.take(ring.inputs, batch, axis=0, out=x[:n])
+            preds = model.predict(x[:n], verbose=0)
+            ring.outputs[batch] = np.asarray(preds, dtype=np.float32)[:, 0]
+            ring.status[batch] = _OK
+        except Exception:
+            logger.exception("Inference failed for %d slot(s)", n)
+            ring.status[batch] = _FAILED
+        ring.complete(batch, events)
+
+    ring.close()
+
+
+class InferenceServer:
+    """
+    Owns the shared ring, the slot pipe, the per-slot eventfds and the
+    inference processes. Created and started in the gunicorn master;
+    forked workers inherit it and talk to it through InferenceClient.
+    """
+
+    def __init__(self, processes=INFERENCE_PROCESSES, cpus=None, slots=INFERENCE_SLOTS,
+                 batch_size=INFERENCE_BATCH_SIZE, batch_wait_ms=INFERENCE_BATCH_WAIT_MS):
+        self.processes = max(1, processes)
+        self.cpu_groups = split_cpus(cpus or affinity_cpus(), self.processes)
+        self.slots = slots
+        self.batch_size = max(1, batch_size)
+        self.batch_wait = max(0.0, batch_wait_ms) / 1000.0
+
+        self.ring = TensorRing(slots, self.processes)
+        self.pending_r, self.pending_w = os.pipe()
+        os.set_blocking(self.pending_r, False)
+        self.events = [
+            os.eventfd(0, os.EFD_SEMAPHORE | os.EFD_NONBLOCK | os.EFD_CLOEXEC) for _ in range(slots)
+        ]
+
+        # (Popen, pidfd) per inference process
+        self._procs = [None] * self.processes
+        self._stopping = False
+        self._supervisor = None
+
+    def _spawn(self, index):
+        # A fresh interpreter, not a fork: TensorFlow must not inherit the
+        # master's state
+        config = {
+            "index": index,
+            "cpus": self.cpu_groups[index],
+            "ring_path": self.ring.path,
+            "slots": self.slots,
+            "processes": self.processes,
+            "pending_fd": self.pending_r,
+            "events": self.events,
+            "batch_size": self.batch_size,
+            "batch_wait": self.batch_wait
+        }
+        proc = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), json.dumps(config)],
+            pass_fds=[self.pending_r, *self.events]
+        )
+        self._procs[index] = (proc, os.pidfd_open(proc.pid))
+
+    def start(self):
+        for index in range(self.processes):
+            self._spawn(index)
+        self._supervisor = threading.Thread(target=self._supervise, name="inference-supervisor", daemon=True)
+        self._supervisor.start()
+
+    def reclaim(self, pid):
+        """Free the slots a dead web worker still held."""
+        held = self.ring.reclaim(pid)
+        if held:
+            logger.warning("Reclaimed %d inference slot(s) of worker %d", held, pid)
+
+    def _reclaim_dead_clients(self):
+        busy = self.ring.state != _FREE
+        for pid in set(self.ring.client[busy].tolist()) - {0, _ORPHAN}:
+            if not _alive(pid):
+                self.reclaim(pid)
+
+    def _fail_slots(self, index):
+        # Slots a crashed inference process was working on
+        with self.ring.lock:
+            running = np.flatnonzero((self.ring.owner == index) & (self.ring.state == _RUNNING)).tolist()
+        self.ring.status[running] = _FAILED
+        self.ring.complete(running, self.events)
+
+    def _supervise(self):
+        # Restart crashed inference processes, failing the slots they held
+        # so the waiting workers get an error instead of a timeout, and
+        # free the slots of dead web workers. Exits are detected through
+        # pidfds: the gunicorn master reaps every child itself, so exit
+        # codes are not reliable here.
+        while not self._stopping:
+            pidfds = {procfd[1]: index for index, procfd in enumerate(self._procs) if procfd is not None}
+            if pidfds:
+                exited = select.select(list(pidfds), [], [], 1.0)[0]
+            else:
+                exited = []
+                time.sleep(1.0)
+            if self._stopping:
+                return
+            self._reclaim_dead_clients()
+            for pidfd in exited:
+                index = pidfds[pidfd]
+                os.close(pidfd)
+                self._procs[index] = None
+                self._fail_slots(index)
+                if self.ring.ready[index] == _LOAD_FAILED:
+                    # Loading the model failed; restarting won't help
+                    continue
+                logger.warning("Inference process %d exited, restarting", index)
+                self.ring.ready[index] = _LOADING
+                self._spawn(index)
+
+    def stop(self, timeout=10):
+        self._stopping = True
+        procs = [procfd for procfd in self._procs if procfd is not None]
+        for _ in procs:
+            os.write(self.pending_w, _RECORD.pack(_STOP))
+        deadline = time.monotonic() + timeout
+        for proc, pidfd in procs:
+            if not select.select([pidfd], [], [], max(0.0, deadline - time.monotonic()))[0]:
+                proc.kill()
+        if self._supervisor is not None:
+            self._supervisor.join(timeout=2)
+        for proc, pidfd in procs:
+            os.close(pidfd)
+        for fd in (self.pending_r, self.pending_w, *self.events):
+            os.close(fd)
+        self.ring.close()
+        os.unlink(self.ring.path)
+
+    def client(self):
+        return InferenceClient(self)
+
+
+class InferenceClient:
+    """
+    Worker-side handle: a Keras-style predict(x, verbose=0) that runs on
+    the inference processes. Safe to call from several threads.
+    """
+
+    def __init__(self, server, timeout=INFERENCE_TIMEOUT):
+        self.ring = server.ring
+        self.pending_w = server.pending_w
+        self.events = server.events
+        self.timeout = timeout
+
+    def connect(self, timeout=None):
+        """Block until at least one inference process has the model loaded; returns self."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while _READY not in self.ring.ready:
+            if (self.ring.ready == _LOAD_FAILED).all():
+                raise RuntimeError("Inference processes failed to load the model")
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError("Timed out waiting for the inference processes")
+            time.sleep(0.1)
+        return self
+
+    def _claim(self):
+        slot = self.ring.claim(os.getpid())
+        if slot is not None:
+            # Drop a wake-up left over from a previous, abandoned use
+            try:
+                while True:
+                    os.eventfd_read(self.events[slot])
+            except BlockingIOError:
+                pass
+        return slot
+
+    def _submit(self, slot, x):
+        self.ring.inputs[slot] = x
+        self.ring.state[slot] = _QUEUED
+        os.write(self.pending_w, _RECORD.pack(slot))
+
+    def _wait(self, slot):
+        poller = select.poll()
+        poller.register(self.events[slot], select.POLLIN)
+        deadline = time.monotonic() + self.timeout
+        while self.ring.state[slot] != _DONE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            if poller.poll(remaining * 1000):
+                try:
+                    os.eventfd_read(self.events[slot])
+                except BlockingIOError:
+                    pass
+        return True
+
+    def _collect(self, slot):
+        if not self._wait(slot):
+            # The slot stays in use until the inference process is done with it
+            self.ring.abandon(slot)
+            raise TimeoutError("Timed out waiting for the inference processes")
+        failed = self.ring.status[slot] != _OK
+        value = float(self.ring.outputs[slot])
+        self.ring.release(slot)
+        if failed:
+            raise RuntimeError("Inference failed")
+        return value
+
+    def predict(self, x, verbose=0):
+        x = np.asarray(x, dtype=np.float32).reshape((-1,) + IMG_SHAPE)
+        out = np.empty((len(x), 1), dtype=np.float32)
+        held = []
+        try:
+            for i in range(len(x)):
+                deadline = time.monotonic() + self.timeout
+                delay = 0.0005
+                while True:
+                    slot = self._claim()
+                    if slot is not None:
+                        break
+                    if held:
+                        # Reuse our own finished slots rather than waiting for
+                        # others', so a large batch can never starve itself
+                        j, old = held.pop(0)
+                        out[j, 0] = self._collect(old)
+                        continue
+                    if time.monotonic() > deadline:
+                        raise TimeoutError("No free inference slot")
+                    time.sleep(delay)
+                    delay = min(delay * 2, 0.01)
+                self._submit(slot, x[i])
+                held.append((i, slot))
+
+            while held:
+                j, slot = held.pop(0)
+                out[j, 0] = self._collect(slot)
+        finally:
+            # On error, hand back whatever is still ours
+            for _, slot in held:
+                self.ring.abandon(slot)
+        return out
+
+
+_server = None
+
+
+def start(**kwargs):
+    """Start the inference processes (gunicorn master, before forking workers)."""
+    global _server
+    if _server is None:
+        if INFERENCE_CPUS and "cpus" not in kwargs:
+            kwargs["cpus"] = parse_cpus(INFERENCE_CPUS)
+        _server = InferenceServer(**kwargs)
+        _server.start()
+    return _server
+
+
+def stop():
+    global _server
+    if _server is not None:
+        _server.stop()
+        _server = None
+
+
+def reclaim(pid):
+    """Free the slots of web worker `pid` after it exited (gunicorn child_exit)."""
+    if _server is not None:
+        _server.reclaim(pid)
+
+
+def client():
+    """InferenceClient for the server started in the master, or None when not in server mode."""
+    return _server.client() if _server is not None else None
+
+
+def worker_cpus():
+    """Cores left for the web workers when INFERENCE_CPUS reserves some, else None."""
+    if not INFERENCE_CPUS:
+        return None
+    reserved = set(parse_cpus(INFERENCE_CPUS))
+    rest = [cpu for cpu in affinity_cpus() if cpu not in reserved]
+    return rest or None
+
+
+if __name__ == "__main__":
+    # Inference process, started by InferenceServer._spawn
+    _serve(**json.loads(sys.argv[1]))
@@ -0,0 +1,222 @@
+import os
+import threading
+import time
+import numpy as np
+
+MODEL_BACKENDS = ("keras", "tflite", "savedmodel")
+
+
+def _tflite_interpreter_class():
+    # Prefer the standalone runtime (requirements.txt): the copy bundled with
+    # TensorFlow works too, but importing TensorFlow adds ~430 MB of RSS to
+    # every process using it
+    try:
+        from tflite_runtime.interpreter import Interpreter, OpResolverType
+    except ImportError:
+        import tensorflow as tf
+        Interpreter = tf.lite.Interpreter
+        OpResolverType = tf.lite.experimental.OpResolverType
+    return Interpreter, OpResolverType
+
+
+class TFLiteModel:
+    """
+    Minimal stand-in for a Keras model backed by the TFLite interpreter.
+
+    Exposes predict(x, verbose=0) returning an (N, 1) float array, so the
+    serving code can use it interchangeably with the Keras model. Handles
+    int8/uint8 quantized input and output tensors.
+
+    Fork-friendly: the interpreter is only built in the process that first
+    calls predict(), so the app can be imported in a Gunicorn master before
+    forking. The interpreter memory-maps the model file read-only, so the
+    weights stay in the page cache and every process on the host reads the
+    same pages, preloaded or not. XNNPACK repacks weights into private
+    memory, so pass xnnpack=False to keep them shared at some cost in
+    per-worker speed.
+    """
+
+    def __init__(self, path, num_threads=None, xnnpack=True):
+        self.path = path
+        self.num_threads = num_threads
+        self.xnnpack = xnnpack
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"TFLite model not found: {path}")
+        self.interpreter = None
+        self._pid = None
+        # The interpreter is not thread-safe
+        self._lock = threading.Lock()
+
+    def _ensure_interpreter(self):
+        if self._pid == os.getpid():
+            return
+        Interpreter, OpResolverType = _tflite_interpreter_class()
+        kwargs = {}
+        if not self.xnnpack:
+            kwargs["experimental_op_resolver_type"] = OpResolverType.BUILTIN_WITHOUT_DEFAULT_DELEGATES
+        self.interpreter = Interpreter(model_path=self.path, num_threads=self.num_threads, **kwargs)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch_size = int(self._input["shape"][0])
+        self._pid = os.getpid()
+
+    def _resize(self, batch_size):
+        self.interpreter.resize_tensor_input(
+            self._input["index"], [batch_size, *self._input["shape"][1:]]
+        )
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch_size = batch_size
+
+    def predict(self, x, verbose=0):
+        x = np.asarray(x, dtype=np.float32)
+        with self._lock:
+            self._ensure_interpreter()
+            if x.shape[0] != self._batch_size:
+                self._resize(x.shape[0])
+
+            dtype = self._input["dtype"]
+            if dtype in (np.int8, np.uint8):
+                scale, zero_point = self._input["quantization"]
+                info = np.iinfo(dtype)
+                x = np.clip(np.round(x / scale + zero_point), info.min, info.max).astype(dtype)
+
+            self.interpreter.set_tensor(self._input["index"], x)
+            self.interpreter.invoke()
+            out = self.interpreter.get_tensor(self._output["index"])
+
+            if self._output["dtype"] in (np.int8, np.uint8):
+                scale, zero_point = self._output["quantization"]
+                out = (out.astype(np.float32) - zero_point) * scale
+
+        return out
+
+
+class SavedModel:
+    """
+    Keras-compatible predict(x, verbose=0) over a SavedModel from
+    export_savedmodel.py.
+
+    Calls the serving signature's concrete function directly: no Keras
+    data adapter or predict loop per call, and loading restores the traced
+    graph instead of rebuilding the model from HDF5. The signature is fixed
+    at [None, 224, 224, 3] float32, so any batch size runs without
+    retracing. Concrete functions are safe to call from several threads.
+    """
+
+    def __init__(self, path):
+        import tensorflow as tf
+        self._tf = tf
+        self.path = path
+        self._loaded = tf.saved_model.load(path)
+        self._fn = self._loaded.signatures["serving_default"]
+        self._input_name = next(iter(self._fn.structured_input_signature[1]))
+
+    def predict(self, x, verbose=0):
+        x = self._tf.convert_to_tensor(np.asarray(x, dtype=np.float32))
+        out = self._fn(**{self._input_name: x})
+        return next(iter(out.values())).numpy()
+
+
+def load_model_backend(backend, keras_path, tflite_path, savedmodel_path=None, num_threads=None, xnnpack=True):
+    """
+    Load the inference model for the given backend:
+    - "keras":      full-float Keras model from model.h5
+    - "tflite":     quantized model from convert_tflite.py via the TFLite interpreter
+    - "savedmodel": compiled serving function from export_savedmodel.py
+    """
+    if backend == "keras":
+        from tensorflow.keras.models import load_model
+        return load_model(keras_path)
+    if backend == "tflite":
+        return TFLiteModel(tflite_path, num_threads=num_threads, xnnpack=xnnpack)
+    if backend == "savedmodel":
+        return SavedModel(savedmodel_path)
+    raise ValueError(f"Unknown MODEL_BACKEND '{backend}'. Expected one of: {', '.join(MODEL_BACKENDS)}")
+
+
+class ModelNotReady(RuntimeError):
+    pass
+
+
+class ModelLoader:
+    """
+    Owns the inference model and its load state.
+
+    start(background=True) loads on a daemon thread so the process can
+    serve lightweight routes immediately; get() blocks until the model is
+    ready (or the timeout expires) and raises ModelNotReady otherwise.
+    With warmup=True one dummy inference runs right after loading so the
+    first real request doesn't pay for graph tracing and allocation.
+    on_done(loader), if given, is called once loading has finished or failed.
+    """
+
+    def __init__(self, load_fn, warmup=False, on_done=None):
+        self._load_fn = load_fn
+        self.warmup = warmup
+        self.on_done = on_done
+        self.state = "pending"
+        self.error = None
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self._model = None
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self, background=False):
+        with self._lock:
+            if self.state != "pending":
+                return
+            self.state = "loading"
+        if background:
+            threading.Thread(target=self._load, name="model-loader", daemon=True).start()
+        else:
+            self._load()
+            if self.error is not None:
+                raise self.error
+
+    def _load(self):
+        start = time.perf_counter()
+        try:
+            model = self._load_fn()
+            self.load_seconds = round(time.perf_counter() - start, 3)
+            if self.warmup:
+                self.state = "warming_up"
+                start = time.perf_counter()
+                model.predict(np.zeros((1, 224, 224, 3), dtype=np.float32), verbose=0)
+                self.warmup_seconds = round(time.perf_counter() - start, 3)
+            self._model = model
+            self.state = "ready"
+        except Exception as e:
+            self.error = e
+            self.state = "failed"
+        finally:
+            self._done.set()
+            if self.on_done is not None:
+                self.on_done(self)
+
+    @property
+    def ready(self):
+        return self._model is not None
+
+    def wait(self, timeout=None):
+        self._done.wait(timeout)
+        return self.ready
+
+    def get(self, timeout=None):
+        if self._model is None and not self.wait(timeout):
+            if self.state == "failed":
+                raise ModelNotReady(f"Model failed to load: {self.error}")
+            raise ModelNotReady(f"Model is not ready (state: {self.state})")
+        return self._model
+
+    def status(self):
+        return {
+            "ready": self.ready,
+            "state": self.state,
+            "load_seconds": self.load_seconds,
+            "warmup_seconds": self.warmup_seconds,
+            "error": str(self.error) if self.error is not None else None
+        }
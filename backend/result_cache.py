@@ -0,0 +1,102 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+
+def content_key(data):
+    """Exact-match cache key for the encoded upload bytes."""
+    return "sha256:" + hashlib.sha256(data).hexdigest()
+
+
+def perceptual_key(img):
+    """
+    64-bit difference hash (dHash) of a preprocessed (1, 224, 224, 3) image.
+    Re-encodes and small sensor noise usually leave it unchanged, so
+    near-identical frames of the same item share a key.
+    """
+    gray = cv2.cvtColor(img[0], cv2.COLOR_RGB2GRAY)
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return "dhash:%016x" % int(np.packbits(bits).view(">u8")[0])
+
+
+class PredictionCache:
+    """
+    Bounded LRU cache of raw model outputs with a per-entry TTL.
+
+    Values are the model's raw initial-freshness output, so a hit skips
+    decoding and model.predict; decay is still computed by the caller
+    for today's date.
+    """
+
+    def __init__(self, max_entries=1024, ttl_seconds=600, perceptual=False):
+        self.max_entries = max(0, int(max_entries))
+        self.ttl = float(ttl_seconds)
+        self.perceptual = perceptual
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.perceptual_hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def get(self, key):
+        if not self.enabled or key is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, value, *keys):
+        if not self.enabled:
+            return
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            for key in keys:
+                if key is None:
+                    continue
+                self._entries[key] = (value, expires)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def record_hit(self, perceptual=False):
+        with self._lock:
+            if perceptual:
+                self.perceptual_hits += 1
+            else:
+                self.hits += 1
+
+    def record_miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def stats(self):
+        with self._lock:
+            hits = self.hits + self.perceptual_hits
+            lookups = hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "perceptual": self.perceptual,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "perceptual_hits": self.perceptual_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0
+            }
@@ -0,0 +1,103 @@
+import math
+import os
+
+# Thread pool sizing for TensorFlow and OpenCV.
+#
+# Left alone, every TensorFlow runtime starts one intra-op thread per core
+# it can see, and so does OpenCV, regardless of container CPU limits or of
+# how many gunicorn workers share the machine; with N workers that is N
+# times more busy threads than cores. thread_settings() splits the real
+# CPU budget (affinity mask, capped by the cgroup CPU quota) between the
+# worker processes.
+#
+# Overrides:
+#   RUNTIME_CPUS         cores shared by all processes (default: detected)
+#   TF_INTRA_OP_THREADS  threads inside one TensorFlow op
+#   TF_INTER_OP_THREADS  TensorFlow ops run in parallel
+#   CV2_NUM_THREADS      OpenCV threads (0 = run single-threaded)
+
+_CGROUP_V2 = "/sys/fs/cgroup/cpu.max"
+_CGROUP_V1_QUOTA = "/sys/fs/cgroup/cpu/cpu.cfs_quota_us"
+_CGROUP_V1_PERIOD = "/sys/fs/cgroup/cpu/cpu.cfs_period_us"
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def cgroup_cpu_quota():
+    """CPU limit of this container in cores (e.g. 2.5), or None when unlimited."""
+    line = _read(_CGROUP_V2)
+    if line:
+        quota, _, period = line.partition(" ")
+        if quota != "max" and period:
+            return int(quota) / int(period)
+        return None
+
+    quota, period = _read(_CGROUP_V1_QUOTA), _read(_CGROUP_V1_PERIOD)
+    if quota and period and int(quota) > 0:
+        return int(quota) / int(period)
+    return None
+
+
+def available_cpus():
+    """Cores this server may use: RUNTIME_CPUS, else the affinity mask capped by the cgroup quota."""
+    override = os.environ.get("RUNTIME_CPUS")
+    if override:
+        return max(1, int(override))
+
+    if hasattr(os, "sched_getaffinity"):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+    quota = cgroup_cpu_quota()
+    if quota is not None:
+        cpus = min(cpus, max(1, math.ceil(quota)))
+    return cpus
+
+
+def worker_count():
+    """Processes sharing the CPU budget (GUNICORN_WORKERS is exported by gunicorn.conf.py)."""
+    return max(1, int(os.environ.get("GUNICORN_WORKERS") or os.environ.get("WEB_CONCURRENCY") or 1))
+
+
+def thread_settings(workers=None, cpus=None):
+    """
+    Thread counts for one process out of `workers` (default: worker_count())
+    sharing `cpus` cores (capped by, and defaulting to, available_cpus()).
+    """
+    workers = workers or worker_count()
+    cpus = min(cpus, available_cpus()) if cpus else available_cpus()
+    share = max(1, cpus // workers)
+    return {
+        "cpus": cpus,
+        "workers": workers,
+        "intra_op": int(os.environ.get("TF_INTRA_OP_THREADS") or share),
+        # One model, one graph: a second inter-op thread only helps with
+        # cores to spare
+        "inter_op": int(os.environ.get("TF_INTER_OP_THREADS") or (2 if share >= 4 else 1)),
+        "opencv": int(os.environ.get("CV2_NUM_THREADS") or share)
+    }
+
+
+def configure_opencv(settings):
+    import cv2
+    cv2.setNumThreads(settings["opencv"])
+
+
+def configure_tensorflow(settings):
+    """
+    Size TensorFlow's thread pools. Only takes effect before the runtime
+    has started (i.e. before the model is loaded); returns False otherwise.
+    """
+    import tensorflow as tf
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(settings["intra_op"])
+        tf.config.threading.set_inter_op_parallelism_threads(settings["inter_op"])
+    except RuntimeError:
+        return False
+    return True
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The backend modules import each other by their flat names (as gunicorn
+# runs them from backend/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
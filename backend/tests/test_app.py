@@ -0,0 +1,65 @@
+import io
+import json
+import os
+
+import pytest
+
+# Don't block on loading the model
+os.environ.setdefault("MODEL_LOAD_MODE", "background")
+
+import app  # noqa: E402
+from test_batch_input import damaged_zip, make_zip  # noqa: E402
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # The archive checks happen before anything is scored
+    monkeypatch.setattr(app, "model_unavailable", lambda: None)
+    return app.app.test_client()
+
+
+def post_archive(client, data, filename):
+    return client.post(
+        "/api/predict/batch",
+        data={"archive": (io.BytesIO(data), filename), "fruit": "apple"},
+        content_type="multipart/form-data"
+    )
+
+
+def test_batch_rejects_non_archive_filename(client):
+    response = post_archive(client, b"", "images.rar")
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("filename", ["images.zip", "images.tar.gz"])
+def test_batch_answers_400_for_unreadable_archive(client, filename):
+    response = post_archive(client, b"not an archive", filename)
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Could not read archive"}
+
+
+def test_batch_reports_damaged_member_in_stream(client):
+    response = post_archive(client, damaged_zip().getvalue(), "images.zip")
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert len(lines) == 1
+    assert lines[0]["error"].startswith("Could not read archive")
+
+
+def test_job_items_reports_unreadable_archive():
+    assert app.job_items(("images.zip", b"not an archive"), [], [], "apple") == (None, "Could not read archive")
+    items, message = app.job_items(("images.rar", b""), [], [], "apple")
+    assert items is None
+    assert message.startswith("Invalid archive type")
+
+
+def test_job_items_stops_at_the_image_and_byte_limits(monkeypatch):
+    archive = make_zip([(f"apple/{i}.jpg", b"\0" * 1000) for i in range(10)]).getvalue()
+    monkeypatch.setattr(app, "JOB_MAX_IMAGES", 3)
+    assert app.job_items(("images.zip", archive), [], [], "apple") == (None, "Job limit of 3 images exceeded")
+
+    monkeypatch.setattr(app, "JOB_MAX_IMAGES", 100)
+    monkeypatch.setattr(app, "ARCHIVE_MAX_BYTES", 5000)
+    items, message = app.job_items(("images.zip", archive), [], [], "apple")
+    assert items is None
+    assert message.startswith("Archive expands to more than")
@@ -0,0 +1,77 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+pytest.importorskip("starlette")
+# Importing asgi imports app; don't block on loading the model
+os.environ.setdefault("MODEL_LOAD_MODE", "background")
+
+from asgi import BodyLimitMiddleware, UploadTooLarge  # noqa: E402
+
+LIMIT = 100
+
+
+async def echo_app(scope, receive, send):
+    """Reads the whole body, then answers 200 with its length."""
+    size, more = 0, True
+    while more:
+        message = await receive()
+        size += len(message.get("body", b""))
+        more = message.get("more_body", False)
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": str(size).encode()})
+
+
+def call(app, chunks, content_length=None):
+    """Send `chunks` as the request body; returns (status, body, chunks read)."""
+    headers = [] if content_length is None else [(b"content-length", str(content_length).encode())]
+    scope = {"type": "http", "method": "POST", "path": "/", "headers": headers, "query_string": b""}
+    pending = list(chunks)
+    read = 0
+    sent = []
+
+    async def receive():
+        nonlocal read
+        read += 1
+        body = pending.pop(0)
+        return {"type": "http.request", "body": body, "more_body": bool(pending)}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    body = b"".join(m.get("body", b"") for m in sent if m["type"] == "http.response.body")
+    return sent[0]["status"], body, read
+
+
+def test_body_under_the_limit_passes_through():
+    status, body, _ = call(BodyLimitMiddleware(echo_app, LIMIT), [b"x" * 60, b"x" * 40], 100)
+    assert (status, body) == (200, b"100")
+
+
+def test_declared_oversized_body_is_rejected_unread():
+    status, body, read = call(BodyLimitMiddleware(echo_app, LIMIT), [b"x" * 200], 200)
+    assert status == 413
+    assert json.loads(body) == {"error": "Upload too large"}
+    assert read == 0
+
+
+def test_chunked_body_is_cut_off_once_past_the_limit():
+    chunks = [b"x" * 60] * 5
+    status, body, read = call(BodyLimitMiddleware(echo_app, LIMIT), chunks)
+    assert status == 413
+    assert json.loads(body) == {"error": "Upload too large"}
+    # Stopped at the chunk that crossed the limit
+    assert read == 2
+
+
+def test_limit_hit_after_the_response_started_is_raised():
+    async def streaming_app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        while (await receive()).get("more_body"):
+            pass
+
+    with pytest.raises(UploadTooLarge):
+        call(BodyLimitMiddleware(streaming_app, LIMIT), [b"x" * 60] * 3)
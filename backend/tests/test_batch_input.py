@@ -0,0 +1,82 @@
+import io
+import os
+import tarfile
+import zipfile
+
+import pytest
+
+from batch_input import ARCHIVE_ERRORS, ArchiveTooLarge, iter_archive
+
+
+def make_zip(members):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in members:
+            zf.writestr(name, data)
+    buf.seek(0)
+    return buf
+
+
+def make_tar(members):
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w:gz") as tf:
+        for name, data in members:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tf.addfile(info, io.BytesIO(data))
+    buf.seek(0)
+    return buf
+
+
+@pytest.mark.parametrize("make, filename", [(make_zip, "a.zip"), (make_tar, "a.tar.gz")])
+def test_members_within_total_cap_are_all_read(make, filename):
+    members = [("apple/1.jpg", b"x" * 100), ("2.jpg", b"y" * 100)]
+    assert list(iter_archive(make(members), filename, 1000, 200)) == members
+
+
+@pytest.mark.parametrize("make, filename", [(make_zip, "a.zip"), (make_tar, "a.tar.gz")])
+def test_total_cap_stops_expansion(make, filename):
+    # Highly compressible members: the archive is tiny, the contents are not
+    members = [(f"{i}.jpg", b"\0" * 1000) for i in range(10)]
+    it = iter_archive(make(members), filename, 1000, 2500)
+    assert next(it) == members[0]
+    assert next(it) == members[1]
+    with pytest.raises(ArchiveTooLarge):
+        next(it)
+
+
+def test_oversized_members_do_not_count_towards_total():
+    members = [("big.jpg", b"\0" * 5000), ("small.jpg", b"x" * 10)]
+    read = list(iter_archive(make_zip(members), "a.zip", 1000, 100))
+    assert read == [("big.jpg", None), ("small.jpg", b"x" * 10)]
+
+
+def damaged_zip():
+    """A zip whose only member fails its CRC check when read."""
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_STORED) as zf:
+        zf.writestr("apple/1.jpg", b"a" * 64)
+    data = bytearray(buf.getvalue())
+    data[data.index(b"a" * 64)] = ord("b")
+    return io.BytesIO(bytes(data))
+
+
+@pytest.mark.parametrize("filename", ["a.zip", "a.tar.gz"])
+def test_unreadable_archive_raises_when_opened(filename):
+    with pytest.raises(ARCHIVE_ERRORS):
+        iter_archive(io.BytesIO(b"not an archive"), filename, 1000)
+
+
+def test_damaged_member_raises_while_iterating():
+    members = iter_archive(damaged_zip(), "a.zip", 1000)
+    with pytest.raises(ARCHIVE_ERRORS):
+        next(members)
+
+
+def test_truncated_tar_raises_while_iterating():
+    # Incompressible members, so the cut falls inside the second one
+    data = make_tar([("1.jpg", os.urandom(5000)), ("2.jpg", os.urandom(5000))]).getvalue()
+    members = iter_archive(io.BytesIO(data[:len(data) * 3 // 4]), "a.tar.gz", 10000)
+    assert next(members)[0] == "1.jpg"
+    with pytest.raises(ARCHIVE_ERRORS):
+        next(members)
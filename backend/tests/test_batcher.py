@@ -0,0 +1,89 @@
+import threading
+
+import numpy as np
+import pytest
+
+from batcher import InferenceBatcher
+
+
+def image(value):
+    return np.full((1, 4, 4, 3), value, dtype=np.float32)
+
+
+def row_means(batch):
+    """Stand-in model: one output row per image, equal to its mean pixel."""
+    return batch.reshape(len(batch), -1).mean(axis=1, keepdims=True)
+
+
+def predict_concurrently(batcher, values):
+    results = [None] * len(values)
+    barrier = threading.Barrier(len(values))
+
+    def call(i):
+        barrier.wait()
+        results[i] = batcher.predict(image(values[i]))
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(values))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(10)
+    return results
+
+
+def test_each_caller_gets_its_own_row():
+    sizes = []
+
+    def predict_fn(batch):
+        sizes.append(len(batch))
+        return row_means(batch)
+
+    batcher = InferenceBatcher(predict_fn, max_batch_size=4, max_wait_ms=50)
+    values = [float(v) for v in range(10)]
+    assert predict_concurrently(batcher, values) == values
+    assert max(sizes) <= 4
+    assert sum(sizes) == len(values)
+    # Concurrent calls were actually grouped
+    assert len(sizes) < len(values)
+
+
+def test_batched_matches_single_image_path():
+    batcher = InferenceBatcher(row_means, max_batch_size=8, max_wait_ms=20)
+    values = [0.25 * v for v in range(8)]
+    assert predict_concurrently(batcher, values) == [float(row_means(image(v))[0][0]) for v in values]
+
+
+def test_error_reaches_every_caller_in_the_batch():
+    def failing(batch):
+        raise RuntimeError("model exploded")
+
+    batcher = InferenceBatcher(failing, max_batch_size=4, max_wait_ms=20)
+    errors = []
+
+    def call():
+        try:
+            batcher.predict(image(1))
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(10)
+    assert errors == ["model exploded"] * 3
+
+
+def test_batcher_keeps_serving_after_an_error():
+    calls = []
+
+    def flaky(batch):
+        calls.append(len(batch))
+        if len(calls) == 1:
+            raise ValueError("first batch fails")
+        return row_means(batch)
+
+    batcher = InferenceBatcher(flaky, max_batch_size=2, max_wait_ms=0)
+    with pytest.raises(ValueError):
+        batcher.predict(image(1))
+    assert batcher.predict(image(3)) == 3.0
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from decay import (
+    IDEAL_SHELF, ROOM_SHELF, HIGH_HUMIDITY_SHELF, TABLE_CONDITIONS, TABLE_DAYS,
+    freshness_multiplier, nonlinear_decay, threshold_day
+)
+
+SHELVES = {"ideal": IDEAL_SHELF, "room": ROOM_SHELF, "humid": HIGH_HUMIDITY_SHELF}
+CASES = [(fruit, condition) for fruit in IDEAL_SHELF for condition in TABLE_CONDITIONS]
+
+
+def first_day_at_or_below(initial, threshold, shelf):
+    day = 0
+    while nonlinear_decay(initial, day, shelf) > threshold:
+        day += 1
+    return day
+
+
+@pytest.mark.parametrize("fruit, condition", CASES)
+def test_multiplier_matches_nonlinear_decay(fruit, condition):
+    shelf = SHELVES[condition][fruit]
+    for initial in (100, 80, 37.5):
+        for day in range(TABLE_DAYS + 5):
+            value = round(float(initial * freshness_multiplier(fruit, condition, day)), 2)
+            assert value == nonlinear_decay(initial, day, shelf), (initial, day)
+
+
+def test_multiplier_takes_arrays_of_whole_days():
+    days = np.array([0, 1, 5, 99])
+    expected = [freshness_multiplier("tomato", "room", int(d)) for d in days]
+    assert freshness_multiplier("tomato", "room", days).tolist() == expected
+    assert freshness_multiplier("tomato", "room", 2.0) == freshness_multiplier("tomato", "room", 2)
+
+
+@pytest.mark.parametrize("day", [0.5, [1, 2.25], float("nan")])
+def test_multiplier_rejects_fractional_days(day):
+    with pytest.raises(ValueError):
+        freshness_multiplier("apple", "ideal", day)
+
+
+@pytest.mark.parametrize("fruit, condition", CASES)
+def test_threshold_day_matches_nonlinear_decay(fruit, condition):
+    shelf = SHELVES[condition][fruit]
+    for initial in (100, 80, 55.55):
+        for threshold in np.arange(0, 101, 0.1).round(2).tolist():
+            expected = first_day_at_or_below(initial, threshold, shelf)
+            assert threshold_day(fruit, condition, threshold, initial) == expected, (initial, threshold)
+
+
+@pytest.mark.parametrize("fruit, condition, threshold, initial, day", [
+    ("apple", "ideal", 79.9, 100, 16),
+    ("apple", "ideal", 79.9, 80, 2),
+    ("orange", "ideal", 70, 80, 10),
+    ("capsicum", "ideal", 70, 80, 5),
+])
+def test_threshold_day_is_not_rounded_to_whole_percent(fruit, condition, threshold, initial, day):
+    assert threshold_day(fruit, condition, threshold, initial) == day
+
+
+def test_threshold_day_edges():
+    # At or above the starting value: day 0; at or below 0: the spoiled day
+    assert threshold_day("banana", "ideal", 90, initial=90) == 0
+    assert threshold_day("banana", "ideal", 0) == IDEAL_SHELF["banana"]
+    assert threshold_day("banana", "ideal", -5) == IDEAL_SHELF["banana"]
+    assert threshold_day("okra", "humid", 50) == 1
+    assert threshold_day("apple", "ideal", 50, initial=0) == 0
@@ -0,0 +1,85 @@
+import os
+
+import pytest
+
+from inference_server import _CLAIMED, _DONE, _FREE, _ORPHAN, _QUEUED, _RUNNING, TensorRing
+
+
+@pytest.fixture
+def ring():
+    ring = TensorRing(slots=3, processes=1)
+    yield ring
+    ring.close()
+    os.unlink(ring.path)
+
+
+@pytest.fixture
+def events():
+    fds = [os.eventfd(0, os.EFD_NONBLOCK) for _ in range(3)]
+    yield fds
+    for fd in fds:
+        os.close(fd)
+
+
+def test_claim_takes_free_slots_until_full(ring):
+    assert [ring.claim(100) for _ in range(3)] == [0, 1, 2]
+    assert ring.claim(100) is None
+    assert list(ring.state) == [_CLAIMED] * 3
+    ring.release(1)
+    assert ring.claim(200) == 1
+    assert ring.client[1] == 200
+
+
+def test_a_second_mapping_sees_the_same_slots(ring):
+    other = TensorRing(slots=3, processes=1, path=ring.path)
+    try:
+        slot = ring.claim(100)
+        ring.inputs[slot] = 0.5
+        assert other.state[slot] == _CLAIMED
+        assert other.inputs[slot].min() == 0.5
+    finally:
+        other.close()
+
+
+def test_complete_wakes_the_waiting_worker(ring, events):
+    slot = ring.claim(100)
+    ring.state[slot] = _RUNNING
+    ring.owner[slot] = 0
+    ring.complete([slot], events)
+    assert ring.state[slot] == _DONE
+    assert ring.owner[slot] == -1
+    assert os.eventfd_read(events[slot]) == 1
+
+
+def test_abandoned_queued_slot_is_freed_on_completion(ring, events):
+    slot = ring.claim(100)
+    ring.state[slot] = _QUEUED
+    ring.abandon(slot)
+    # Still in the inference process's hands
+    assert ring.state[slot] == _QUEUED
+    assert ring.client[slot] == _ORPHAN
+    ring.complete([slot], events)
+    assert ring.state[slot] == _FREE
+    with pytest.raises(BlockingIOError):
+        os.eventfd_read(events[slot])
+
+
+def test_abandoning_a_claimed_or_done_slot_frees_it(ring):
+    claimed, done = ring.claim(100), ring.claim(100)
+    ring.state[done] = _DONE
+    ring.abandon(claimed)
+    ring.abandon(done)
+    assert ring.state[claimed] == _FREE
+    assert ring.state[done] == _FREE
+
+
+def test_reclaim_frees_only_the_dead_workers_slots(ring):
+    claimed, queued = ring.claim(100), ring.claim(100)
+    ring.state[queued] = _QUEUED
+    other = ring.claim(200)
+    assert ring.reclaim(100) == 2
+    assert ring.state[claimed] == _FREE
+    assert ring.client[queued] == _ORPHAN
+    assert ring.state[other] == _CLAIMED
+    # The orphaned slot is no longer the dead worker's
+    assert ring.reclaim(100) == 0
@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+from jobs import DONE, FAILED, QUEUED, RUNNING, JobRunner, JobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / "jobs.db"))
+
+
+def items(n):
+    return [(f"img{i}.jpg", "apple", b"data%d" % i) for i in range(n)]
+
+
+def score(batch):
+    return [{"name": name, "fruit": fruit} for name, fruit, _ in batch]
+
+
+def result_names(store, job_id):
+    return [json.loads(line)["name"] for line in store.results(job_id)]
+
+
+def test_job_is_scored_in_upload_order(store):
+    job_id = store.create(items(7))
+    runner = JobRunner(store, score, chunk_size=3)
+    assert store.claim("w1") == job_id
+    runner._process(job_id, "w1")
+
+    status = store.get(job_id)
+    assert (status["state"], status["done"], status["total"]) == (DONE, 7, 7)
+    assert result_names(store, job_id) == [f"img{i}.jpg" for i in range(7)]
+
+
+def test_interrupted_job_resumes_from_first_unscored_image(store):
+    job_id = store.create(items(5))
+    assert store.claim("crashed") == job_id
+    # The first worker saved one chunk, then died
+    first = store.pending_items(job_id, 2)
+    store.save_results(job_id, [(idx, {"name": name}) for idx, name, _, _ in first])
+
+    assert store.requeue_stale(max_age=-1) == 1
+    assert store.get(job_id)["state"] == QUEUED
+
+    scored = []
+
+    def recording_score(batch):
+        scored.extend(name for name, _, _ in batch)
+        return score(batch)
+
+    assert store.claim("w2") == job_id
+    JobRunner(store, recording_score, chunk_size=2)._process(job_id, "w2")
+    assert scored == ["img2.jpg", "img3.jpg", "img4.jpg"]
+    assert store.get(job_id)["done"] == 5
+    assert result_names(store, job_id) == [f"img{i}.jpg" for i in range(5)]
+
+
+def test_fresh_heartbeat_is_not_requeued(store):
+    job_id = store.create(items(1))
+    store.claim("w1")
+    assert store.heartbeat(job_id, "w1")
+    assert store.requeue_stale(max_age=60) == 0
+    assert store.get(job_id)["state"] == RUNNING
+    # Another owner can't keep the job alive
+    assert not store.heartbeat(job_id, "w2")
+
+
+def test_job_that_keeps_dying_is_failed(store):
+    job_id = store.create(items(1))
+    for _ in range(2):
+        assert store.claim("dies") == job_id
+        assert store.requeue_stale(max_age=-1, max_attempts=3) == 1
+    assert store.claim("dies") == job_id
+    assert store.requeue_stale(max_age=-1, max_attempts=3) == 0
+
+    status = store.get(job_id)
+    assert status["state"] == FAILED
+    assert "3 times" in status["error"]
+    assert store.claim("w2") is None
+
+
+def test_score_error_fails_the_job(store):
+    def broken(batch):
+        raise RuntimeError("decoder crashed")
+
+    job_id = store.create(items(2))
+    store.claim("w1")
+    JobRunner(store, broken)._process(job_id, "w1")
+    status = store.get(job_id)
+    assert (status["state"], status["error"]) == (FAILED, "decoder crashed")
@@ -0,0 +1,79 @@
+import numpy as np
+
+import result_cache
+from result_cache import PredictionCache, content_key, perceptual_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_least_recently_used_entry_is_evicted(monkeypatch):
+    monkeypatch.setattr(result_cache.time, "monotonic", FakeClock())
+    cache = PredictionCache(max_entries=2, ttl_seconds=60)
+    cache.put(1.0, "a")
+    cache.put(2.0, "b")
+    # Reading "a" makes "b" the oldest
+    assert cache.get("a") == 1.0
+    cache.put(3.0, "c")
+    assert cache.get("b") is None
+    assert cache.get("a") == 1.0
+    assert cache.get("c") == 3.0
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(result_cache.time, "monotonic", clock)
+    cache = PredictionCache(max_entries=4, ttl_seconds=10)
+    cache.put(1.0, "a")
+    clock.now += 9.9
+    assert cache.get("a") == 1.0
+    clock.now += 0.2
+    assert cache.get("a") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_one_value_under_several_keys(monkeypatch):
+    monkeypatch.setattr(result_cache.time, "monotonic", FakeClock())
+    cache = PredictionCache(max_entries=4, ttl_seconds=60, perceptual=True)
+    cache.put(42.0, "sha256:x", None, "dhash:y")
+    assert cache.get("sha256:x") == 42.0
+    assert cache.get("dhash:y") == 42.0
+    assert cache.get(None) is None
+    assert cache.stats()["size"] == 2
+
+
+def test_disabled_cache_stores_nothing():
+    cache = PredictionCache(max_entries=0)
+    cache.put(1.0, "a")
+    assert not cache.enabled
+    assert cache.get("a") is None
+
+
+def test_hit_rate():
+    cache = PredictionCache()
+    cache.record_hit()
+    cache.record_hit(perceptual=True)
+    cache.record_miss()
+    cache.record_miss()
+    stats = cache.stats()
+    assert (stats["hits"], stats["perceptual_hits"], stats["misses"]) == (1, 1, 2)
+    assert stats["hit_rate"] == 0.5
+
+
+def test_content_key_is_exact():
+    assert content_key(b"abc") == content_key(b"abc")
+    assert content_key(b"abc") != content_key(b"abd")
+
+
+def test_perceptual_key_survives_small_noise():
+    rng = np.random.default_rng(0)
+    img = np.repeat(np.linspace(0, 1, 224, dtype=np.float32)[None, :], 224, axis=0)
+    img = np.stack([img, img[::-1], img.T], axis=-1)[None]
+    noisy = np.clip(img + rng.normal(0, 0.002, img.shape).astype(np.float32), 0, 1)
+    assert perceptual_key(img) == perceptual_key(noisy)
+    assert perceptual_key(img) != perceptual_key(img[:, :, ::-1].copy())
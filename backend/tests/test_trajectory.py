@@ -0,0 +1,36 @@
+import pytest
+
+from decay import IDEAL_SHELF, ROOM_SHELF, HIGH_HUMIDITY_SHELF, nonlinear_decay
+from vector_decay import CONDITIONS, freshness_trajectory, normalized_trajectory
+
+SHELVES = {"ideal": IDEAL_SHELF, "room": ROOM_SHELF, "humid": HIGH_HUMIDITY_SHELF}
+
+
+@pytest.mark.parametrize("fruit", list(IDEAL_SHELF))
+@pytest.mark.parametrize("initial", [37.5, 88.12, 100])
+def test_daily_trajectory_matches_nonlinear_decay(fruit, initial):
+    trajectory = freshness_trajectory(initial, fruit, "day")
+    for condition in CONDITIONS:
+        shelf = SHELVES[condition][fruit]
+        curve = trajectory[condition]
+        spoiled = trajectory["spoiled_at"][condition]
+        assert len(curve) == spoiled + 1
+        for day, value in enumerate(curve):
+            assert value == nonlinear_decay(initial, day, shelf), (condition, day)
+        assert curve[-1] == 0
+
+
+@pytest.mark.parametrize("fruit", list(IDEAL_SHELF))
+def test_hourly_trajectory_agrees_on_whole_days(fruit):
+    daily = freshness_trajectory(80, fruit, "day")
+    hourly = freshness_trajectory(80, fruit, "hour")
+    for condition in CONDITIONS:
+        on_the_day = hourly[condition][::24]
+        assert on_the_day[:len(daily[condition]) - 1] == daily[condition][:-1]
+        assert hourly[condition][-1] == 0
+
+
+def test_cached_trajectory_is_read_only():
+    for array in normalized_trajectory("banana", "day"):
+        with pytest.raises(ValueError):
+            array[0] = 0
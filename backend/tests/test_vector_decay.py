@@ -0,0 +1,54 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from decay import IDEAL_SHELF, compute_all_decay
+from vector_decay import compute_all_decay_vec, fruit_ids, round2
+
+INITIALS = [0, 0.5, 12.345, 50, 77.77, 99.99, 100]
+
+
+def test_vector_matches_scalar_decay():
+    today = date.today()
+    fruits, initials, uploads = [], [], []
+    for fruit in IDEAL_SHELF:
+        for initial in INITIALS:
+            for days in range(0, 40):
+                fruits.append(fruit)
+                initials.append(initial)
+                uploads.append(today - timedelta(days=days))
+
+    vec = compute_all_decay_vec(initials, fruits, uploads, today=today)
+    for i, (fruit, initial, upload) in enumerate(zip(fruits, initials, uploads)):
+        expected = compute_all_decay(initial, fruit, upload)
+        for key, value in expected.items():
+            assert vec[key][i] == value, (fruit, initial, upload, key)
+
+
+def test_fruit_names_and_ids_give_the_same_result():
+    today = date(2024, 5, 1)
+    names = ["apple", "Okra", "banana"]
+    by_name = compute_all_decay_vec([80, 80, 80], names, ["2024-04-28"] * 3, today=today)
+    by_id = compute_all_decay_vec([80, 80, 80], fruit_ids(names), ["2024-04-28"] * 3, today=today)
+    for key in by_name:
+        assert np.array_equal(by_name[key], by_id[key])
+
+
+def test_vector_decay_rejects_unknown_fruit():
+    with pytest.raises(ValueError):
+        compute_all_decay_vec([50], ["durian"], [date.today()])
+
+
+def test_round2_agrees_with_builtin_round():
+    values = np.arange(0, 100, 0.005)
+    assert round2(values).tolist() == [round(v, 2) for v in values.tolist()]
+
+
+def test_future_upload_dates_count_as_today():
+    today = date(2026, 1, 1)
+    vec = compute_all_decay_vec([80, 80], ["okra", "okra"], ["2027-01-01", today], today=today)
+    for key, values in vec.items():
+        assert values[0] == values[1], key
+    assert vec["days_passed"][0] == 0
+    assert vec["ideal_final"][0] == 80
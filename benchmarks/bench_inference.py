@@ -0,0 +1,268 @@
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timezone
+from importlib import metadata
+
+import cv2
+import numpy as np
+
+# Benchmarks for the backend inference path (backend/):
+#
+#   preprocess_image        decode + resize + normalize from a file on disk
+#   preprocess_image_bytes  the same from in-memory bytes (what the API uses)
+#   predict                 model.predict on one preprocessed image
+#   compute_all_decay       scalar decay for one prediction
+#   api_predict             POST /api/predict through the Flask test client
+#
+# Every benchmark runs at each concurrency level (threads sharing the same
+# process) over synthetic images of several resolutions and formats,
+# generated from a fixed seed, and reports throughput and p50/p95/p99
+# latency. Results are written as JSON:
+#
+#   python benchmarks/bench_inference.py -o baseline.json
+#   python benchmarks/bench_inference.py -o after.json --compare baseline.json
+#
+# The model comes from the backend configuration (MODEL_BACKEND,
+# MODEL_PATH, TFLITE_MODEL_PATH, SAVEDMODEL_PATH); the result cache is
+# disabled unless --cache is given so every API call does the full work.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(ROOT, "backend")
+
+BENCHMARKS = ("preprocess_image", "preprocess_image_bytes", "predict", "compute_all_decay", "api_predict")
+RESOLUTIONS = ((224, 224), (640, 480), (1920, 1080), (4032, 3024))
+FORMATS = (".jpg", ".png", ".webp")
+FRUITS = ("apple", "banana", "tomato", "orange", "potato", "cucumber", "capsicum", "okra")
+
+
+def synthetic_image(width, height, seed):
+    """Smooth random colour field: compresses like a photo, unlike white noise."""
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 256, (max(2, height // 32), max(2, width // 32), 3), dtype=np.uint8)
+    img = cv2.resize(small, (width, height), interpolation=cv2.INTER_CUBIC)
+    noise = rng.normal(0, 6, img.shape)
+    return np.clip(img + noise, 0, 255).astype(np.uint8)
+
+
+def make_images(resolutions, formats, seed):
+    """{variant: encoded bytes}, e.g. {"jpg-1920x1080": b"..."}."""
+    images = {}
+    for i, (width, height) in enumerate(resolutions):
+        img = synthetic_image(width, height, seed + i)
+        for ext in formats:
+            ok, buf = cv2.imencode(ext, img)
+            if ok:
+                images[f"{ext[1:]}-{width}x{height}"] = buf.tobytes()
+    return images
+
+
+def run_concurrent(fn, calls, concurrency, warmup):
+    """Run fn() `calls` times over `concurrency` threads; returns (latencies, wall seconds)."""
+    for _ in range(warmup):
+        fn()
+
+    latencies = []
+    lock = threading.Lock()
+    per_thread = [calls // concurrency + (i < calls % concurrency) for i in range(concurrency)]
+    barrier = threading.Barrier(concurrency + 1)
+
+    def worker(n):
+        local = []
+        barrier.wait()
+        for _ in range(n):
+            start = time.perf_counter()
+            fn()
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in per_thread]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in threads:
+        t.join()
+    return np.array(latencies), time.perf_counter() - start
+
+
+def summarize(bench, variant, concurrency, latencies, wall):
+    ms = latencies * 1000
+    return {
+        "bench": bench,
+        "variant": variant,
+        "concurrency": concurrency,
+        "calls": len(latencies),
+        "throughput": round(len(latencies) / wall, 2) if wall else None,
+        "mean_ms": round(float(ms.mean()), 4),
+        "p50_ms": round(float(np.percentile(ms, 50)), 4),
+        "p95_ms": round(float(np.percentile(ms, 95)), 4),
+        "p99_ms": round(float(np.percentile(ms, 99)), 4)
+    }
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+
+    versions = {"python": platform.python_version(), "numpy": np.__version__, "opencv": cv2.__version__}
+    for name in ("tensorflow", "tflite-runtime", "flask"):
+        try:
+            versions[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            pass
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": commit,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "versions": versions,
+        "env": {k: os.environ[k] for k in (
+            "MODEL_BACKEND", "MODEL_PATH", "TFLITE_MODEL_PATH", "SAVEDMODEL_PATH", "TFLITE_XNNPACK",
+            "BATCH_MAX_SIZE", "BATCH_MAX_WAIT_MS", "REDUCED_DECODE_MIN"
+        ) if k in os.environ}
+    }
+
+
+def run_benchmarks(args):
+    sys.path.insert(0, BACKEND_DIR)
+    os.environ.setdefault("MODEL_LOAD_MODE", "eager")
+    if not args.cache:
+        os.environ["CACHE_MAX_ENTRIES"] = "0"
+
+    from utils import preprocess_image, preprocess_image_bytes
+    from decay import compute_all_decay
+
+    images = make_images(RESOLUTIONS, FORMATS, args.seed)
+    results = []
+
+    def record(bench, variant, fn):
+        for concurrency in args.concurrency:
+            latencies, wall = run_concurrent(fn, args.calls, concurrency, args.warmup)
+            row = summarize(bench, variant, concurrency, latencies, wall)
+            results.append(row)
+            print(f"  {bench:<24} {variant:<16} c={concurrency:<3} "
+                  f"{row['throughput']:>10.1f}/s  p50 {row['p50_ms']:.3f} ms  p99 {row['p99_ms']:.3f} ms")
+
+    if "preprocess_image" in args.only:
+        with tempfile.TemporaryDirectory() as tmp:
+            for variant, data in images.items():
+                path = os.path.join(tmp, variant + "." + variant.split("-")[0])
+                with open(path, "wb") as f:
+                    f.write(data)
+                record("preprocess_image", variant, lambda path=path: preprocess_image(path))
+
+    if "preprocess_image_bytes" in args.only:
+        for variant, data in images.items():
+            record("preprocess_image_bytes", variant, lambda data=data: preprocess_image_bytes(data))
+
+    if "compute_all_decay" in args.only:
+        rng = np.random.default_rng(args.seed)
+        cases = [(float(rng.uniform(0, 100)), FRUITS[i % len(FRUITS)], date.fromordinal(date.today().toordinal() - i % 10))
+                 for i in range(256)]
+        counter = iter(range(1 << 62))
+        record("compute_all_decay", "scalar", lambda: compute_all_decay(*cases[next(counter) % len(cases)]))
+
+    if {"predict", "api_predict"} & set(args.only):
+        import app as backend_app
+        model = backend_app.model_loader.get()
+
+        if "predict" in args.only:
+            img = preprocess_image_bytes(images[next(iter(images))])
+            record("predict", "batch-1", lambda: model.predict(img, verbose=0))
+
+        if "api_predict" in args.only:
+            client = backend_app.app.test_client()
+            variants = [v for v in images if v.startswith("jpg")] or list(images)
+            for variant in variants:
+                data = images[variant]
+
+                def call(data=data):
+                    response = client.post("/api/predict", data={
+                        "image": (io.BytesIO(data), "bench.jpg"),
+                        "fruit": "apple"
+                    })
+                    if response.status_code != 200:
+                        raise RuntimeError(f"/api/predict returned {response.status_code}: {response.get_data(as_text=True)}")
+
+                record("api_predict", variant, call)
+
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print throughput / p95 changes against a baseline run; returns the regressions."""
+    base = {(r["bench"], r["variant"], r["concurrency"]): r for r in baseline["results"]}
+    regressions = []
+
+    print(f"\n{'benchmark':<24} {'variant':<16} {'c':>3}  {'throughput':>12}  {'p95':>10}")
+    for row in results:
+        key = (row["bench"], row["variant"], row["concurrency"])
+        old = base.get(key)
+        if old is None or not old["throughput"] or not old["p95_ms"]:
+            continue
+        tput = row["throughput"] / old["throughput"] - 1
+        p95 = row["p95_ms"] / old["p95_ms"] - 1
+        flag = ""
+        if tput < -threshold or p95 > threshold:
+            flag = "  REGRESSION"
+            regressions.append(key)
+        print(f"{key[0]:<24} {key[1]:<16} {key[2]:>3}  {tput:>+11.1%}  {p95:>+9.1%}{flag}")
+
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-o", "--output", default="bench_results.json")
+    parser.add_argument("--only", default=",".join(BENCHMARKS),
+                        help="comma-separated subset of: " + ", ".join(BENCHMARKS))
+    parser.add_argument("--concurrency", default="1,4,16,64")
+    parser.add_argument("--calls", type=int, default=200, help="timed calls per benchmark and concurrency level")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cache", action="store_true", help="keep the API result cache enabled")
+    parser.add_argument("--compare", default=None, help="baseline JSON from an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="relative throughput drop / p95 rise reported as a regression")
+    args = parser.parse_args()
+
+    args.only = [b.strip() for b in args.only.split(",") if b.strip()]
+    unknown = set(args.only) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(sorted(unknown))}")
+    args.concurrency = [int(c) for c in args.concurrency.split(",")]
+
+    results = run_benchmarks(args)
+    report = {
+        "environment": environment(),
+        "config": {
+            "calls": args.calls, "warmup": args.warmup, "seed": args.seed,
+            "concurrency": args.concurrency, "cache": args.cache
+        },
+        "results": results
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+            sys.exit(1)
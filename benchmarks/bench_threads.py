@@ -0,0 +1,147 @@
+import argparse
+import json
+import multiprocessing as mp
+import os
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from bench_inference import BACKEND_DIR, ROOT, environment, synthetic_image
+
+# Throughput of N worker processes sharing the machine, each running
+# decode + preprocess + model.predict in a loop, with:
+#
+#   default   TensorFlow / OpenCV thread pools left at their defaults
+#             (one thread per visible core in every process)
+#   budgeted  pools sized by runtime_config.thread_settings(workers=N)
+#
+#   python benchmarks/bench_threads.py --workers 1,2,4,8 --duration 20
+#
+# Each worker runs --threads request threads, like GUNICORN_THREADS. The
+# model comes from MODEL_BACKEND / MODEL_PATH / TFLITE_MODEL_PATH /
+# SAVEDMODEL_PATH, as for the backend.
+
+MODES = ("default", "budgeted")
+
+
+def load_model(settings):
+    from model_backend import load_model_backend
+    from runtime_config import configure_opencv, configure_tensorflow
+
+    backend = os.environ.get("MODEL_BACKEND", "keras")
+    if settings is not None:
+        configure_opencv(settings)
+        if backend in ("keras", "savedmodel"):
+            configure_tensorflow(settings)
+    return load_model_backend(
+        backend,
+        os.environ.get("MODEL_PATH", os.path.join(ROOT, "model.h5")),
+        os.environ.get("TFLITE_MODEL_PATH", os.path.join(ROOT, "model.tflite")),
+        os.environ.get("SAVEDMODEL_PATH", os.path.join(ROOT, "model_savedmodel")),
+        num_threads=settings["intra_op"] if settings is not None else None
+    )
+
+
+def worker(mode, workers, threads, duration, image, barrier, results):
+    from runtime_config import thread_settings
+    from utils import preprocess_image_bytes
+
+    settings = thread_settings(workers=workers) if mode == "budgeted" else None
+    model = load_model(settings)
+    for _ in range(3):
+        model.predict(preprocess_image_bytes(image), verbose=0)
+
+    latencies = []
+    lock = threading.Lock()
+
+    def run(deadline):
+        local = []
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            model.predict(preprocess_image_bytes(image), verbose=0)
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    barrier.wait()
+    deadline = time.perf_counter() + duration
+    pool = [threading.Thread(target=run, args=(deadline,)) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    results.put(latencies)
+
+
+def run_case(mode, workers, args, image):
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+    procs = [
+        ctx.Process(target=worker, args=(mode, workers, args.threads, args.duration, image, barrier, results))
+        for _ in range(workers)
+    ]
+    for p in procs:
+        p.start()
+    latencies = []
+    for _ in procs:
+        latencies.extend(results.get())
+    for p in procs:
+        p.join()
+
+    ms = np.array(latencies) * 1000
+    return {
+        "mode": mode,
+        "workers": workers,
+        "threads": args.threads,
+        "calls": len(ms),
+        "throughput": round(len(ms) / args.duration, 2),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3) if len(ms) else None,
+        "p95_ms": round(float(np.percentile(ms, 95)), 3) if len(ms) else None
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-o", "--output", default="bench_threads.json")
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--threads", type=int, default=4, help="request threads per worker")
+    parser.add_argument("--duration", type=float, default=20, help="seconds per case")
+    parser.add_argument("--resolution", default="1920x1080")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    sys.path.insert(0, BACKEND_DIR)
+    from runtime_config import available_cpus, cgroup_cpu_quota
+
+    width, height = (int(v) for v in args.resolution.split("x"))
+    image = cv2.imencode(".jpg", synthetic_image(width, height, args.seed))[1].tobytes()
+
+    print(f"CPU budget: {available_cpus()} cores (cgroup quota: {cgroup_cpu_quota()})")
+    results = []
+    for workers in [int(w) for w in args.workers.split(",")]:
+        for mode in MODES:
+            row = run_case(mode, workers, args, image)
+            results.append(row)
+            print(f"  workers={workers:<3} {mode:<9} {row['throughput']:>9.1f}/s  "
+                  f"p50 {row['p50_ms']} ms  p95 {row['p95_ms']} ms")
+
+    print(f"\n{'workers':>7}  {'default':>10}  {'budgeted':>10}  {'change':>8}")
+    by_case = {(r["workers"], r["mode"]): r for r in results}
+    for workers in sorted({r["workers"] for r in results}):
+        base, tuned = by_case[(workers, "default")], by_case[(workers, "budgeted")]
+        change = tuned["throughput"] / base["throughput"] - 1 if base["throughput"] else float("nan")
+        print(f"{workers:>7}  {base['throughput']:>9.1f}/s  {tuned['throughput']:>9.1f}/s  {change:>+7.1%}")
+
+    report = {
+        "environment": environment(),
+        "config": {"threads": args.threads, "duration": args.duration, "resolution": args.resolution},
+        "cpu_budget": available_cpus(),
+        "results": results
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
@@ -0,0 +1,281 @@
+import argparse
+import csv
+import glob
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import numpy as np
+from tensorflow.keras.models import load_model
+
+from utils import preprocess_image
+from vector_decay import FRUIT_IDS, compute_all_decay_vec, round2
+
+# Score many images in one process (predict.py loads the model per image).
+#
+#   python bulk_predict.py photos/ --fruit apple -o results.csv
+#   python bulk_predict.py "shop/**/*.jpg" --fruit banana -o results.jsonl
+#   python bulk_predict.py manifest.csv -o results.parquet
+#
+# Inputs are directories (scanned recursively), glob patterns, or manifest
+# files: .txt with one path per line, or .csv with an "image" (or "path")
+# column and optional "fruit" and "upload_date" columns. Manifest paths are
+# relative to the manifest. Images are decoded on a thread pool straight into
+# a reusable batch buffer while the previous batch is being predicted.
+#
+# Rerunning with the same output resumes: images already in the output
+# (including ones that failed) are skipped. Parquet output is journaled to
+# <output>.partial.jsonl and converted when the run completes.
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+COLUMNS = [
+    "image", "fruit", "upload_date", "initial_freshness",
+    "ideal_final", "room_final", "humid_final",
+    "ideal_days_left", "room_days_left", "humid_days_left",
+    "status", "error"
+]
+
+
+def read_manifest(path, default_fruit, default_date):
+    base = os.path.dirname(path)
+    with open(path, newline="") as f:
+        if path.lower().endswith(".csv"):
+            for row in csv.DictReader(f):
+                image = row.get("image") or row.get("path")
+                if image:
+                    yield (os.path.join(base, image),
+                           row.get("fruit") or default_fruit,
+                           row.get("upload_date") or default_date)
+        else:
+            for line in f:
+                if line.strip():
+                    yield os.path.join(base, line.strip()), default_fruit, default_date
+
+
+def collect_inputs(sources, default_fruit, default_date):
+    """Expand directories, globs and manifests into (path, fruit, upload_date) tuples."""
+    items, seen = [], set()
+
+    def add(path, fruit, upload_date):
+        if path not in seen:
+            seen.add(path)
+            items.append((path, fruit, upload_date))
+
+    for source in sources:
+        if os.path.isdir(source):
+            for root, dirs, files in os.walk(source):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith(IMAGE_EXTS):
+                        add(os.path.join(root, name), default_fruit, default_date)
+        elif os.path.isfile(source) and source.lower().endswith((".csv", ".txt")):
+            for item in read_manifest(source, default_fruit, default_date):
+                add(*item)
+        else:
+            for path in sorted(glob.glob(source, recursive=True)):
+                if os.path.isfile(path):
+                    add(path, default_fruit, default_date)
+
+    return items
+
+
+def truncate_partial_line(path):
+    """Drop a half-written last line left by an interrupted run."""
+    with open(path, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+
+
+def completed_images(path, fmt):
+    """Images already present in an earlier (possibly interrupted) output."""
+    if not os.path.exists(path):
+        return set()
+    truncate_partial_line(path)
+    with open(path, newline="") as f:
+        if fmt == "csv":
+            return {row["image"] for row in csv.DictReader(f)}
+        return {json.loads(line)["image"] for line in f if line.strip()}
+
+
+class ResultWriter:
+    """Appends result rows as CSV or JSON lines, flushing after every batch."""
+
+    def __init__(self, path, fmt):
+        self.fmt = fmt
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, "a", newline="")
+        if fmt == "csv":
+            self.writer = csv.DictWriter(self.file, fieldnames=COLUMNS)
+            if new:
+                self.writer.writeheader()
+
+    def write(self, rows):
+        for row in rows:
+            if self.fmt == "csv":
+                self.writer.writerow(row)
+            else:
+                self.file.write(json.dumps(row) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def load(path, out):
+    """Preprocess one image into its batch slot; returns the error, if any."""
+    try:
+        preprocess_image(path, out=out)
+    except Exception as e:
+        return e
+
+
+def valid_date(value):
+    try:
+        np.datetime64(value, "D")
+        return True
+    except ValueError:
+        return False
+
+
+def status_for(room_final):
+    return (
+        "FRESH" if room_final > 70 else
+        "CONSUME SOON" if room_final > 40 else
+        "SPOILED"
+    )
+
+
+def score_batch(model, items, errors, buf, today):
+    """Predict one batch (decoded into `buf`); returns a result row per item."""
+    rows = [dict.fromkeys(COLUMNS) for _ in items]
+    good = []
+    for i, ((path, fruit, upload_date), error) in enumerate(zip(items, errors)):
+        rows[i].update(image=path, fruit=fruit, upload_date=str(upload_date))
+        if error is not None:
+            rows[i]["error"] = str(error)
+        elif fruit not in FRUIT_IDS:
+            rows[i]["error"] = f"Unsupported item: {fruit}"
+        elif not valid_date(upload_date):
+            rows[i]["error"] = f"Invalid upload date: {upload_date}"
+        else:
+            good.append(i)
+
+    if not good:
+        return rows
+
+    batch = buf[:len(items)] if len(good) == len(items) else buf[good]
+    preds = model.predict(batch, verbose=0)[:, 0]
+    initial = np.clip(round2(preds), 0, 100)
+    decay = compute_all_decay_vec(
+        initial,
+        [items[i][1] for i in good],
+        [items[i][2] for i in good],
+        today=today
+    )
+
+    for j, i in enumerate(good):
+        rows[i]["initial_freshness"] = float(initial[j])
+        for key in COLUMNS[4:10]:
+            rows[i][key] = float(decay[key][j])
+        rows[i]["status"] = status_for(decay["room_final"][j])
+
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("inputs", nargs="+", help="directories, glob patterns or manifest files")
+    parser.add_argument("-o", "--output", default="results.csv", help=".csv, .jsonl or .parquet")
+    parser.add_argument("--fruit", default=None, help="fruit for inputs without a manifest fruit column")
+    parser.add_argument("--upload-date", default=date.today().isoformat())
+    parser.add_argument("--model", default="../model.h5")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="image decode threads")
+    args = parser.parse_args()
+
+    ext = os.path.splitext(args.output)[1].lower()
+    if ext not in (".csv", ".jsonl", ".parquet"):
+        raise SystemExit("Output must end in .csv, .jsonl or .parquet")
+    fmt = "csv" if ext == ".csv" else "jsonl"
+    journal = args.output + ".partial.jsonl" if ext == ".parquet" else args.output
+
+    if ext == ".parquet":
+        # Fail before scoring rather than after, if no Parquet engine is installed
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            try:
+                import fastparquet  # noqa: F401
+            except ImportError:
+                raise SystemExit("Parquet output needs pyarrow (pip install pyarrow)")
+
+    if ext == ".parquet" and os.path.exists(args.output) and not os.path.exists(journal):
+        # Resuming after a finished Parquet run: continue from its rows
+        import pandas as pd
+        pd.read_parquet(args.output).to_json(journal, orient="records", lines=True)
+
+    default_fruit = args.fruit.lower() if args.fruit else None
+    items = [
+        (path, (fruit or "").lower(), upload_date)
+        for path, fruit, upload_date in collect_inputs(args.inputs, default_fruit, args.upload_date)
+    ]
+    done = completed_images(journal, fmt)
+    todo = [item for item in items if item[0] not in done]
+    print(f"{len(items)} images found, {len(items) - len(todo)} already scored, {len(todo)} to go")
+
+    writer = ResultWriter(journal, fmt)
+    today = date.today()
+    scored = failed = 0
+    decode_wait = predict_time = 0.0
+    start_time = time.perf_counter()
+
+    if todo:
+        model = load_model(args.model)
+        batches = [todo[i:i + args.batch_size] for i in range(0, len(todo), args.batch_size)]
+
+        # Two reusable input buffers: batch n+1 is decoded into one while
+        # batch n is on the model
+        buffers = [np.empty((args.batch_size, 224, 224, 3), dtype=np.float32) for _ in range(2)]
+
+        def submit(pool, n):
+            return [pool.submit(load, path, buffers[n % 2][i]) for i, (path, _, _) in enumerate(batches[n])]
+
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            pending = submit(pool, 0)
+            for n, batch in enumerate(batches):
+                t0 = time.perf_counter()
+                errors = [f.result() for f in pending]
+                decode_wait += time.perf_counter() - t0
+                if n + 1 < len(batches):
+                    pending = submit(pool, n + 1)
+
+                t0 = time.perf_counter()
+                rows = score_batch(model, batch, errors, buffers[n % 2], today)
+                predict_time += time.perf_counter() - t0
+
+                writer.write(rows)
+                failed += sum(row["error"] is not None for row in rows)
+                scored += len(rows)
+                elapsed = time.perf_counter() - start_time
+                print(f"  {scored}/{len(todo)}  {scored / elapsed:.1f} images/s", end="\r")
+
+    writer.close()
+    elapsed = time.perf_counter() - start_time
+
+    if ext == ".parquet":
+        import pandas as pd
+        with open(journal) as f:
+            results = pd.DataFrame([json.loads(line) for line in f if line.strip()], columns=COLUMNS)
+        results.to_parquet(args.output, index=False)
+        os.remove(journal)
+
+    print("\n--- BULK SCORING REPORT ---")
+    print(f"Scored: {scored - failed}   Failed: {failed}   Skipped (resumed): {len(items) - len(todo)}")
+    if scored:
+        print(f"Throughput: {scored / elapsed:.1f} images/s ({elapsed:.1f}s total)")
+        print(f"Waiting on decode: {decode_wait:.1f}s   Model + decay: {predict_time:.1f}s")
+    print(f"Results written to {args.output}")
@@ -0,0 +1,122 @@
+import argparse
+import os
+import time
+
+import cv2
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.models import load_model
+
+from label_store import label_source, load_labels
+
+# Convert model.h5 into a quantized TFLite model for the serving backends
+# (MODEL_BACKEND=tflite) and report accuracy drift against the Keras model
+# on a held-out slice of the labels.
+#
+#   python convert_tflite.py --quantize int8
+#   python convert_tflite.py --quantize float16 --output ../model_fp16.tflite
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--model", default="../model.h5")
+parser.add_argument("--output", default="../model.tflite")
+parser.add_argument("--quantize", choices=["int8", "float16", "none"], default="int8")
+parser.add_argument("--labels", default=None,
+                    help="label store or CSV (default: ../labels_store unless ../labels.csv is newer)")
+parser.add_argument("--dataset", default="../dataset")
+parser.add_argument("--calib-samples", type=int, default=200,
+                    help="images used to calibrate int8 activation ranges")
+parser.add_argument("--eval-samples", type=int, default=500,
+                    help="held-out images used to measure drift (disjoint from calibration)")
+parser.add_argument("--seed", type=int, default=42)
+args = parser.parse_args()
+
+
+def load_image(path):
+    # Same preprocessing as the Flask backends (RGB, 224x224, [0, 1]);
+    # None (with a warning) for files OpenCV can't read
+    img = cv2.imread(path)
+    if img is None:
+        print(f"⚠️ Skipping unreadable image: {path}")
+        return None
+    img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    img = cv2.resize(img, (224, 224))
+    return img.astype("float32") / 255.0
+
+
+# Split a shuffled slice of the labels into calibration and evaluation rows,
+# leaving out files generate_labels.py could not read
+df = load_labels(args.labels or label_source(), args.dataset)
+if "width" in df:
+    df = df[df["width"] > 0]
+df = df.sample(frac=1.0, random_state=args.seed).reset_index(drop=True)
+calib_df = df.iloc[:args.calib_samples]
+eval_df = df.iloc[args.calib_samples:args.calib_samples + args.eval_samples]
+
+model = load_model(args.model)
+
+# Convert
+converter = tf.lite.TFLiteConverter.from_keras_model(model)
+if args.quantize == "float16":
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.target_spec.supported_types = [tf.float16]
+elif args.quantize == "int8":
+    def representative_dataset():
+        for path in calib_df["full_path"]:
+            img = load_image(path)
+            if img is not None:
+                yield [img[np.newaxis]]
+
+    # Full-integer weights and activations; float32 I/O keeps the serving
+    # preprocessing unchanged
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = representative_dataset
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+
+tflite_model = converter.convert()
+with open(args.output, "wb") as f:
+    f.write(tflite_model)
+
+# Drift report on the held-out slice
+interpreter = tf.lite.Interpreter(model_content=tflite_model)
+interpreter.allocate_tensors()
+input_index = interpreter.get_input_details()[0]["index"]
+output_index = interpreter.get_output_details()[0]["index"]
+
+keras_preds, tflite_preds, labels = [], [], []
+keras_time = tflite_time = 0.0
+for path, label in zip(eval_df["full_path"], eval_df["freshness"]):
+    img = load_image(path)
+    if img is None:
+        continue
+    img = img[np.newaxis]
+
+    start = time.perf_counter()
+    keras_preds.append(float(model.predict(img, verbose=0)[0][0]))
+    keras_time += time.perf_counter() - start
+
+    start = time.perf_counter()
+    interpreter.set_tensor(input_index, img)
+    interpreter.invoke()
+    tflite_preds.append(float(interpreter.get_tensor(output_index)[0][0]))
+    tflite_time += time.perf_counter() - start
+
+    labels.append(float(label))
+
+keras_preds = np.array(keras_preds)
+tflite_preds = np.array(tflite_preds)
+labels = np.array(labels)
+drift = np.abs(tflite_preds - keras_preds)
+n = len(labels)
+
+print("\n--- TFLITE CONVERSION REPORT ---")
+print(f"Quantization: {args.quantize}")
+print(f"Keras model:  {os.path.getsize(args.model) / 1e6:.1f} MB ({args.model})")
+print(f"TFLite model: {len(tflite_model) / 1e6:.1f} MB ({args.output})")
+print(f"\nHeld-out images: {n}")
+if n == 0:
+    print("No readable held-out images; drift not measured "
+          "(lower --calib-samples or check the dataset)")
+    raise SystemExit(0)
+print(f"Drift vs Keras   - mean abs: {drift.mean():.3f}  p95: {np.percentile(drift, 95):.3f}  max: {drift.max():.3f}")
+print(f"MAE vs labels    - Keras: {np.abs(keras_preds - labels).mean():.3f}  TFLite: {np.abs(tflite_preds - labels).mean():.3f}")
+print(f"Latency / image  - Keras: {keras_time / n * 1000:.1f} ms  TFLite: {tflite_time / n * 1000:.1f} ms")
@@ -0,0 +1,139 @@
+import math
+import os
+
+import tensorflow as tf
+
+# tf.data input pipeline for train.py.
+#
+# Decoding runs in parallel on the tf.data runtime, decoded 224x224 uint8
+# images can be cached on disk, and augmentation is applied per batch with
+# one projective-transform op. The random transforms follow the
+# ImageDataGenerator settings train.py used before:
+#   rotation_range=20, width/height_shift_range=0.1, zoom_range=0.2,
+#   shear_range=0.1, horizontal_flip=True, brightness_range=[0.7, 1.3],
+#   fill_mode="nearest", rescale=1/255
+
+AUTOTUNE = tf.data.AUTOTUNE
+IMG_SIZE = 224
+
+ROTATION_RANGE = 20          # degrees
+SHIFT_RANGE = 0.1            # fraction of width / height
+ZOOM_RANGE = 0.2
+SHEAR_RANGE = 0.1            # degrees, as in ImageDataGenerator
+BRIGHTNESS_RANGE = (0.7, 1.3)
+
+
+def decode_image(path):
+    """Read and decode a JPEG/PNG/etc. file into a 224x224 RGB uint8 tensor."""
+    data = tf.io.read_file(path)
+    img = tf.io.decode_image(data, channels=3, expand_animations=False)
+    img.set_shape([None, None, 3])
+    # flow_from_dataframe resized with nearest-neighbour interpolation
+    img = tf.image.resize(img, (IMG_SIZE, IMG_SIZE), method="nearest")
+    return tf.cast(img, tf.uint8)
+
+
+def _op_seed(seed, k):
+    """
+    Seed of the k-th random op. Ops sharing a (global, op) seed draw the
+    same stream, so each draw gets its own.
+    """
+    return None if seed is None else seed + k
+
+
+def _affine_transforms(batch_size, seed=None):
+    """
+    Random (rotation, shift, shear, zoom) matrices for a batch, composed and
+    centred the same way ImageDataGenerator.apply_affine_transform does,
+    in the 8-parameter form ImageProjectiveTransformV3 expects.
+    """
+    def uniform(low, high, k):
+        return tf.random.uniform([batch_size], low, high, seed=_op_seed(seed, k))
+
+    theta = uniform(-ROTATION_RANGE, ROTATION_RANGE, 0) * (math.pi / 180)
+    tx = uniform(-SHIFT_RANGE, SHIFT_RANGE, 1) * IMG_SIZE    # rows
+    ty = uniform(-SHIFT_RANGE, SHIFT_RANGE, 2) * IMG_SIZE    # cols
+    shear = uniform(-SHEAR_RANGE, SHEAR_RANGE, 3) * (math.pi / 180)
+    zx = uniform(1 - ZOOM_RANGE, 1 + ZOOM_RANGE, 4)
+    zy = uniform(1 - ZOOM_RANGE, 1 + ZOOM_RANGE, 5)
+
+    zeros = tf.zeros([batch_size])
+    ones = tf.ones([batch_size])
+
+    def matrix(rows):
+        return tf.stack([tf.stack(row, axis=-1) for row in rows], axis=-2)
+
+    # (row, col) homogeneous coordinates, mapping output -> input pixels
+    rotation = matrix([[tf.cos(theta), -tf.sin(theta), zeros],
+                       [tf.sin(theta), tf.cos(theta), zeros],
+                       [zeros, zeros, ones]])
+    shift = matrix([[ones, zeros, tx],
+                    [zeros, ones, ty],
+                    [zeros, zeros, ones]])
+    shear_m = matrix([[ones, -tf.sin(shear), zeros],
+                      [zeros, tf.cos(shear), zeros],
+                      [zeros, zeros, ones]])
+    zoom = matrix([[zx, zeros, zeros],
+                   [zeros, zy, zeros],
+                   [zeros, zeros, ones]])
+
+    o = IMG_SIZE / 2 - 0.5
+    offset = tf.constant([[1, 0, o], [0, 1, o], [0, 0, 1]], tf.float32)
+    reset = tf.constant([[1, 0, -o], [0, 1, -o], [0, 0, 1]], tf.float32)
+    m = offset @ rotation @ shift @ shear_m @ zoom @ reset
+
+    # Swap to the (x=col, y=row) convention of the transform op
+    return tf.stack([m[:, 1, 1], m[:, 1, 0], m[:, 1, 2],
+                     m[:, 0, 1], m[:, 0, 0], m[:, 0, 2],
+                     zeros, zeros], axis=-1)
+
+
+def augment_batch(images, seed=None):
+    """Randomly transform a (B, 224, 224, 3) uint8 batch; returns float32 in [0, 1]."""
+    images = tf.cast(images, tf.float32)
+    batch_size = tf.shape(images)[0]
+
+    images = tf.raw_ops.ImageProjectiveTransformV3(
+        images=images,
+        transforms=_affine_transforms(batch_size, seed),
+        output_shape=[IMG_SIZE, IMG_SIZE],
+        fill_value=0.0,
+        interpolation="BILINEAR",
+        fill_mode="NEAREST"
+    )
+
+    flip = tf.random.uniform([batch_size], seed=_op_seed(seed, 6)) < 0.5
+    images = tf.where(flip[:, None, None, None], tf.reverse(images, axis=[2]), images)
+
+    brightness = tf.random.uniform([batch_size, 1, 1, 1], *BRIGHTNESS_RANGE, seed=_op_seed(seed, 7))
+    images = tf.clip_by_value(images * brightness, 0.0, 255.0)
+
+    return images / 255.0
+
+
+def make_dataset(paths, labels, batch_size=32, augment=True, shuffle=True,
+                 cache_dir=None, seed=None):
+    """
+    Build the training dataset from label-table columns.
+
+    `cache_dir` keeps decoded uint8 images in an on-disk tf.data cache so
+    later epochs skip file reads and decoding entirely (delete it when the
+    label table changes).
+    """
+    ds = tf.data.Dataset.from_tensor_slices((list(paths), tf.constant(labels, tf.float32)))
+    ds = ds.map(lambda p, y: (decode_image(p), y), num_parallel_calls=AUTOTUNE, deterministic=False)
+
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        ds = ds.cache(os.path.join(cache_dir, "decoded"))
+
+    if shuffle:
+        ds = ds.shuffle(min(len(labels), 10_000), seed=seed, reshuffle_each_iteration=True)
+
+    ds = ds.batch(batch_size, num_parallel_calls=AUTOTUNE)
+    if augment:
+        ds = ds.map(lambda x, y: (augment_batch(x, seed), y), num_parallel_calls=AUTOTUNE)
+    else:
+        ds = ds.map(lambda x, y: (tf.cast(x, tf.float32) / 255.0, y), num_parallel_calls=AUTOTUNE)
+
+    return ds.prefetch(AUTOTUNE)
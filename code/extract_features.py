@@ -0,0 +1,135 @@
+import argparse
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from tensorflow.keras.applications import MobileNetV2
+from tensorflow.keras.preprocessing.image import ImageDataGenerator, img_to_array, load_img
+
+from label_store import label_source, load_labels, labels_fingerprint
+
+# Run the frozen MobileNetV2 backbone once per image and cache the pooled
+# 1280-d embeddings in a memory-mapped .npy, one row per readable label
+# row (width > 0). Images that fail to decode keep a zero row and are
+# marked False in valid.npy. train_head.py then trains only the small
+# dense head on these features.
+#
+#   python extract_features.py                 # 1 clean view per image
+#   python extract_features.py --views 4       # + 4 augmented views
+#
+# Extraction is resumable: rerunning continues from the last finished batch
+# as long as the labels and the view count are unchanged.
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--labels", default=None,
+                    help="label store or CSV (default: ../labels_store unless ../labels.csv is newer)")
+parser.add_argument("--dataset", default="../dataset")
+parser.add_argument("--output", default="../features")
+parser.add_argument("--views", type=int, default=0,
+                    help="extra augmented views per image (same settings as train.py)")
+parser.add_argument("--batch-size", type=int, default=64)
+parser.add_argument("--workers", type=int, default=8, help="image decode threads")
+parser.add_argument("--seed", type=int, default=42)
+args = parser.parse_args()
+
+EMBEDDING_DIM = 1280
+
+# Same augmentation as train.py (rescale is applied separately)
+augmenter = ImageDataGenerator(
+    rotation_range=20,
+    width_shift_range=0.1,
+    height_shift_range=0.1,
+    brightness_range=[0.7, 1.3],
+    zoom_range=0.2,
+    shear_range=0.1,
+    horizontal_flip=True,
+    fill_mode="nearest"
+)
+
+
+def load_views(path, row):
+    # Loaded the same way as flow_from_dataframe (PIL, RGB, 224x224);
+    # None for files PIL can't read
+    try:
+        img = img_to_array(load_img(path, target_size=(224, 224)))
+    except OSError as e:
+        print(f"⚠️ Skipping unreadable image: {path} ({e})")
+        return None
+    views = [img]
+    for view in range(args.views):
+        seed = (args.seed * 1_000_003 + row * 31 + view) % (2**32)
+        views.append(augmenter.random_transform(img, seed=seed))
+    return np.stack(views) / 255.0
+
+
+LABELS = args.labels or label_source()
+df = load_labels(LABELS, args.dataset)
+# Skip files generate_labels.py could not read (same rows as train.py)
+if "width" in df:
+    df = df[df["width"] > 0]
+paths = df["full_path"].to_numpy(dtype=str)
+n_rows, n_views = len(df), 1 + args.views
+
+os.makedirs(args.output, exist_ok=True)
+features_path = os.path.join(args.output, "embeddings.npy")
+valid_path = os.path.join(args.output, "valid.npy")
+meta_path = os.path.join(args.output, "meta.json")
+
+meta = {
+    "labels": os.path.abspath(LABELS),
+    "labels_fingerprint": labels_fingerprint(df),
+    "rows": n_rows,
+    "views": n_views,
+    "dim": EMBEDDING_DIM,
+    "completed": 0
+}
+
+# Resume only if the existing store was built from the same labels and views
+if all(os.path.exists(p) for p in (meta_path, features_path, valid_path)):
+    with open(meta_path) as f:
+        previous = json.load(f)
+    if all(previous.get(k) == meta[k] for k in ("labels_fingerprint", "rows", "views", "dim")):
+        meta["completed"] = previous["completed"]
+
+if meta["completed"]:
+    features = np.load(features_path, mmap_mode="r+")
+    valid = np.load(valid_path, mmap_mode="r+")
+else:
+    features = np.lib.format.open_memmap(
+        features_path, mode="w+", dtype=np.float32, shape=(n_rows, n_views, EMBEDDING_DIM)
+    )
+    valid = np.lib.format.open_memmap(valid_path, mode="w+", dtype=np.bool_, shape=(n_rows,))
+
+if meta["completed"] >= n_rows:
+    print(f"Features already up to date: {features_path}")
+    raise SystemExit(0)
+
+backbone = MobileNetV2(weights="imagenet", include_top=False, pooling="avg", input_shape=(224, 224, 3))
+backbone.trainable = False
+
+print(f"Extracting {n_rows - meta['completed']} images x {n_views} view(s)...")
+with ThreadPoolExecutor(max_workers=args.workers) as pool:
+    for start in range(meta["completed"], n_rows, args.batch_size):
+        stop = min(start + args.batch_size, n_rows)
+        views = list(pool.map(load_views, paths[start:stop], range(start, stop)))
+        ok = np.array([v is not None for v in views])
+
+        embeddings = np.zeros((stop - start, n_views, EMBEDDING_DIM), dtype=np.float32)
+        if ok.any():
+            batch = np.concatenate([v for v in views if v is not None])
+            embeddings[ok] = backbone.predict(batch, batch_size=len(batch), verbose=0).reshape(
+                -1, n_views, EMBEDDING_DIM
+            )
+        features[start:stop] = embeddings
+        valid[start:stop] = ok
+        features.flush()
+        valid.flush()
+
+        meta["completed"] = stop
+        with open(meta_path, "w") as f:
+            json.dump(meta, f, indent=2)
+        print(f"  {stop}/{n_rows}", end="\r")
+
+skipped = int(n_rows - np.count_nonzero(valid))
+print(f"\n✅ Embeddings saved to {features_path} ({skipped} unreadable skipped)")
@@ -1,33 +1,150 @@
-import os
+import argparse
 import csv
+import hashlib
+import io
+import json
+import os
 import random
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from label_store import write_label_store
+
+# Build labels.csv from dataset/{Train,Test}/<fresh*|rotten*>/ images.
+#
+# Class folders are indexed in parallel with os.scandir; each folder's rows
+# go to a shard in labels_index/ and are streamed into labels.csv as soon
+# as the folder is done. On later runs only folders whose mtime changed
+# are re-read (a folder's mtime changes when files are added, removed or
+# renamed; use --full after editing files in place). Every row also
+# records the image size (0x0 if unreadable) and a SHA-1 of its bytes so
+# later stages can skip corrupt or duplicate files. The same rows are also
+# written to a columnar label store (see label_store.py) for train.py.
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--root", default="../dataset")
+parser.add_argument("--output", default="../labels.csv")
+parser.add_argument("--index-dir", default="../labels_index")
+parser.add_argument("--store", default="../labels_store", help="columnar label store ('' to skip)")
+parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+parser.add_argument("--full", action="store_true", help="ignore the index and re-read every folder")
+parser.add_argument("--seed", type=int, default=None)
+args = parser.parse_args()
+
+FIELDS = ["image", "category", "freshness", "width", "height", "sha1"]
+STATE_PATH = os.path.join(args.index_dir, "state.json")
+
+random.seed(args.seed)
+
+
+def is_class_folder(folder):
+    # Deliberately not `class_freshness(folder) is not None`: that draws
+    # from the RNG, so with --seed every folder check would shift the
+    # labels drawn for the folders that are re-indexed
+    return folder.startswith(("fresh", "rotten"))
+
+
+def class_freshness(folder):
+    if folder.startswith("fresh"):
+        return random.uniform(85, 100)
+    if folder.startswith("rotten"):
+        return random.uniform(0, 40)
+    return None
+
+
+def describe(data):
+    """(width, height) from the image header, or (0, 0) if it can't be read."""
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            size = img.size
+            img.verify()
+        return size
+    except Exception:
+        return 0, 0
 
-root = "../dataset"
 
-output_rows = []
+def index_folder(split, folder, freshness, shard_path):
+    """Scan one class folder and write its rows to a shard CSV; returns the row count."""
+    class_path = os.path.join(args.root, split, folder)
+    tmp_path = shard_path + ".tmp"
+    count = 0
 
+    with open(tmp_path, "w", newline="") as f, os.scandir(class_path) as entries:
+        writer = csv.writer(f)
+        for entry in sorted(entries, key=lambda e: e.name):
+            if not entry.is_file():
+                continue
+            with open(entry.path, "rb") as img_file:
+                data = img_file.read()
+            width, height = describe(data)
+            writer.writerow([
+                os.path.join(split, folder, entry.name),
+                folder,
+                round(freshness, 2),
+                width,
+                height,
+                hashlib.sha1(data).hexdigest()
+            ])
+            count += 1
+
+    os.replace(tmp_path, shard_path)
+    return count
+
+
+# Previous index (folder key -> mtime, freshness, rows)
+state = {}
+if not args.full and os.path.exists(STATE_PATH):
+    with open(STATE_PATH) as f:
+        state = json.load(f)
+
+# Discover class folders
+folders = []
 for split in ["Train", "Test"]:
-    split_path = os.path.join(root, split)
-
-    for folder in os.listdir(split_path):
-        class_path = os.path.join(split_path, folder)
-        if not os.path.isdir(class_path):
-            continue
-
-        if folder.startswith("fresh"):
-            freshness = random.uniform(85, 100)
-        elif folder.startswith("rotten"):
-            freshness = random.uniform(0, 40)
-        else:
-            continue
-
-        for img in os.listdir(class_path):
-            img_path = os.path.join(split, folder, img)
-            output_rows.append([img_path, folder, round(freshness, 2)])
-
-with open("../labels.csv", "w", newline="") as f:
-    writer = csv.writer(f)
-    writer.writerow(["image", "category", "freshness"])
-    writer.writerows(output_rows)
-
-print("labels.csv created successfully!")
+    with os.scandir(os.path.join(args.root, split)) as entries:
+        for entry in sorted(entries, key=lambda e: e.name):
+            if not entry.is_dir() or not is_class_folder(entry.name):
+                continue
+            key = f"{split}/{entry.name}"
+            shard_path = os.path.join(args.index_dir, split, entry.name + ".csv")
+            mtime = entry.stat().st_mtime_ns
+            previous = state.get(key)
+            fresh = previous is not None and previous["mtime_ns"] == mtime and os.path.exists(shard_path)
+            freshness = previous["freshness"] if previous else class_freshness(entry.name)
+            folders.append((key, split, entry.name, mtime, freshness, shard_path, fresh))
+
+for split in ["Train", "Test"]:
+    os.makedirs(os.path.join(args.index_dir, split), exist_ok=True)
+
+# Index changed folders in parallel, stream shards into labels.csv in order
+changed = sum(not fresh for *_, fresh in folders)
+print(f"{len(folders)} class folders, {changed} to re-index")
+
+new_state = {}
+total_rows = 0
+tmp_output = args.output + ".tmp"
+
+with ThreadPoolExecutor(max_workers=args.workers) as pool, open(tmp_output, "w", newline="") as out:
+    futures = [
+        None if fresh else pool.submit(index_folder, split, folder, freshness, shard_path)
+        for key, split, folder, mtime, freshness, shard_path, fresh in folders
+    ]
+
+    csv.writer(out).writerow(FIELDS)
+    for (key, split, folder, mtime, freshness, shard_path, fresh), future in zip(folders, futures):
+        rows = state[key]["rows"] if fresh else future.result()
+        with open(shard_path, newline="") as shard:
+            shutil.copyfileobj(shard, out)
+        new_state[key] = {"mtime_ns": mtime, "freshness": freshness, "rows": rows}
+        total_rows += rows
+
+os.replace(tmp_output, args.output)
+with open(STATE_PATH, "w") as f:
+    json.dump(new_state, f, indent=2)
+
+print(f"labels.csv created successfully! ({total_rows} rows)")
+
+if args.store:
+    write_label_store(args.output, args.store)
+    print(f"Label store written to {args.store}")
@@ -0,0 +1,159 @@
+import argparse
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Compact columnar replacement for labels.csv.
+#
+# A store is a directory of plain columns that load via memory-map:
+#   image_dir.npy      uint16 codes into meta.json["image_dirs"] ("Train/freshapples")
+#   image_name.bin     UTF-8 file names joined by "\n"
+#   image_offsets.npy  start offset of every name in image_name.bin (+ end)
+#   category.npy       uint8/uint16 codes into meta.json["categories"]
+#   freshness.npy      float32
+#   width.npy, height.npy (int32), sha1.npy (S40) when generate_labels.py
+#   recorded them
+#
+#   python label_store.py ../labels.csv ../labels_store
+
+STORE_VERSION = 1
+
+
+def write_label_store(csv_path, store_dir):
+    """Convert labels.csv into a columnar store; returns the row count."""
+    df = pd.read_csv(csv_path)
+    os.makedirs(store_dir, exist_ok=True)
+
+    # Windows-style separators from older label files -> "/", then split
+    # into a dictionary-encoded directory and a variable-length file name
+    parts = df["image"].str.replace("\\", "/", regex=False).str.rpartition("/")
+    image_dir = parts[0].astype("category")
+    image_dirs = [str(d) for d in image_dir.cat.categories]
+    np.save(os.path.join(store_dir, "image_dir.npy"), image_dir.cat.codes.to_numpy().astype(np.uint16))
+
+    names = [name.encode("utf-8") for name in parts[2]]
+    lengths = np.fromiter((len(name) + 1 for name in names), dtype=np.int64, count=len(names))
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    with open(os.path.join(store_dir, "image_name.bin"), "wb") as f:
+        f.write(b"\n".join(names))
+    np.save(os.path.join(store_dir, "image_offsets.npy"), offsets)
+
+    category = df["category"].astype("category")
+    categories = [str(c) for c in category.cat.categories]
+    code_dtype = np.uint8 if len(categories) <= 256 else np.uint16
+    np.save(os.path.join(store_dir, "category.npy"), category.cat.codes.to_numpy().astype(code_dtype))
+
+    np.save(os.path.join(store_dir, "freshness.npy"), df["freshness"].to_numpy(dtype=np.float32))
+
+    columns = ["image_dir", "image_offsets", "category", "freshness"]
+    for name in ("width", "height"):
+        if name in df:
+            np.save(os.path.join(store_dir, f"{name}.npy"), df[name].to_numpy(dtype=np.int32))
+            columns.append(name)
+    if "sha1" in df:
+        np.save(os.path.join(store_dir, "sha1.npy"), df["sha1"].to_numpy().astype("S40"))
+        columns.append("sha1")
+
+    with open(os.path.join(store_dir, "meta.json"), "w") as f:
+        json.dump({
+            "version": STORE_VERSION,
+            "rows": len(df),
+            "columns": columns,
+            "image_dirs": image_dirs,
+            "categories": categories
+        }, f, indent=2)
+
+    return len(df)
+
+
+def load_label_store(store_dir):
+    """Memory-map every column of a store; returns (columns dict, meta)."""
+    with open(os.path.join(store_dir, "meta.json")) as f:
+        meta = json.load(f)
+    columns = {
+        name: np.load(os.path.join(store_dir, f"{name}.npy"), mmap_mode="r")
+        for name in meta["columns"]
+    }
+    if meta["rows"]:
+        columns["image_name"] = np.memmap(os.path.join(store_dir, "image_name.bin"), dtype=np.uint8, mode="r")
+    else:
+        columns["image_name"] = np.zeros(0, dtype=np.uint8)
+    return columns, meta
+
+
+def image_name(columns, row):
+    """File name of a single row, read straight from the memory-map."""
+    start, end = columns["image_offsets"][row], columns["image_offsets"][row + 1] - 1
+    return bytes(columns["image_name"][start:end]).decode("utf-8")
+
+
+def image_paths(columns, meta, prefix=""):
+    """Vectorized prefix + image_dir + "/" + name for every row (object array of str)."""
+    names = np.array(bytes(columns["image_name"]).decode("utf-8").split("\n"), dtype=object)
+    dirs = np.array([prefix + d + "/" if d else prefix for d in meta["image_dirs"]], dtype=object)
+    if not meta["rows"]:
+        return names[:0]
+    return dirs[columns["image_dir"]] + names
+
+
+def label_source(store_dir="../labels_store", csv_path="../labels.csv"):
+    """
+    The label store, unless labels.csv was changed after it was written (or
+    it doesn't exist); then labels.csv, so a hand-edited CSV is never
+    silently ignored.
+    """
+    meta = os.path.join(store_dir, "meta.json")
+    if not os.path.exists(meta):
+        return csv_path
+    if os.path.exists(csv_path) and os.path.getmtime(csv_path) > os.path.getmtime(meta):
+        print(f"{csv_path} is newer than {store_dir}, using it "
+              f"(rebuild the store with: python label_store.py {csv_path} {store_dir})")
+        return csv_path
+    return store_dir
+
+
+def load_labels(source, dataset_root):
+    """
+    Load labels as a DataFrame with image, category, freshness and full_path.
+
+    `source` is a label store directory or, as a fallback, labels.csv (in
+    which case paths are normalized the same way, still without a per-row
+    Python lambda).
+    """
+    root = dataset_root.rstrip("/\\") + "/"
+
+    if os.path.isdir(source):
+        columns, meta = load_label_store(source)
+        df = pd.DataFrame({
+            "image": image_paths(columns, meta),
+            "category": pd.Categorical.from_codes(columns["category"], meta["categories"]),
+            "freshness": columns["freshness"]
+        })
+        for name in meta["columns"][4:]:
+            df[name] = columns[name]
+        df["full_path"] = root + df["image"]
+        return df
+
+    df = pd.read_csv(source)
+    df["image"] = df["image"].str.replace("\\", "/", regex=False)
+    df["full_path"] = root + df["image"]
+    return df
+
+
+def labels_fingerprint(df):
+    """SHA-1 of the image names and freshness labels, in row order."""
+    rows = pd.util.hash_pandas_object(df[["image", "freshness"]].astype({"image": str}), index=False)
+    return hashlib.sha1(rows.to_numpy().tobytes()).hexdigest()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("labels", nargs="?", default="../labels.csv")
+    parser.add_argument("store", nargs="?", default="../labels_store")
+    args = parser.parse_args()
+
+    rows = write_label_store(args.labels, args.store)
+    print(f"✅ Wrote {rows} rows to {args.store}")
@@ -1,14 +1,26 @@
 import argparse
+import os
+import sys
 from tensorflow.keras.models import load_model
 from utils import preprocess_image
 from decay import compute_all_decay
 from datetime import date
 
+# CPU budgeting is shared with the API (backend/runtime_config.py);
+# appended so this folder's own utils / decay still come first
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from runtime_config import thread_settings, configure_opencv, configure_tensorflow
+
 parser = argparse.ArgumentParser()
 parser.add_argument("image")
 parser.add_argument("fruit")
 args = parser.parse_args()
 
+# Size the thread pools to the CPU budget before TensorFlow starts
+threads = thread_settings()
+configure_opencv(threads)
+configure_tensorflow(threads)
+
 model = load_model("../model.h5")
 
 # Predict Initial Freshness
@@ -0,0 +1,231 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from label_store import label_source, load_labels
+
+# Pre-resized image shards: decode and resize every labelled image once,
+# then train / evaluate straight from uint8 tensors.
+#
+# A shard directory holds
+#   shard-00000.npy ...  uint8 (n, 224, 224, 3) RGB, memory-mapped on read
+#   freshness.npy        float32 label of every sharded row, in shard order
+#   source_row.npy       int32 row of the label table each image came from
+#   meta.json            shard sizes, row counts, label source
+#
+#   python shards.py build                       # ../labels_store -> ../shards
+#   python shards.py eval --model ../model.h5    # MAE over the shards
+#   python train.py --shards ../shards
+#
+# Images are resized the way training always saw them (RGB, nearest
+# neighbour, EXIF orientation ignored). Rows whose image can't be decoded
+# are left out and reported.
+
+IMG_SIZE = 224
+SHARD_VERSION = 1
+
+
+def load_rgb(path):
+    """Decode and resize one image to 224x224 RGB uint8, or None if unreadable."""
+    img = cv2.imread(path, cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION)
+    if img is None:
+        return None
+    img = cv2.resize(img, (IMG_SIZE, IMG_SIZE), interpolation=cv2.INTER_NEAREST_EXACT)
+    return cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+
+
+def build_shards(labels, dataset_root, shard_dir, shard_size=1024, workers=8):
+    """Write shards for every readable row of the label table; returns the row count."""
+    df = load_labels(labels, dataset_root)
+    os.makedirs(shard_dir, exist_ok=True)
+
+    shards, freshness, source_rows, skipped = [], [], [], []
+    paths = df["full_path"].to_numpy(dtype=str)
+    labels_col = df["freshness"].to_numpy(dtype=np.float32)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for start in range(0, len(df), shard_size):
+            stop = min(start + shard_size, len(df))
+            images = list(pool.map(load_rgb, paths[start:stop]))
+            rows = [start + i for i, img in enumerate(images) if img is not None]
+            skipped.extend(paths[start + i] for i, img in enumerate(images) if img is None)
+            if not rows:
+                continue
+
+            name = f"shard-{len(shards):05d}.npy"
+            out = np.lib.format.open_memmap(
+                os.path.join(shard_dir, name), mode="w+", dtype=np.uint8,
+                shape=(len(rows), IMG_SIZE, IMG_SIZE, 3)
+            )
+            for i, row in enumerate(rows):
+                out[i] = images[row - start]
+            out.flush()
+            del out
+
+            shards.append({"file": name, "rows": len(rows)})
+            freshness.append(labels_col[rows])
+            source_rows.append(np.asarray(rows, dtype=np.int32))
+            print(f"  {stop}/{len(df)}", end="\r")
+
+    np.save(os.path.join(shard_dir, "freshness.npy"),
+            np.concatenate(freshness) if freshness else np.zeros(0, np.float32))
+    np.save(os.path.join(shard_dir, "source_row.npy"),
+            np.concatenate(source_rows) if source_rows else np.zeros(0, np.int32))
+
+    total = sum(s["rows"] for s in shards)
+    with open(os.path.join(shard_dir, "meta.json"), "w") as f:
+        json.dump({
+            "version": SHARD_VERSION,
+            "labels": os.path.abspath(labels),
+            "label_rows": len(df),
+            "rows": total,
+            "image_size": IMG_SIZE,
+            "shards": shards,
+            "skipped": skipped
+        }, f, indent=2)
+
+    return total
+
+
+class ShardReader:
+    """Memory-mapped view over a shard directory."""
+
+    def __init__(self, shard_dir):
+        with open(os.path.join(shard_dir, "meta.json")) as f:
+            self.meta = json.load(f)
+        self.shards = [
+            np.load(os.path.join(shard_dir, s["file"]), mmap_mode="r")
+            for s in self.meta["shards"]
+        ]
+        self.freshness = np.load(os.path.join(shard_dir, "freshness.npy"))
+        self.source_row = np.load(os.path.join(shard_dir, "source_row.npy"))
+        # Global row -> (shard, offset)
+        self.starts = np.cumsum([0] + [len(s) for s in self.shards])
+
+    def __len__(self):
+        return int(self.starts[-1])
+
+    def take(self, rows):
+        """uint8 images for the given global rows (sorted rows read sequentially)."""
+        rows = np.asarray(rows)
+        out = np.empty((len(rows), IMG_SIZE, IMG_SIZE, 3), dtype=np.uint8)
+        shard_ids = np.searchsorted(self.starts, rows, side="right") - 1
+        for shard_id in np.unique(shard_ids):
+            mask = shard_ids == shard_id
+            out[mask] = self.shards[shard_id][rows[mask] - self.starts[shard_id]]
+        return out
+
+    def batches(self, batch_size, shuffle=False, seed=None, block_size=64, buffer_blocks=16):
+        """
+        Yield (uint8 images, float32 labels), in file order or shuffled.
+
+        Shuffling is two-level so reads stay sequential: the order of
+        `block_size`-row blocks (~10 MB contiguous each) is permuted, then rows
+        are shuffled within a buffer of `buffer_blocks` blocks. A batch is a
+        random sample of its buffer, not of the whole shard set.
+        """
+        if not shuffle:
+            for start in range(0, len(self), batch_size):
+                rows = np.arange(start, min(start + batch_size, len(self)))
+                yield self.take(rows), self.freshness[rows]
+            return
+
+        rng = np.random.default_rng(seed)
+        blocks = rng.permutation(-(-len(self) // block_size))
+        images = np.empty((0, IMG_SIZE, IMG_SIZE, 3), dtype=np.uint8)
+        labels = np.empty(0, dtype=np.float32)
+        for i in range(0, len(blocks), buffer_blocks):
+            rows = np.concatenate([
+                np.arange(b * block_size, min((b + 1) * block_size, len(self)))
+                for b in np.sort(blocks[i:i + buffer_blocks])
+            ])
+            perm = rng.permutation(len(rows))
+            # Rows left over from the previous buffer go first
+            images = np.concatenate([images, self.take(rows)[perm]])
+            labels = np.concatenate([labels, self.freshness[rows][perm]])
+            usable = len(labels) - len(labels) % batch_size
+            for start in range(0, usable, batch_size):
+                yield images[start:start + batch_size], labels[start:start + batch_size]
+            images, labels = images[usable:], labels[usable:]
+        if len(labels):
+            yield images, labels
+
+    def dataset(self, batch_size=32, augment=True, shuffle=True, seed=None):
+        """tf.data pipeline over the shards, with the same augmentation as data_pipeline.py."""
+        import tensorflow as tf
+        from data_pipeline import AUTOTUNE, augment_batch
+
+        epoch = [0]
+
+        def generate():
+            epoch_seed = None if seed is None else seed + epoch[0]
+            epoch[0] += 1
+            yield from self.batches(batch_size, shuffle=shuffle, seed=epoch_seed)
+
+        ds = tf.data.Dataset.from_generator(generate, output_signature=(
+            tf.TensorSpec((None, IMG_SIZE, IMG_SIZE, 3), tf.uint8),
+            tf.TensorSpec((None,), tf.float32)
+        ))
+        if augment:
+            ds = ds.map(lambda x, y: (augment_batch(x, seed), y), num_parallel_calls=AUTOTUNE)
+        else:
+            ds = ds.map(lambda x, y: (tf.cast(x, tf.float32) / 255.0, y), num_parallel_calls=AUTOTUNE)
+        return ds.prefetch(AUTOTUNE)
+
+
+def evaluate(shard_dir, model_path, batch_size=64):
+    """Predict every sharded image; returns (MAE, RMSE, images/s)."""
+    from tensorflow.keras.models import load_model
+
+    reader = ShardReader(shard_dir)
+    model = load_model(model_path)
+
+    errors = np.empty(len(reader), dtype=np.float32)
+    start_time = time.perf_counter()
+    done = 0
+    for images, labels in reader.batches(batch_size):
+        preds = model.predict(images.astype(np.float32) / 255.0, verbose=0)[:, 0]
+        errors[done:done + len(labels)] = np.clip(preds, 0, 100) - labels
+        done += len(labels)
+        print(f"  {done}/{len(reader)}", end="\r")
+    elapsed = time.perf_counter() - start_time
+
+    return (float(np.mean(np.abs(errors))), float(np.sqrt(np.mean(errors ** 2))),
+            len(reader) / elapsed if elapsed else 0.0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="write shards from the label table")
+    build.add_argument("--labels", default=None,
+                       help="label store or CSV (default: ../labels_store unless ../labels.csv is newer)")
+    build.add_argument("--dataset", default="../dataset")
+    build.add_argument("--output", default="../shards")
+    build.add_argument("--shard-size", type=int, default=1024, help="images per shard (~150 KB each)")
+    build.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+
+    ev = commands.add_parser("eval", help="MAE of a model over the shards")
+    ev.add_argument("--shards", default="../shards")
+    ev.add_argument("--model", default="../model.h5")
+    ev.add_argument("--batch-size", type=int, default=64)
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        rows = build_shards(args.labels or label_source(), args.dataset, args.output, args.shard_size, args.workers)
+        with open(os.path.join(args.output, "meta.json")) as f:
+            skipped = len(json.load(f)["skipped"])
+        print(f"\n✅ Wrote {rows} images to {args.output} ({skipped} unreadable skipped)")
+    else:
+        mae, rmse, rate = evaluate(args.shards, args.model, args.batch_size)
+        print("\n--- SHARD EVALUATION ---")
+        print(f"MAE:  {mae:.2f}")
+        print(f"RMSE: {rmse:.2f}")
+        print(f"Throughput: {rate:.1f} images/s")
@@ -1,39 +1,50 @@
-import pandas as pd
 import tensorflow as tf
 from tensorflow.keras.applications import MobileNetV2
 from tensorflow.keras.layers import Dense, GlobalAveragePooling2D
 from tensorflow.keras.models import Model
-from tensorflow.keras.preprocessing.image import ImageDataGenerator
-import os
-
-# Load labels
-df = pd.read_csv("../labels.csv")
-
-# Add full image path
-df["full_path"] = df["image"].apply(lambda x: os.path.join("../dataset", x))
-
-# Data augmentation (TRAIN ONLY)
-datagen = ImageDataGenerator(
-    rescale=1./255,
-    rotation_range=20,
-    width_shift_range=0.1,
-    height_shift_range=0.1,
-    brightness_range=[0.7, 1.3],
-    zoom_range=0.2,
-    shear_range=0.1,
-    horizontal_flip=True,
-    fill_mode="nearest"
-)
+import argparse
 
-# Generator
-train_generator = datagen.flow_from_dataframe(
-    dataframe=df,
-    x_col="full_path",
-    y_col="freshness",
-    target_size=(224, 224),
-    batch_size=4,          # 🔴 VERY IMPORTANT (LOW MEMORY)
-    class_mode="raw"
-)
+from label_store import label_source, load_labels
+from data_pipeline import make_dataset
+from shards import ShardReader
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--batch-size", type=int, default=32)
+parser.add_argument("--epochs", type=int, default=15)
+parser.add_argument("--cache", default=None,
+                    help="directory for an on-disk cache of decoded images (delete after relabelling)")
+parser.add_argument("--shards", default=None,
+                    help="train from pre-resized shards written by shards.py build")
+parser.add_argument("--seed", type=int, default=None)
+parser.add_argument("--labels", default=None,
+                    help="label store or CSV (default: ../labels_store unless ../labels.csv is newer)")
+args = parser.parse_args()
+
+if args.shards:
+    # Pre-resized uint8 shards: no per-image decode, sequential reads
+    train_ds = ShardReader(args.shards).dataset(
+        batch_size=args.batch_size,
+        augment=True,
+        seed=args.seed
+    )
+else:
+    # Load labels (columnar store from generate_labels.py, else labels.csv)
+    LABELS = args.labels or label_source()
+    df = load_labels(LABELS, "../dataset")
+
+    # Skip files generate_labels.py could not read (one bad file would abort the epoch)
+    if "width" in df:
+        df = df[df["width"] > 0]
+
+    # Input pipeline: parallel decode, optional cache, batched augmentation (TRAIN ONLY), prefetch
+    train_ds = make_dataset(
+        df["full_path"].to_numpy(dtype=str),
+        df["freshness"].to_numpy(dtype="float32"),
+        batch_size=args.batch_size,
+        augment=True,
+        cache_dir=args.cache,
+        seed=args.seed
+    )
 
 # Model
 base = MobileNetV2(weights="imagenet", include_top=False)
@@ -48,8 +59,8 @@ model.compile(optimizer="adam", loss="mse")
 
 # Train
 model.fit(
-    train_generator,
-    epochs=15
+    train_ds,
+    epochs=args.epochs
 )
 
 model.save("../model.h5")
@@ -0,0 +1,65 @@
+import argparse
+import json
+import os
+
+import numpy as np
+from tensorflow.keras.applications import MobileNetV2
+from tensorflow.keras.layers import Dense, GlobalAveragePooling2D, Input
+from tensorflow.keras.models import Model
+
+from label_store import label_source, load_labels, labels_fingerprint
+
+# Train only the dense head on embeddings cached by extract_features.py,
+# then attach it to the frozen MobileNetV2 base and save model.h5 with the
+# same architecture train.py produces (so the backends load it unchanged).
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--labels", default=None,
+                    help="label store or CSV (default: ../labels_store unless ../labels.csv is newer)")
+parser.add_argument("--features", default="../features")
+parser.add_argument("--output", default="../model.h5")
+parser.add_argument("--epochs", type=int, default=15)
+parser.add_argument("--batch-size", type=int, default=256)
+args = parser.parse_args()
+
+with open(os.path.join(args.features, "meta.json")) as f:
+    meta = json.load(f)
+
+# The same rows extract_features.py embedded
+df = load_labels(args.labels or label_source(), "../dataset")
+if "width" in df:
+    df = df[df["width"] > 0]
+if meta.get("labels_fingerprint") != labels_fingerprint(df) or meta["completed"] < meta["rows"]:
+    raise SystemExit("Feature store is stale or incomplete, rerun extract_features.py")
+
+# (rows, views, dim) memory-mapped; every view of a row shares its label.
+# Rows whose image failed to decode are left out
+features = np.load(os.path.join(args.features, "embeddings.npy"), mmap_mode="r")
+valid = np.load(os.path.join(args.features, "valid.npy"))
+labels = df["freshness"].to_numpy(dtype=np.float32)
+if not valid.all():
+    features, labels = features[valid], labels[valid]
+n_rows, n_views, dim = features.shape
+x = features.reshape(n_rows * n_views, dim)
+y = np.repeat(labels, n_views)
+
+# Head (same layers as train.py)
+hidden = Dense(128, activation="relu")
+output = Dense(1)
+
+inputs = Input(shape=(dim,))
+head = Model(inputs=inputs, outputs=output(hidden(inputs)))
+head.compile(optimizer="adam", loss="mse")
+
+head.fit(x, y, epochs=args.epochs, batch_size=args.batch_size, shuffle=True)
+
+# Attach the trained head to the frozen base
+base = MobileNetV2(weights="imagenet", include_top=False)
+base.trainable = False
+
+pooled = GlobalAveragePooling2D()(base.output)
+model = Model(inputs=base.input, outputs=output(hidden(pooled)))
+model.compile(optimizer="adam", loss="mse")
+
+model.save(args.output)
+print(f"✅ Head trained on cached features and saved as {args.output}")
@@ -1,15 +1,32 @@
 import cv2
 import numpy as np
 
-def preprocess_image(path):
-    img = cv2.imread(path)
+IMG_SIZE = 224
+
+_SCALE = np.float32(255.0)
+
+def read_image(path):
+    """Decode an image file to BGR, or None."""
+    try:
+        buf = np.fromfile(path, dtype=np.uint8)
+    except OSError:
+        return None
+    if not buf.size:
+        return None
+    return cv2.imdecode(buf, cv2.IMREAD_COLOR)
+
+def preprocess_image(path, out=None):
+    img = read_image(path)
     if img is None:
         raise ValueError(f"Image not found: {path}")
 
     img = cv2.resize(img, (224, 224))
-    img = img.astype("float32") / 255.0
 
-    # 🔴 THIS LINE IS CRITICAL
-    img = np.expand_dims(img, axis=0)
+    # 🔴 THIS LINE IS CRITICAL (batch dimension; `out` may also be one row
+    # of a preallocated batch)
+    if out is None:
+        out = np.empty((1, 224, 224, 3), dtype=np.float32)
+
+    np.divide(img, _SCALE, out=out, dtype=np.float32)
 
-    return img
+    return out
@@ -0,0 +1,74 @@
+from datetime import date
+import numpy as np
+
+from decay import IDEAL_SHELF, ROOM_SHELF, HIGH_HUMIDITY_SHELF
+
+# Fruit ids index into this tuple (and into SHELF_TABLE rows)
+FRUITS = tuple(IDEAL_SHELF)
+FRUIT_IDS = {fruit: i for i, fruit in enumerate(FRUITS)}
+
+# Shelf-life per fruit, columns: ideal, room, humid (days)
+SHELF_TABLE = np.array(
+    [[IDEAL_SHELF[f], ROOM_SHELF[f], HIGH_HUMIDITY_SHELF[f]] for f in FRUITS],
+    dtype=np.float64
+)
+
+def fruit_ids(fruits):
+    """Map an array of fruit names to integer fruit ids."""
+    names, inverse = np.unique(np.char.lower(np.asarray(fruits, dtype=str)), return_inverse=True)
+    unknown = [n for n in names if n not in FRUIT_IDS]
+    if unknown:
+        raise ValueError(f"Unsupported item(s): {', '.join(unknown)}")
+    lookup = np.array([FRUIT_IDS[n] for n in names], dtype=np.intp)
+    return lookup[inverse].reshape(np.shape(fruits))
+
+def round2(x):
+    """
+    np.round(x, 2) that agrees with Python's round(x, 2).
+
+    np.round scales by 100 before rounding, which can flip values sitting
+    right at a .xx5 tie; those few are re-rounded with the builtin.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    out = np.round(x, 2)
+    scaled = x * 100
+    tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if tie.any():
+        out[tie] = [round(v, 2) for v in x[tie].tolist()]
+    return out
+
+def compute_all_decay_vec(initial, fruits, upload_dates, today=None):
+    """
+    Vectorized compute_all_decay over whole inventories.
+
+    `initial` is an array of initial freshness values, `fruits` an array of
+    fruit ids (or names) and `upload_dates` anything NumPy can turn into
+    datetime64[D] (dates, ISO strings). Future upload dates count as
+    zero days passed, as in compute_all_decay. Returns the same keys as
+    compute_all_decay, each holding a NumPy array.
+    """
+    initial = np.asarray(initial, dtype=np.float64)
+    fruits = np.asarray(fruits)
+    if fruits.dtype.kind in "USO":
+        fruits = fruit_ids(fruits)
+
+    today = np.datetime64(today or date.today(), "D")
+    days = (today - np.asarray(upload_dates, dtype="datetime64[D]")).astype(np.int64)
+    days = np.maximum(days, 0)
+    days, initial, fruits = np.broadcast_arrays(days, initial, fruits)
+
+    # (N, 3) shelf lives, one column per storage condition
+    shelf = SHELF_TABLE[fruits]
+    fraction = days[..., None] / shelf
+    final = np.where(fraction >= 1, 0.0, round2(initial[..., None] * (1 - fraction ** 2)))
+    days_left = round2((final / 100) * shelf)
+
+    return {
+        "days_passed": days,
+        "ideal_final": final[..., 0],
+        "room_final": final[..., 1],
+        "humid_final": final[..., 2],
+        "ideal_days_left": days_left[..., 0],
+        "room_days_left": days_left[..., 1],
+        "humid_days_left": days_left[..., 2]
+    }
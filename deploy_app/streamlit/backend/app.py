@@ -1,9 +1,7 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-import os
-import tempfile
 import base64
-from predict_api import predict_freshness
+from predict_api import predict_freshness_bytes
 
 app = Flask(__name__)
 CORS(app)
@@ -33,28 +31,16 @@ def predict():
         if not fruit:
             return jsonify({"error": "No fruit/vegetable type provided"}), 400
         
-        # Handle file upload
+        # Handle file upload (decoded straight from the request stream)
         if 'image' in request.files:
-            image_file = request.files['image']
-            # Save temporarily
-            temp_dir = tempfile.mkdtemp()
-            temp_path = os.path.join(temp_dir, "uploaded_image.jpg")
-            image_file.save(temp_path)
+            image_data = request.files['image'].stream
         else:
             # Handle base64 image
             image_base64 = request.json.get('image_base64')
             image_data = base64.b64decode(image_base64.split(',')[1] if ',' in image_base64 else image_base64)
-            temp_dir = tempfile.mkdtemp()
-            temp_path = os.path.join(temp_dir, "uploaded_image.jpg")
-            with open(temp_path, 'wb') as f:
-                f.write(image_data)
         
         # Get prediction
-        result = predict_freshness(temp_path, fruit.lower())
-        
-        # Cleanup
-        os.remove(temp_path)
-        os.rmdir(temp_dir)
+        result = predict_freshness_bytes(image_data, fruit.lower())
         
         return jsonify(result)
     
@@ -80,18 +66,8 @@ def predict_base64():
         else:
             image_data = base64.b64decode(image_base64)
         
-        # Save temporarily
-        temp_dir = tempfile.mkdtemp()
-        temp_path = os.path.join(temp_dir, "uploaded_image.jpg")
-        with open(temp_path, 'wb') as f:
-            f.write(image_data)
-        
-        # Get prediction
-        result = predict_freshness(temp_path, fruit.lower())
-        
-        # Cleanup
-        os.remove(temp_path)
-        os.rmdir(temp_dir)
+        # Get prediction (decoded in memory)
+        result = predict_freshness_bytes(image_data, fruit.lower())
         
         return jsonify(result)
     
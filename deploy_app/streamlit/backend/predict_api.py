@@ -1,5 +1,5 @@
 from tensorflow.keras.models import load_model
-from utils import preprocess_image
+from utils import image_buffer, preprocess_image, preprocess_image_bytes
 from decay import compute_all_decay
 from datetime import date
 import os
@@ -16,14 +16,24 @@ def get_model():
 
 def predict_freshness(image_path, fruit):
     """
-    Predict freshness of fruit/vegetable from image
+    Predict freshness of fruit/vegetable from an image file on disk
     Returns comprehensive freshness report
     """
+    return _predict(preprocess_image(image_path, out=image_buffer()), fruit)
+
+def predict_freshness_bytes(image_data, fruit):
+    """
+    Predict freshness of fruit/vegetable from encoded image bytes
+    (or a file-like object), decoded in memory without a temp file
+    """
+    return _predict(preprocess_image_bytes(image_data, out=image_buffer()), fruit)
+
+def _predict(img, fruit):
+    """
+    Run the model on a preprocessed image and build the freshness report
+    """
     model = get_model()
     
-    # Preprocess image
-    img = preprocess_image(image_path)
-    
     # Predict initial freshness
     initial = model.predict(img, verbose=0)[0][0]
     initial = max(0, min(round(float(initial), 2), 100))
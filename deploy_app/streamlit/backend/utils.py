@@ -1,28 +1,74 @@
 import cv2
 import numpy as np
+import threading
 
-def preprocess_image(path):
+IMG_SIZE = 224
+
+_SCALE = np.float32(255.0)
+_local = threading.local()
+
+def _decode(buf):
+    """
+    Decode an encoded image buffer to BGR, or None
+    """
+    if not buf.size:
+        return None
+    return cv2.imdecode(buf, cv2.IMREAD_COLOR)
+
+def image_buffer():
+    """
+    Reusable (1, 224, 224, 3) float32 input buffer for the calling thread
+    """
+    buf = getattr(_local, "buf", None)
+    if buf is None:
+        buf = _local.buf = np.empty((1, IMG_SIZE, IMG_SIZE, 3), dtype=np.float32)
+    return buf
+
+def preprocess_into(img, out):
+    """
+    Shared preprocessing for a decoded BGR image, written into `out`
+    ((224, 224, 3) or (1, 224, 224, 3) float32)
+    - Resize to 224x224 first
+    - Convert to RGB and normalize to 0-1 range in a single pass
+    """
+    # Resize to model input size
+    img = cv2.resize(img, (IMG_SIZE, IMG_SIZE))
+
+    # BGR -> RGB and normalize pixel values into the output buffer
+    np.divide(img[..., ::-1], _SCALE, out=out, dtype=np.float32)
+
+    return out
+
+def preprocess_image(path, out=None):
     """
-    Preprocess image for model prediction
-    - Resize to 224x224
-    - Normalize to 0-1 range
-    - Add batch dimension
+    Preprocess image for model prediction from a file on disk
     """
-    img = cv2.imread(path)
-    
+    try:
+        buf = np.fromfile(path, dtype=np.uint8)
+    except OSError:
+        buf = None
+    img = _decode(buf) if buf is not None else None
+
     if img is None:
         raise ValueError(f"Image not found or could not be loaded: {path}")
-    
-    # Convert BGR to RGB
-    img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-    
-    # Resize to model input size
-    img = cv2.resize(img, (224, 224))
-    
-    # Normalize pixel values
-    img = img.astype("float32") / 255.0
-    
-    # Add batch dimension
-    img = np.expand_dims(img, axis=0)
-    
-    return img
\ No newline at end of file
+
+    if out is None:
+        out = np.empty((1, IMG_SIZE, IMG_SIZE, 3), dtype=np.float32)
+    return preprocess_into(img, out)
+
+def preprocess_image_bytes(data, out=None):
+    """
+    Preprocess image for model prediction from encoded bytes
+    (or a file-like object) without touching the disk
+    """
+    if hasattr(data, "read"):
+        data = data.read()
+
+    img = _decode(np.frombuffer(data, dtype=np.uint8))
+
+    if img is None:
+        raise ValueError("Image data could not be decoded")
+
+    if out is None:
+        out = np.empty((1, IMG_SIZE, IMG_SIZE, 3), dtype=np.float32)
+    return preprocess_into(img, out)
@@ -1,6 +1,4 @@
 import streamlit as st
-import requests
-import base64
 import plotly.graph_objects as go
 from PIL import Image
 import io
@@ -422,8 +420,6 @@ st.markdown("""
 # ============================================
 # CONFIGURATION
 # ============================================
-API_URL = "http://localhost:5000"
-
 FRUITS_VEGETABLES = [
     "Apple", "Banana", "Tomato", "Orange",
     "Potato", "Cucumber", "Capsicum", "Okra"
@@ -526,27 +522,17 @@ def create_days_chart(data):
     
     return fig
 
+@st.cache_resource(show_spinner="Loading freshness model...")
+def load_predictor():
+    """Import the inference module and load the model once per process"""
+    import predict_api
+    predict_api.get_model()
+    return predict_api
+
 def predict_freshness(image_bytes, fruit):
-    """Send prediction request to API"""
+    """Run the freshness model in-process on the raw image bytes"""
     try:
-        # Convert to base64
-        image_base64 = base64.b64encode(image_bytes).decode('utf-8')
-        
-        response = requests.post(
-            f"{API_URL}/api/predict/base64",
-            json={
-                "image": image_base64,
-                "fruit": fruit
-            },
-            timeout=30
-        )
-        
-        if response.status_code == 200:
-            return response.json()
-        else:
-            return {"error": response.json().get("error", "Unknown error")}
-    except requests.exceptions.ConnectionError:
-        return {"error": "Cannot connect to API server. Please ensure the backend is running."}
+        return load_predictor().predict_freshness_bytes(image_bytes, fruit.lower())
     except Exception as e:
         return {"error": str(e)}
 
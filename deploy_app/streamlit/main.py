@@ -2,14 +2,20 @@ import threading
 import time
 import sys
 import os
+import streamlit as st
 
-# Make streamlit folder importable
+# Make streamlit folder (and the flat backend modules) importable
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-sys.path.append(BASE_DIR)
+BACKEND_DIR = os.path.join(BASE_DIR, "backend")
+for path in (BASE_DIR, BACKEND_DIR):
+    if path not in sys.path:
+        sys.path.append(path)
 
 # -------------------------------
-# Start Flask backend in background
+# Optional Flask API in background
 # -------------------------------
+# The UI runs inference in-process (frontend/app.py -> predict_api), so the
+# HTTP API is only needed for external clients. Set START_API=1 to serve it.
 def run_flask():
     from backend.app import app
     app.run(
@@ -19,11 +25,17 @@ def run_flask():
         use_reloader=False
     )
 
-flask_thread = threading.Thread(target=run_flask, daemon=True)
-flask_thread.start()
+@st.cache_resource(show_spinner=False)
+def start_api():
+    flask_thread = threading.Thread(target=run_flask, daemon=True)
+    flask_thread.start()
 
-# Give Flask time to boot
-time.sleep(2)
+    # Give Flask time to boot
+    time.sleep(2)
+    return flask_thread
+
+if os.environ.get("START_API") == "1":
+    start_api()
 
 # -------------------------------
 # Start Streamlit frontend
@@ -1,18 +1,37 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, g, request, jsonify, send_from_directory
 from flask_cors import CORS
-from werkzeug.utils import secure_filename
 import os
+import io
+import functools
+import json
+import tempfile
+import time
+import numpy as np
 from datetime import date
-from tensorflow.keras.models import load_model
 
 # ✅ Package-based imports (Docker safe)
-from backend.utils import preprocess_image
+from backend.utils import IMG_SIZE, image_buffer, decode_image_bytes, preprocess_into
+from backend.batcher import InferenceBatcher
+from backend.model_backend import load_model_backend, ModelLoader
+from backend.runtime_config import thread_settings, configure_opencv, configure_tensorflow
+from backend.batch_input import is_archive, iter_archive, fruit_from_path, chunked, ARCHIVE_ERRORS, ArchiveTooLarge
+from backend.jobs import JobStore, JobRunner
+from backend.result_cache import PredictionCache, content_key, perceptual_key
+from backend.metrics import (
+    stage,
+    record_model_status,
+    render as render_metrics,
+    IN_FLIGHT,
+    PREDICTIONS,
+    REQUEST_SECONDS
+)
 from backend.decay import (
     compute_all_decay,
     IDEAL_SHELF,
     ROOM_SHELF,
     HIGH_HUMIDITY_SHELF
 )
+from backend.vector_decay import TRAJECTORY_RESOLUTIONS, freshness_trajectory
 
 # --------------------------------
 # Flask App Configuration
@@ -31,19 +50,95 @@ CORS(app)
 # --------------------------------
 # Upload configuration
 # --------------------------------
-UPLOAD_FOLDER = os.path.join(BASE_DIR, "uploads")
 ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "webp"}
 
-app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
 app.config["MAX_CONTENT_LENGTH"] = 16 * 1024 * 1024
 
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-
 # --------------------------------
 # Load model ONCE (cold start)
 # --------------------------------
+# MODEL_BACKEND=keras (model.h5), tflite (quantized model from convert_tflite.py)
+# or savedmodel (compiled serving function from export_savedmodel.py)
+MODEL_BACKEND = os.environ.get("MODEL_BACKEND", "keras")
 MODEL_PATH = os.path.join(BASE_DIR, "model.h5")
-model = load_model(MODEL_PATH)
+TFLITE_MODEL_PATH = os.environ.get("TFLITE_MODEL_PATH", os.path.join(BASE_DIR, "model.tflite"))
+SAVEDMODEL_PATH = os.environ.get("SAVEDMODEL_PATH", os.path.join(BASE_DIR, "model_savedmodel"))
+# TFLITE_XNNPACK=0 keeps the memory-mapped weights shared between workers
+TFLITE_XNNPACK = os.environ.get("TFLITE_XNNPACK", "1") == "1"
+
+# MODEL_LOAD_MODE=background serves /api/health, /api/items and /api/ready
+# immediately while the model loads on a thread; MODEL_WARMUP=1 runs one
+# dummy inference before reporting ready
+MODEL_LOAD_MODE = os.environ.get("MODEL_LOAD_MODE", "eager")
+MODEL_WARMUP = os.environ.get("MODEL_WARMUP", "0") == "1"
+MODEL_WAIT_SECONDS = float(os.environ.get("MODEL_WAIT_SECONDS", 30))
+
+# TensorFlow / OpenCV threads sized to the container's CPU budget
+# (see runtime_config.py for overrides)
+THREADS = thread_settings()
+configure_opencv(THREADS)
+
+def load_model():
+    if MODEL_BACKEND in ("keras", "savedmodel"):
+        configure_tensorflow(THREADS)
+    return load_model_backend(
+        MODEL_BACKEND, MODEL_PATH, TFLITE_MODEL_PATH, SAVEDMODEL_PATH,
+        num_threads=THREADS["intra_op"], xnnpack=TFLITE_XNNPACK
+    )
+
+model_loader = ModelLoader(
+    load_model,
+    warmup=MODEL_WARMUP,
+    on_done=lambda loader: record_model_status(loader.status())
+)
+model_loader.start(background=MODEL_LOAD_MODE == "background")
+
+# Micro-batching: concurrent /api/predict calls share one forward pass
+BATCH_MAX_SIZE = int(os.environ.get("BATCH_MAX_SIZE", 16))
+BATCH_MAX_WAIT_MS = float(os.environ.get("BATCH_MAX_WAIT_MS", 5))
+batcher = InferenceBatcher(
+    lambda imgs: model_loader.get().predict(imgs, verbose=0),
+    max_batch_size=BATCH_MAX_SIZE,
+    max_wait_ms=BATCH_MAX_WAIT_MS
+)
+
+# Result cache: repeated uploads skip decode and model.predict
+prediction_cache = PredictionCache(
+    max_entries=int(os.environ.get("CACHE_MAX_ENTRIES", 1024)),
+    ttl_seconds=float(os.environ.get("CACHE_TTL_SECONDS", 600)),
+    perceptual=os.environ.get("CACHE_PERCEPTUAL", "0") == "1"
+)
+
+# /api/predict/batch: images per forward pass and per request
+PREDICT_BATCH_SIZE = int(os.environ.get("PREDICT_BATCH_SIZE", 32))
+BATCH_MAX_IMAGES = int(os.environ.get("BATCH_MAX_IMAGES", 1000))
+# Most bytes read out of one uploaded archive (batch or job); each member
+# is also capped at MAX_CONTENT_LENGTH
+ARCHIVE_MAX_BYTES = int(os.environ.get("ARCHIVE_MAX_BYTES", 512 * 1024 * 1024))
+
+# --------------------------------
+# Background jobs (/api/jobs)
+# --------------------------------
+# Queued predictions in a local SQLite file, scored by JOB_WORKERS
+# background threads. The default file is in the temp directory; point
+# JOBS_DB at persistent storage to keep jobs across restarts
+JOBS_DB = os.environ.get("JOBS_DB", os.path.join(tempfile.gettempdir(), "freshness-jobs.db"))
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 1))
+JOB_MAX_IMAGES = int(os.environ.get("JOB_MAX_IMAGES", 5000))
+# Longest long-poll on /api/jobs/<id>?wait=. Each waiting request holds a
+# gunicorn thread here, so keep it short; asgi.py waits without a thread
+# and has its own, longer ASGI_JOB_WAIT_MAX_SECONDS
+JOB_WAIT_MAX_SECONDS = float(os.environ.get("JOB_WAIT_MAX_SECONDS", 5))
+job_store = JobStore(JOBS_DB)
+job_runner = JobRunner(
+    job_store,
+    lambda items: score_job_items(items),
+    workers=JOB_WORKERS,
+    chunk_size=PREDICT_BATCH_SIZE,
+    stale_seconds=float(os.environ.get("JOB_STALE_SECONDS", 120)),
+    ttl_seconds=float(os.environ.get("JOB_TTL_SECONDS", 24 * 3600)),
+    max_attempts=int(os.environ.get("JOB_MAX_ATTEMPTS", 3))
+)
 
 # --------------------------------
 # Supported items
@@ -62,6 +157,224 @@ SUPPORTED_ITEMS = [
 def allowed_file(filename):
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def model_unavailable():
+    """
+    503 response while the model is loading (or failed to load),
+    otherwise None.
+    """
+    if model_loader.wait(MODEL_WAIT_SECONDS):
+        return None
+    response = jsonify({"error": "Model is not ready", **model_loader.status()})
+    response.status_code = 503
+    response.headers["Retry-After"] = "5"
+    return response
+
+def predict_upload(data):
+    """
+    Raw model output for encoded image bytes.
+    Served from the result cache when the same (or, with CACHE_PERCEPTUAL,
+    a near-identical) image was scored recently.
+    """
+    key = content_key(data)
+    raw_output = prediction_cache.get(key)
+    if raw_output is not None:
+        prediction_cache.record_hit()
+        return raw_output
+
+    with stage("decode"):
+        img = decode_image_bytes(data)
+
+    # Per-thread input buffer: batcher.predict copies it before returning
+    with stage("preprocess"):
+        img = preprocess_into(img, image_buffer())
+
+    phash = perceptual_key(img) if prediction_cache.perceptual else None
+    raw_output = prediction_cache.get(phash)
+    if raw_output is not None:
+        prediction_cache.record_hit(perceptual=True)
+        prediction_cache.put(raw_output, key)
+        return raw_output
+
+    prediction_cache.record_miss()
+    with stage("inference"):
+        raw_output = batcher.predict(img)
+    prediction_cache.put(raw_output, key, phash)
+    return raw_output
+
+def build_result(raw_output, fruit, trajectory=None):
+    """
+    Turn a raw model output into the prediction payload.
+    - trajectory: "day" or "hour" adds the full freshness curve
+    """
+    initial = max(0, min(round(raw_output, 2), 100))
+
+    with stage("decay"):
+        decay = compute_all_decay(initial, fruit, date.today())
+        if trajectory:
+            curve = freshness_trajectory(initial, fruit, trajectory)
+
+    room_final = decay["room_final"]
+    if room_final > 70:
+        status = "FRESH"
+        color = "#22c55e"
+    elif room_final > 40:
+        status = "CONSUME SOON"
+        color = "#f59e0b"
+    else:
+        status = "SPOILED"
+        color = "#ef4444"
+
+    PREDICTIONS.labels(fruit, status).inc()
+
+    result = {
+        "success": True,
+        "fruit": fruit.capitalize(),
+        "initial_freshness": initial,
+        "decay": decay,
+        "status": status,
+        "status_color": color
+    }
+    if trajectory:
+        result["trajectory"] = curve
+    return result
+
+def score_items(items, batch):
+    """
+    Result lines for (name, fruit, data) items:
+    - invalid items get an error line
+    - valid images share one forward pass through `batch` (float32,
+      with room for every item)
+    """
+    lines = [None] * len(items)
+    slots = []
+
+    for i, (name, fruit, data) in enumerate(items):
+        if fruit not in IDEAL_SHELF:
+            lines[i] = {"image": name, "error": "Unsupported item"}
+        elif data is None:
+            lines[i] = {"image": name, "error": "Invalid file type"}
+        else:
+            try:
+                with stage("decode"):
+                    img = decode_image_bytes(data)
+                with stage("preprocess"):
+                    preprocess_into(img, batch[len(slots)])
+                slots.append(i)
+            except ValueError as e:
+                lines[i] = {"image": name, "error": str(e)}
+
+    if slots:
+        try:
+            with stage("inference"):
+                preds = model_loader.get().predict(batch[:len(slots)], verbose=0)
+        except Exception as e:
+            preds = None
+            for i in slots:
+                lines[i] = {"image": items[i][0], "error": str(e)}
+
+        if preds is not None:
+            for i, pred in zip(slots, preds):
+                name, fruit, _ = items[i]
+                lines[i] = {"image": name, **build_result(float(pred[0]), fruit)}
+
+    return lines
+
+def score_job_items(items):
+    """
+    JobRunner callback:
+    - waits for the model (a failed load fails the job)
+    - scores one chunk of a job
+    """
+    model_loader.get()
+    batch = np.empty((len(items), IMG_SIZE, IMG_SIZE, 3), dtype=np.float32)
+    return score_items(items, batch)
+
+def job_items(archive, uploads, fruits, default_fruit):
+    """
+    Items of a new job as ([(name, fruit, data), ...], None), or
+    (None, error message):
+    - `archive`: (filename, bytes); fruits from member folders
+    - `uploads`: [(filename, bytes), ...] with one fruit each, or
+      `default_fruit` for all of them
+    """
+    if archive is not None:
+        filename, data = archive
+        if not is_archive(filename):
+            return None, "Invalid archive type"
+        items = []
+        try:
+            members = iter_archive(io.BytesIO(data), filename, app.config["MAX_CONTENT_LENGTH"], ARCHIVE_MAX_BYTES)
+            for name, member in members:
+                if not allowed_file(name):
+                    continue
+                items.append((name, fruit_from_path(name, IDEAL_SHELF, default_fruit), member))
+                # Stop decompressing as soon as the job is too big
+                if len(items) > JOB_MAX_IMAGES:
+                    members.close()
+                    break
+        except ArchiveTooLarge as e:
+            return None, str(e)
+        except ARCHIVE_ERRORS:
+            return None, "Could not read archive"
+    else:
+        if not uploads:
+            return None, "No images or archive"
+        if not fruits:
+            fruits = [default_fruit] * len(uploads)
+        if len(fruits) != len(uploads):
+            return None, "Number of fruits does not match number of images"
+        items = [
+            (filename, fruit, data if allowed_file(filename) else None)
+            for (filename, data), fruit in zip(uploads, fruits)
+        ]
+
+    if not items:
+        return None, "No images found"
+    if len(items) > JOB_MAX_IMAGES:
+        return None, f"Job limit of {JOB_MAX_IMAGES} images exceeded"
+    return items, None
+
+def job_urls(job_id):
+    return {
+        "status_url": f"/api/jobs/{job_id}",
+        "results_url": f"/api/jobs/{job_id}/results"
+    }
+
+# --------------------------------
+# Request metrics
+# --------------------------------
+@app.before_request
+def start_job_runner():
+    # Started by the first request rather than on import, so importing the
+    # app (tests, benchmarks) runs no job threads
+    job_runner.start()
+
+@app.before_request
+def track_request_start():
+    if request.path.startswith("/api/"):
+        g.request_start = time.perf_counter()
+        IN_FLIGHT.inc()
+
+def _observe_request(start, endpoint):
+    IN_FLIGHT.dec()
+    REQUEST_SECONDS.labels(endpoint or "unknown").observe(time.perf_counter() - start)
+
+@app.after_request
+def track_request_end(response):
+    start = g.pop("request_start", None)
+    if start is not None:
+        # Observed once the server has sent the whole body, so streamed
+        # responses (predict_batch, job_results) count until their last line
+        response.call_on_close(functools.partial(_observe_request, start, request.endpoint))
+    return response
+
+@app.teardown_request
+def track_request_abort(exc=None):
+    # Requests that never got as far as after_request
+    start = g.pop("request_start", None)
+    if start is not None:
+        _observe_request(start, request.endpoint)
+
 # --------------------------------
 # API ROUTES
 # --------------------------------
@@ -69,17 +382,28 @@ def allowed_file(filename):
 def health_check():
     return jsonify({"status": "healthy"})
 
+@app.route("/api/ready")
+def readiness_check():
+    status = model_loader.status()
+    return jsonify(status), 200 if status["ready"] else 503
+
 @app.route("/api/items")
 def get_items():
     return jsonify({"items": SUPPORTED_ITEMS})
 
 @app.route("/api/predict", methods=["POST"])
 def predict():
-    if "image" not in request.files:
+    # Receive and parse the multipart upload
+    with stage("receive"):
+        files, form = request.files, request.form
+
+    if "image" not in files:
         return jsonify({"error": "No image file"}), 400
 
-    file = request.files["image"]
-    fruit = request.form.get("fruit", "").lower()
+    file = files["image"]
+    fruit = form.get("fruit", "").lower()
+    # Optional day-by-day or hourly curve until spoilage
+    trajectory = request.args.get("trajectory") or form.get("trajectory")
 
     if not allowed_file(file.filename):
         return jsonify({"error": "Invalid file type"}), 400
@@ -87,40 +411,190 @@ def predict():
     if fruit not in IDEAL_SHELF:
         return jsonify({"error": "Unsupported item"}), 400
 
-    filename = secure_filename(file.filename)
-    filepath = os.path.join(app.config["UPLOAD_FOLDER"], filename)
-    file.save(filepath)
+    if trajectory and trajectory not in TRAJECTORY_RESOLUTIONS:
+        return jsonify({"error": "trajectory must be 'day' or 'hour'"}), 400
 
-    try:
-        img = preprocess_image(filepath)
-        initial = float(model.predict(img, verbose=0)[0][0])
-        initial = max(0, min(round(initial, 2), 100))
+    # Model may still be loading in background mode
+    unavailable = model_unavailable()
+    if unavailable is not None:
+        return unavailable
 
-        decay = compute_all_decay(initial, fruit, date.today())
+    # Decode in memory (no temp file) and predict, reusing cached results
+    result = build_result(predict_upload(file.read()), fruit, trajectory)
+    with stage("serialize"):
+        return jsonify(result)
 
-        room_final = decay["room_final"]
-        if room_final > 70:
-            status = "FRESH"
-            color = "#22c55e"
-        elif room_final > 40:
-            status = "CONSUME SOON"
-            color = "#f59e0b"
-        else:
-            status = "SPOILED"
-            color = "#ef4444"
-
-        return jsonify({
-            "success": True,
-            "fruit": fruit.capitalize(),
-            "initial_freshness": initial,
-            "decay": decay,
-            "status": status,
-            "status_color": color
-        })
-
-    finally:
-        if os.path.exists(filepath):
-            os.remove(filepath)
+@app.route("/api/predict/batch", methods=["POST"])
+def predict_batch():
+    """
+    Score many images in one request.
+
+    Accepts either multipart `images` files (with a matching list of
+    `fruits`, or one `fruit` for all of them) or a single zip/tar
+    `archive`. Archive members take their fruit from their parent folder
+    (e.g. ``apple/img1.jpg``) and fall back to the `fruit` field.
+    Results are streamed back as NDJSON, one line per image, in order.
+    """
+    unavailable = model_unavailable()
+    if unavailable is not None:
+        return unavailable
+
+    default_fruit = request.form.get("fruit", "").lower()
+    read_errors = []
+
+    if "archive" in request.files:
+        archive = request.files["archive"]
+        if not is_archive(archive.filename):
+            return jsonify({"error": "Invalid archive type"}), 400
+
+        # Upload streams are closed once the view returns, so buffer the
+        # (size-capped) body now and decode lazily while streaming. Opening
+        # it here answers 400 for unreadable archives before any output.
+        try:
+            members = iter_archive(
+                io.BytesIO(archive.read()), archive.filename, app.config["MAX_CONTENT_LENGTH"], ARCHIVE_MAX_BYTES
+            )
+        except ARCHIVE_ERRORS:
+            return jsonify({"error": "Could not read archive"}), 400
+
+        def items():
+            # A damaged member ends the stream with an error line
+            try:
+                for name, data in members:
+                    if not allowed_file(name):
+                        continue
+                    yield name, fruit_from_path(name, IDEAL_SHELF, default_fruit), data
+            except ArchiveTooLarge as e:
+                read_errors.append(str(e))
+            except ARCHIVE_ERRORS as e:
+                read_errors.append(f"Could not read archive: {e}")
+    else:
+        files = request.files.getlist("images")
+        if not files:
+            return jsonify({"error": "No images or archive"}), 400
+
+        fruits = [f.lower() for f in request.form.getlist("fruits")]
+        if not fruits:
+            fruits = [default_fruit] * len(files)
+        if len(fruits) != len(files):
+            return jsonify({"error": "Number of fruits does not match number of images"}), 400
+
+        uploads = [
+            (file.filename, fruit, file.read() if allowed_file(file.filename) else None)
+            for file, fruit in zip(files, fruits)
+        ]
+
+        def items():
+            return iter(uploads)
+
+    def generate():
+        count = 0
+        # One input buffer per request, refilled for every chunk
+        batch = np.empty((PREDICT_BATCH_SIZE, IMG_SIZE, IMG_SIZE, 3), dtype=np.float32)
+        for chunk in chunked(items(), PREDICT_BATCH_SIZE):
+            exceeded = count + len(chunk) > BATCH_MAX_IMAGES
+            chunk = chunk[:BATCH_MAX_IMAGES - count]
+            count += len(chunk)
+
+            lines = score_items(chunk, batch)
+
+            yield "".join(json.dumps(line) + "\n" for line in lines)
+
+            if exceeded:
+                yield json.dumps({"error": f"Batch limit of {BATCH_MAX_IMAGES} images exceeded"}) + "\n"
+                return
+
+        for message in read_errors:
+            yield json.dumps({"error": message}) + "\n"
+
+    return Response(generate(), mimetype="application/x-ndjson")
+
+@app.route("/api/jobs", methods=["POST"])
+def submit_job():
+    """
+    Queue images for background scoring and return a job id right away.
+
+    Takes the same fields as /api/predict/batch (`images` + `fruits` or
+    `fruit`, or an `archive`), or a single `image` + `fruit`. Poll
+    /api/jobs/<id> for progress and read /api/jobs/<id>/results (NDJSON).
+    """
+    files, form = request.files, request.form
+    archive = files.get("archive")
+    uploads = files.getlist("images") or files.getlist("image")
+    items, error = job_items(
+        (archive.filename, archive.read()) if archive is not None else None,
+        [(file.filename, file.read()) for file in uploads],
+        [f.lower() for f in form.getlist("fruits")],
+        form.get("fruit", "").lower()
+    )
+    if error is not None:
+        return jsonify({"error": error}), 400
+
+    job_id = job_store.create(items)
+    job_runner.notify()
+    response = jsonify({"job_id": job_id, "state": "queued", "total": len(items), **job_urls(job_id)})
+    response.status_code = 202
+    response.headers["Location"] = f"/api/jobs/{job_id}"
+    return response
+
+@app.route("/api/jobs/<job_id>")
+def job_status(job_id):
+    """
+    Job state and progress. `wait=<seconds>` long-polls until the job has
+    finished, or with `since=<done>` until more images than that are done.
+    Waits are capped at JOB_WAIT_MAX_SECONDS (5 s by default); clients
+    re-poll for longer.
+    """
+    wait = max(0.0, min(request.args.get("wait", 0, type=float), JOB_WAIT_MAX_SECONDS))
+    status = job_runner.wait(job_id, wait, since=request.args.get("since", type=int))
+    if status is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify({**status, **job_urls(job_id)})
+
+@app.route("/api/jobs/<job_id>/results")
+def job_results(job_id):
+    """Result lines scored so far, in upload order (X-Job-State tells whether more will follow)."""
+    status = job_store.get(job_id)
+    if status is None:
+        return jsonify({"error": "Unknown job"}), 404
+    lines = (line + "\n" for line in job_store.results(job_id))
+    return Response(lines, mimetype="application/x-ndjson", headers={"X-Job-State": status["state"]})
+
+@app.route("/api/cache/stats")
+def cache_stats():
+    return jsonify(prediction_cache.stats())
+
+@app.route("/metrics")
+def metrics():
+    record_model_status(model_loader.status())
+    body, content_type = render_metrics()
+    return Response(body, content_type=content_type)
+
+@app.route("/api/trajectory/<fruit>")
+def get_trajectory(fruit):
+    """
+    Freshness curve of a fruit until spoilage.
+    - initial: starting freshness (default 100)
+    - resolution: "day" (default) or "hour"
+    """
+    fruit = fruit.lower()
+    if fruit not in IDEAL_SHELF:
+        return jsonify({"error": "Unsupported item"}), 400
+
+    resolution = request.args.get("resolution", "day")
+    if resolution not in TRAJECTORY_RESOLUTIONS:
+        return jsonify({"error": "resolution must be 'day' or 'hour'"}), 400
+
+    try:
+        initial = max(0, min(float(request.args.get("initial", 100)), 100))
+    except ValueError:
+        return jsonify({"error": "initial must be a number"}), 400
+
+    return jsonify({
+        "fruit": fruit,
+        "initial_freshness": initial,
+        **freshness_trajectory(initial, fruit, resolution)
+    })
 
 # --------------------------------
 # Serve React (Vite build)
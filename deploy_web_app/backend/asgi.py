@@ -0,0 +1,371 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+# ✅ Package-based imports (Docker safe)
+from backend.app import (
+    app as flask_app,
+    SUPPORTED_ITEMS,
+    MODEL_WAIT_SECONDS,
+    JOB_MAX_IMAGES,
+    allowed_file,
+    build_result,
+    model_loader,
+    predict_upload,
+    prediction_cache,
+    job_items,
+    job_store,
+    job_runner,
+    job_urls
+)
+from backend.decay import IDEAL_SHELF
+from backend.vector_decay import TRAJECTORY_RESOLUTIONS, freshness_trajectory
+from backend.jobs import settled
+from backend.metrics import (
+    stage,
+    record_model_status,
+    render as render_metrics,
+    IN_FLIGHT,
+    REQUEST_SECONDS
+)
+
+# --------------------------------
+# ASGI serving mode
+# --------------------------------
+# Same API and React frontend as app.py, served by uvicorn:
+#   python -m backend.asgi
+# Uploads are received on the event loop (a slow client holds a socket,
+# not a thread); decode + inference run on a bounded thread pool and
+# requests beyond its queue get 503 + Retry-After.
+
+MAX_CONTENT_LENGTH = flask_app.config["MAX_CONTENT_LENGTH"]
+STATIC_DIR = flask_app.static_folder
+
+# Threads running decode + inference (more than BATCH_MAX_SIZE so the
+# micro-batcher still fills its batches)
+INFERENCE_THREADS = int(os.environ.get("INFERENCE_THREADS", 16))
+# Requests allowed to wait for a free inference thread
+INFERENCE_QUEUE_MAX = int(os.environ.get("INFERENCE_QUEUE_MAX", 64))
+RETRY_AFTER_SECONDS = os.environ.get("RETRY_AFTER_SECONDS", "1")
+# Longest long-poll on /api/jobs/<id>?wait= (waiting holds no thread here)
+ASGI_JOB_WAIT_MAX_SECONDS = float(os.environ.get("ASGI_JOB_WAIT_MAX_SECONDS", 60))
+
+# --------------------------------
+# Bounded inference executor
+# --------------------------------
+class ExecutorFull(RuntimeError):
+    pass
+
+class BoundedExecutor:
+    """
+    Thread pool that rejects work instead of queueing past a fixed limit.
+    """
+
+    def __init__(self, max_workers, max_queued):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+        self._slots = threading.BoundedSemaphore(max_workers + max_queued)
+
+    async def run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise ExecutorFull()
+        try:
+            future = self._pool.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # Slot is freed when the work finishes, even if the client left
+        future.add_done_callback(lambda _: self._slots.release())
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+executor = BoundedExecutor(INFERENCE_THREADS, INFERENCE_QUEUE_MAX)
+
+# --------------------------------
+# Request metrics
+# --------------------------------
+class MetricsMiddleware:
+    """
+    In-flight gauge and per-endpoint latency for /api/ requests.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith("/api/"):
+            return await self.app(scope, receive, send)
+        IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            IN_FLIGHT.dec()
+            # The router records the matched endpoint in the shared scope
+            endpoint = getattr(scope.get("endpoint"), "__name__", "unknown")
+            REQUEST_SECONDS.labels(endpoint).observe(time.perf_counter() - start)
+
+def error(message, status_code, **extra):
+    return JSONResponse({"error": message, **extra}, status_code=status_code)
+
+class UploadTooLarge(Exception):
+    pass
+
+class BodyLimitMiddleware:
+    """
+    413 once a request body passes MAX_CONTENT_LENGTH, counted as it
+    arrives.
+    """
+
+    def __init__(self, app, max_bytes):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        # Content-Length is only a hint: chunked uploads don't send one
+        headers = dict(scope["headers"])
+        if int(headers.get(b"content-length") or 0) > self.max_bytes:
+            return await error("Upload too large", 413)(scope, receive, send)
+
+        received = 0
+        started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise UploadTooLarge()
+            return message
+
+        async def tracked_send(message):
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracked_send)
+        except UploadTooLarge:
+            if started:
+                raise
+            await error("Upload too large", 413)(scope, receive, send)
+
+async def model_unavailable():
+    """
+    503 response while the model is loading (or failed to load),
+    otherwise None. Waits without blocking the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + MODEL_WAIT_SECONDS
+    while not model_loader.ready and model_loader.state != "failed" and loop.time() < deadline:
+        await asyncio.sleep(0.1)
+    if model_loader.ready:
+        return None
+    response = error("Model is not ready", 503, **model_loader.status())
+    response.headers["Retry-After"] = "5"
+    return response
+
+# --------------------------------
+# API ROUTES
+# --------------------------------
+async def health_check(request):
+    return JSONResponse({"status": "healthy"})
+
+async def readiness_check(request):
+    status = model_loader.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+async def get_items(request):
+    return JSONResponse({"items": SUPPORTED_ITEMS})
+
+async def predict(request):
+    # Receive the upload without blocking a thread (BodyLimitMiddleware
+    # caps its size)
+    with stage("receive"):
+        async with request.form(max_files=1) as form:
+            file = form.get("image")
+            fruit = str(form.get("fruit", "")).lower()
+            trajectory = request.query_params.get("trajectory") or form.get("trajectory")
+
+            if file is None or isinstance(file, str):
+                return error("No image file", 400)
+
+            if not allowed_file(file.filename or ""):
+                return error("Invalid file type", 400)
+
+            if fruit not in IDEAL_SHELF:
+                return error("Unsupported item", 400)
+
+            if trajectory and trajectory not in TRAJECTORY_RESOLUTIONS:
+                return error("trajectory must be 'day' or 'hour'", 400)
+
+            data = await file.read()
+
+    # Model may still be loading in background mode
+    unavailable = await model_unavailable()
+    if unavailable is not None:
+        return unavailable
+
+    try:
+        raw_output = await executor.run(predict_upload, data)
+    except ExecutorFull:
+        response = error("Server busy, retry shortly", 503)
+        response.headers["Retry-After"] = RETRY_AFTER_SECONDS
+        return response
+
+    result = build_result(raw_output, fruit, trajectory)
+    with stage("serialize"):
+        return JSONResponse(result)
+
+async def submit_job(request):
+    # Same fields as the Flask /api/jobs
+    async with request.form(max_files=JOB_MAX_IMAGES + 1) as form:
+        archive = form.get("archive")
+        if archive is None or isinstance(archive, str):
+            archive = None
+        else:
+            archive = (archive.filename or "", await archive.read())
+        uploads = [
+            (file.filename or "", await file.read())
+            for file in form.getlist("images") or form.getlist("image")
+            if not isinstance(file, str)
+        ]
+        fruits = [str(f).lower() for f in form.getlist("fruits")]
+        default_fruit = str(form.get("fruit", "")).lower()
+
+    items, message = await run_in_threadpool(job_items, archive, uploads, fruits, default_fruit)
+    if message is not None:
+        return error(message, 400)
+
+    job_id = await run_in_threadpool(job_store.create, items)
+    job_runner.notify()
+    return JSONResponse(
+        {"job_id": job_id, "state": "queued", "total": len(items), **job_urls(job_id)},
+        status_code=202,
+        headers={"Location": f"/api/jobs/{job_id}"}
+    )
+
+async def job_status(request):
+    job_id = request.path_params["job_id"]
+    try:
+        wait = max(0.0, min(float(request.query_params.get("wait", 0)), ASGI_JOB_WAIT_MAX_SECONDS))
+        since = request.query_params.get("since")
+        since = int(since) if since is not None else None
+    except ValueError:
+        return error("Invalid wait or since", 400)
+
+    # Long-poll without holding a thread
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + wait
+    while True:
+        status = await run_in_threadpool(job_store.get, job_id)
+        if settled(status, since) or loop.time() >= deadline:
+            break
+        await asyncio.sleep(0.25)
+
+    if status is None:
+        return error("Unknown job", 404)
+    return JSONResponse({**status, **job_urls(job_id)})
+
+async def job_results(request):
+    job_id = request.path_params["job_id"]
+    status = await run_in_threadpool(job_store.get, job_id)
+    if status is None:
+        return error("Unknown job", 404)
+    lines = (line + "\n" for line in job_store.results(job_id))
+    return StreamingResponse(lines, media_type="application/x-ndjson", headers={"X-Job-State": status["state"]})
+
+async def cache_stats(request):
+    return JSONResponse(prediction_cache.stats())
+
+async def metrics(request):
+    record_model_status(model_loader.status())
+    body, content_type = render_metrics()
+    return Response(body, headers={"Content-Type": content_type})
+
+async def get_trajectory(request):
+    # Same parameters as the Flask /api/trajectory/<fruit>
+    fruit = request.path_params["fruit"].lower()
+    if fruit not in IDEAL_SHELF:
+        return error("Unsupported item", 400)
+
+    resolution = request.query_params.get("resolution", "day")
+    if resolution not in TRAJECTORY_RESOLUTIONS:
+        return error("resolution must be 'day' or 'hour'", 400)
+
+    try:
+        initial = max(0, min(float(request.query_params.get("initial", 100)), 100))
+    except ValueError:
+        return error("initial must be a number", 400)
+
+    return JSONResponse({
+        "fruit": fruit,
+        "initial_freshness": initial,
+        **freshness_trajectory(initial, fruit, resolution)
+    })
+
+# --------------------------------
+# Serve React Frontend
+# --------------------------------
+async def serve_react(request):
+    path = request.path_params.get("path", "")
+    file_path = os.path.realpath(os.path.join(STATIC_DIR, path))
+    if path and file_path.startswith(os.path.realpath(STATIC_DIR) + os.sep) and os.path.isfile(file_path):
+        return FileResponse(file_path)
+
+    index_path = os.path.join(STATIC_DIR, "index.html")
+    if os.path.exists(index_path):
+        return FileResponse(index_path)
+
+    return error("Frontend build not found", 404)
+
+@asynccontextmanager
+async def lifespan(app):
+    job_runner.start()
+    yield
+    executor.shutdown()
+
+app = Starlette(
+    routes=[
+        Route("/api/health", health_check),
+        Route("/api/ready", readiness_check),
+        Route("/api/items", get_items),
+        Route("/api/predict", predict, methods=["POST"]),
+        Route("/api/jobs", submit_job, methods=["POST"]),
+        Route("/api/jobs/{job_id}", job_status),
+        Route("/api/jobs/{job_id}/results", job_results),
+        Route("/api/cache/stats", cache_stats),
+        Route("/api/trajectory/{fruit}", get_trajectory),
+        Route("/metrics", metrics),
+        Route("/{path:path}", serve_react)
+    ],
+    # Same-origin (React + API in same container)
+    middleware=[
+        Middleware(MetricsMiddleware),
+        Middleware(BodyLimitMiddleware, max_bytes=MAX_CONTENT_LENGTH),
+        Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
+    ],
+    lifespan=lifespan
+)
+
+# --------------------------------
+# Hugging Face entry point
+# --------------------------------
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=int(os.environ.get("PORT", 7860)))
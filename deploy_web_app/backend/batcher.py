@@ -0,0 +1,97 @@
+import threading
+import queue
+import time
+import numpy as np
+
+
+class _Request:
+    __slots__ = ("img", "event", "result", "error")
+
+    def __init__(self, img):
+        self.img = img
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class InferenceBatcher:
+    """
+    Micro-batching scheduler for model inference.
+
+    Concurrent callers submit single preprocessed images (shape
+    (1, 224, 224, 3)); a background thread groups whatever arrives within
+    `max_wait_ms` (up to `max_batch_size` images) into one forward pass
+    and hands each caller back its own row of the output. Batches are
+    assembled in one preallocated input buffer that is reused for every
+    forward pass.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=16, max_wait_ms=5):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._buffer = None
+
+    def _ensure_worker(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="inference-batcher", daemon=True
+                )
+                self._thread.start()
+
+    def predict(self, img):
+        """
+        Run inference for one image and return its raw model output
+        (the first output unit, as a Python float).
+        """
+        self._ensure_worker()
+        req = _Request(img)
+        self._queue.put(req)
+        req.event.wait()
+        if req.error is not None:
+            raise req.error
+        return req.result
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _assemble(self, batch):
+        """Copy the queued images into the reusable batch buffer."""
+        shape = (self.max_batch_size,) + batch[0].img.shape[1:]
+        if self._buffer is None or self._buffer.shape != shape or self._buffer.dtype != batch[0].img.dtype:
+            self._buffer = np.empty(shape, dtype=batch[0].img.dtype)
+        for i, req in enumerate(batch):
+            self._buffer[i:i + 1] = req.img
+        return self._buffer[:len(batch)]
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                imgs = self._assemble(batch)
+                preds = self.predict_fn(imgs)
+                for i, req in enumerate(batch):
+                    req.result = float(preds[i][0])
+            except Exception as e:
+                for req in batch:
+                    req.error = e
+            finally:
+                for req in batch:
+                    req.event.set()
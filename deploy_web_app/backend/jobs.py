@@ -0,0 +1,347 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+# Durable job queue for /api/jobs, backed by one SQLite file.
+#
+# Submitting only writes the uploaded images to the database and returns a
+# job id; JobRunner threads (in every process that serves the API) claim
+# queued jobs, score them chunk by chunk and store each image's result
+# line. Progress is committed per chunk, so a job interrupted by a crash
+# or restart is picked up again from its first unscored image once its
+# heartbeat goes stale. A job that has been claimed `max_attempts` times
+# without finishing (it keeps killing its worker) is failed instead.
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+FINISHED = (DONE, FAILED)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    done INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    heartbeat REAL,
+    owner TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, created);
+CREATE TABLE IF NOT EXISTS items (
+    job_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    fruit TEXT NOT NULL,
+    data BLOB,
+    result TEXT,
+    PRIMARY KEY (job_id, idx)
+);
+"""
+
+
+def settled(status, since=None):
+    """True once a long-poll on this status can return: unknown or finished job, or progress past `since`."""
+    return (status is None or status["state"] in FINISHED
+            or (since is not None and status["done"] > since))
+
+
+def _timestamp(value):
+    if value is None:
+        return None
+    return datetime.fromtimestamp(value, timezone.utc).isoformat(timespec="seconds")
+
+
+class JobStore:
+    """
+    Jobs and their images in SQLite (WAL mode, so status reads never wait
+    for a worker's write). Safe to share between threads and processes;
+    each thread opens its own connection.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        db = self._db()
+        db.executescript(_SCHEMA)
+        # Databases created before jobs had an attempt count
+        if "attempts" not in {row[1] for row in db.execute("PRAGMA table_info(jobs)")}:
+            db.execute("ALTER TABLE jobs ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+
+    def _db(self):
+        db = getattr(self._local, "db", None)
+        # Connections must not cross a fork
+        if db is None or self._local.pid != os.getpid():
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+            self._local.pid = os.getpid()
+        return db
+
+    def _transaction(self):
+        return _Transaction(self._db())
+
+    def create(self, items):
+        """Store a new job for [(name, fruit, data), ...]; returns its id."""
+        job_id = uuid.uuid4().hex
+        with self._transaction() as db:
+            db.execute(
+                "INSERT INTO jobs (id, state, total, created) VALUES (?, ?, ?, ?)",
+                (job_id, QUEUED, len(items), time.time())
+            )
+            db.executemany(
+                "INSERT INTO items (job_id, idx, name, fruit, data) VALUES (?, ?, ?, ?, ?)",
+                ((job_id, i, name, fruit, data) for i, (name, fruit, data) in enumerate(items))
+            )
+        return job_id
+
+    def get(self, job_id):
+        """Job status as a dict, or None for an unknown id."""
+        row = self._db().execute(
+            "SELECT id, state, total, done, created, started, finished, error FROM jobs WHERE id = ?",
+            (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            "job_id": row[0],
+            "state": row[1],
+            "total": row[2],
+            "done": row[3],
+            "created_at": _timestamp(row[4]),
+            "started_at": _timestamp(row[5]),
+            "finished_at": _timestamp(row[6]),
+            "error": row[7]
+        }
+
+    def claim(self, owner):
+        """Mark the oldest queued job as running for `owner`; returns its id or None."""
+        with self._transaction() as db:
+            row = db.execute(
+                "SELECT id FROM jobs WHERE state = ? ORDER BY created LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            db.execute(
+                "UPDATE jobs SET state = ?, owner = ?, started = COALESCE(started, ?), heartbeat = ?, "
+                "attempts = attempts + 1 WHERE id = ?",
+                (RUNNING, owner, now, now, row[0])
+            )
+        return row[0]
+
+    def heartbeat(self, job_id, owner):
+        """Refresh the heartbeat of a job `owner` is still running; False once it lost the job."""
+        with self._transaction() as db:
+            return db.execute(
+                "UPDATE jobs SET heartbeat = ? WHERE id = ? AND state = ? AND owner = ?",
+                (time.time(), job_id, RUNNING, owner)
+            ).rowcount > 0
+
+    def pending_items(self, job_id, limit):
+        """Next unscored [(idx, name, fruit, data), ...] of a job, in order."""
+        return self._db().execute(
+            "SELECT idx, name, fruit, data FROM items WHERE job_id = ? AND result IS NULL ORDER BY idx LIMIT ?",
+            (job_id, limit)
+        ).fetchall()
+
+    def save_results(self, job_id, results):
+        """Store [(idx, result dict), ...] and drop those images."""
+        with self._transaction() as db:
+            # Only unscored images count, in case a requeued job was also
+            # still being worked on by its previous owner
+            saved = db.executemany(
+                "UPDATE items SET result = ?, data = NULL WHERE job_id = ? AND idx = ? AND result IS NULL",
+                ((json.dumps(result), job_id, idx) for idx, result in results)
+            ).rowcount
+            db.execute(
+                "UPDATE jobs SET done = done + ?, heartbeat = ? WHERE id = ?",
+                (saved, time.time(), job_id)
+            )
+
+    def finish(self, job_id, error=None):
+        with self._transaction() as db:
+            db.execute(
+                "UPDATE jobs SET state = ?, finished = ?, error = ?, owner = NULL WHERE id = ?",
+                (FAILED if error else DONE, time.time(), error, job_id)
+            )
+            # Images of a failed job won't be scored any more
+            db.execute("UPDATE items SET data = NULL WHERE job_id = ?", (job_id,))
+
+    def results(self, job_id, page_size=256):
+        """Yield the stored result lines (JSON strings) of a job, in image order."""
+        last = -1
+        while True:
+            rows = self._db().execute(
+                "SELECT idx, result FROM items WHERE job_id = ? AND idx > ? AND result IS NOT NULL "
+                "ORDER BY idx LIMIT ?",
+                (job_id, last, page_size)
+            ).fetchall()
+            for idx, result in rows:
+                yield result
+            if len(rows) < page_size:
+                return
+            last = rows[-1][0]
+
+    def requeue_stale(self, max_age, max_attempts=3):
+        """
+        Put running jobs whose worker stopped reporting back in the queue,
+        or fail them once they have been claimed `max_attempts` times.
+        """
+        now = time.time()
+        with self._transaction() as db:
+            failed = [row[0] for row in db.execute(
+                "SELECT id FROM jobs WHERE state = ? AND heartbeat < ? AND attempts >= ?",
+                (RUNNING, now - max_age, max_attempts)
+            )]
+            for job_id in failed:
+                db.execute(
+                    "UPDATE jobs SET state = ?, finished = ?, error = ?, owner = NULL WHERE id = ?",
+                    (FAILED, now, f"Job was interrupted {max_attempts} times", job_id)
+                )
+                db.execute("UPDATE items SET data = NULL WHERE job_id = ?", (job_id,))
+            return db.execute(
+                "UPDATE jobs SET state = ?, owner = NULL WHERE state = ? AND heartbeat < ?",
+                (QUEUED, RUNNING, now - max_age)
+            ).rowcount
+
+    def purge(self, max_age):
+        """Delete jobs that finished more than `max_age` seconds ago."""
+        cutoff = time.time() - max_age
+        with self._transaction() as db:
+            db.execute(
+                "DELETE FROM items WHERE job_id IN (SELECT id FROM jobs WHERE finished < ?)", (cutoff,)
+            )
+            return db.execute("DELETE FROM jobs WHERE finished < ?", (cutoff,)).rowcount
+
+
+class _Transaction:
+    """`with` block running as one write transaction (BEGIN IMMEDIATE ... COMMIT)."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        self.db.execute("BEGIN IMMEDIATE")
+        return self.db
+
+    def __exit__(self, exc_type, exc, tb):
+        self.db.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+class JobRunner:
+    """
+    Background threads working through the job queue.
+
+    score_fn([(name, fruit, data), ...]) returns one result dict per image;
+    it is called with up to `chunk_size` images at a time. A running job's
+    heartbeat is refreshed every `stale_seconds / 4`, also while score_fn
+    runs; jobs whose heartbeat is older than `stale_seconds` (their process
+    died) are put back in the queue up to `max_attempts` claims, and
+    finished jobs are deleted after `ttl_seconds`.
+    """
+
+    def __init__(self, store, score_fn, workers=1, chunk_size=32, stale_seconds=120, ttl_seconds=86400,
+                 max_attempts=3):
+        self.store = store
+        self.score_fn = score_fn
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.stale_seconds = stale_seconds
+        self.ttl_seconds = ttl_seconds
+        self.max_attempts = max_attempts
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._pid = None
+        self._last_maintenance = 0.0
+
+    def start(self):
+        """Start the worker threads in this process (again after a fork)."""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._threads = [
+                threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def notify(self):
+        """Wake an idle worker after a job was submitted."""
+        self._wakeup.set()
+
+    def _maintain(self):
+        now = time.monotonic()
+        if now - self._last_maintenance < min(self.stale_seconds, 60):
+            return
+        self._last_maintenance = now
+        self.store.requeue_stale(self.stale_seconds, self.max_attempts)
+        self.store.purge(self.ttl_seconds)
+
+    def _run(self):
+        owner = f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"
+        while True:
+            try:
+                self._maintain()
+                job_id = self.store.claim(owner)
+            except sqlite3.Error:
+                job_id = None
+            if job_id is None:
+                self._wakeup.wait(1.0)
+                self._wakeup.clear()
+                continue
+            self._process(job_id, owner)
+
+    def _heartbeat(self, job_id, owner, stop):
+        # Keeps the job claimed while a slow chunk is being scored
+        while not stop.wait(self.stale_seconds / 4):
+            try:
+                if not self.store.heartbeat(job_id, owner):
+                    return
+            except sqlite3.Error:
+                pass
+
+    def _process(self, job_id, owner):
+        stop = threading.Event()
+        beat = threading.Thread(target=self._heartbeat, args=(job_id, owner, stop),
+                                name=f"job-heartbeat-{job_id[:8]}", daemon=True)
+        beat.start()
+        try:
+            while True:
+                rows = self.store.pending_items(job_id, self.chunk_size)
+                if not rows:
+                    break
+                results = self.score_fn([(name, fruit, data) for _, name, fruit, data in rows])
+                self.store.save_results(job_id, [(row[0], result) for row, result in zip(rows, results)])
+        except Exception as e:
+            self.store.finish(job_id, error=str(e) or type(e).__name__)
+        else:
+            self.store.finish(job_id)
+        finally:
+            stop.set()
+            beat.join()
+
+    def wait(self, job_id, timeout, since=None):
+        """
+        Status of a job once it has finished or, with `since`, scored more
+        than `since` images; returns the current status after `timeout`.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            status = self.store.get(job_id)
+            if settled(status, since) or time.monotonic() >= deadline:
+                return status
+            time.sleep(0.25)
@@ -0,0 +1,74 @@
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY,
+    generate_latest, multiprocess
+)
+
+# Prometheus metrics shared by app.py and asgi.py, served at /metrics.
+#
+# When running several worker processes, set PROMETHEUS_MULTIPROC_DIR to an
+# empty, writable directory before start-up; every process then writes its
+# samples there and /metrics aggregates all of them.
+
+# Request stages, in order:
+#   receive     reading the multipart upload
+#   decode      image bytes -> BGR pixels
+#   preprocess  resize + RGB + scale into the model input buffer
+#   inference   model forward pass, including micro-batch wait
+#   decay       compute_all_decay for the three storage conditions
+#   serialize   building the JSON response body
+STAGES = ("receive", "decode", "preprocess", "inference", "decay", "serialize")
+
+_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+STAGE_SECONDS = Histogram(
+    "freshness_stage_seconds", "Time spent in each request stage", ["stage"], buckets=_BUCKETS
+)
+REQUEST_SECONDS = Histogram(
+    "freshness_request_seconds", "Total request handling time", ["endpoint"], buckets=_BUCKETS
+)
+PREDICTIONS = Counter(
+    "freshness_predictions_total", "Predictions served, by item and status", ["fruit", "status"]
+)
+IN_FLIGHT = Gauge(
+    "freshness_requests_in_flight", "API requests currently being handled", multiprocess_mode="livesum"
+)
+MODEL_READY = Gauge(
+    "freshness_model_ready", "1 once the model is loaded in this process", multiprocess_mode="liveall"
+)
+MODEL_LOAD_SECONDS = Gauge(
+    "freshness_model_load_seconds", "Model load and warm-up time", ["phase"], multiprocess_mode="max"
+)
+
+# Pre-create the stage series so every stage is exported from the start
+for _stage in STAGES:
+    STAGE_SECONDS.labels(_stage)
+
+@contextmanager
+def stage(name):
+    """Time a block as one request stage."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(name).observe(time.perf_counter() - start)
+
+def record_model_status(status):
+    """Copy ModelLoader.status() into the model gauges."""
+    MODEL_READY.set(1 if status["ready"] else 0)
+    if status["load_seconds"] is not None:
+        MODEL_LOAD_SECONDS.labels("load").set(status["load_seconds"])
+    if status["warmup_seconds"] is not None:
+        MODEL_LOAD_SECONDS.labels("warmup").set(status["warmup_seconds"])
+
+def render():
+    """(body, content type) for the /metrics endpoint."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
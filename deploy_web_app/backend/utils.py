@@ -1,35 +1,101 @@
 import cv2
 import numpy as np
 import os
+import threading
 
-def preprocess_image(path):
+IMG_SIZE = 224
+
+_SCALE = np.float32(255.0)
+_local = threading.local()
+
+def _decode(buf):
+    """
+    Decode an encoded image buffer to BGR.
+    - Always a full-size decode (reduced JPEG decoding is only in
+      backend/utils.py, and off by default)
+    """
+
+    if not buf.size:
+        return None
+    return cv2.imdecode(buf, cv2.IMREAD_COLOR)
+
+def image_buffer():
+    """
+    Reusable (1, 224, 224, 3) float32 input buffer for the calling thread.
+    - Valid until the same thread preprocesses its next image
+    """
+
+    buf = getattr(_local, "buf", None)
+    if buf is None:
+        buf = _local.buf = np.empty((1, IMG_SIZE, IMG_SIZE, 3), dtype=np.float32)
+    return buf
+
+def preprocess_into(img, out):
+    """
+    Shared preprocessing for a decoded BGR image, written into `out`.
+    - Resizes to 224x224 first, so later steps only touch 224x224 pixels
+    - Converts BGR to RGB and normalizes to [0, 1] in one pass
+    - `out` is a (224, 224, 3) or (1, 224, 224, 3) float32 array
+    - Same values as cvtColor -> resize -> astype -> / 255
+    """
+
+    # Resize to model input size
+    img = cv2.resize(img, (IMG_SIZE, IMG_SIZE))
+
+    # Convert BGR → RGB and normalize straight into the output buffer
+    np.divide(img[..., ::-1], _SCALE, out=out, dtype=np.float32)
+
+    return out
+
+def preprocess_image(path, out=None):
     """
     Preprocess image for model prediction.
     - Reads image from disk
-    - Converts BGR to RGB
-    - Resizes to 224x224
-    - Normalizes to [0, 1]
-    - Adds batch dimension
+    - Applies the shared preprocessing in preprocess_into
+    - Writes into `out` when given, else a new (1, 224, 224, 3) array
     """
 
     if not os.path.exists(path):
         raise FileNotFoundError(f"Image file does not exist: {path}")
 
-    img = cv2.imread(path)
+    try:
+        img = _decode(np.fromfile(path, dtype=np.uint8))
+    except OSError:
+        img = None
 
     if img is None:
-        raise ValueError(f"Failed to load image (cv2.imread returned None): {path}")
+        raise ValueError(f"Failed to load image (cv2.imdecode returned None): {path}")
 
-    # Convert BGR → RGB
-    img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    if out is None:
+        out = np.empty((1, IMG_SIZE, IMG_SIZE, 3), dtype=np.float32)
+    return preprocess_into(img, out)
 
-    # Resize to model input size
-    img = cv2.resize(img, (224, 224))
+def decode_image_bytes(data):
+    """
+    Decode an encoded image held in memory to BGR.
+    - Accepts raw bytes or a file-like object (e.g. a Werkzeug FileStorage)
+    - Decodes with cv2.imdecode, no temporary file involved
+    """
 
-    # Normalize
-    img = img.astype("float32") / 255.0
+    if hasattr(data, "read"):
+        data = data.read()
 
-    # Add batch dimension
-    img = np.expand_dims(img, axis=0)
+    img = _decode(np.frombuffer(data, dtype=np.uint8))
+
+    if img is None:
+        raise ValueError("Failed to decode image data (cv2.imdecode returned None)")
 
     return img
+
+def preprocess_image_bytes(data, out=None):
+    """
+    Preprocess an encoded image held in memory.
+    - Decodes with decode_image_bytes
+    - Writes into `out` when given (e.g. image_buffer()), else a new array
+    """
+
+    img = decode_image_bytes(data)
+
+    if out is None:
+        out = np.empty((1, IMG_SIZE, IMG_SIZE, 3), dtype=np.float32)
+    return preprocess_into(img, out)